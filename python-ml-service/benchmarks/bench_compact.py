@@ -0,0 +1,64 @@
+"""
+Forest Compaction Benchmark
+Memory, held-out MAE and latency of the exact forest and of compacted ones at several budgets
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_compact --budgets 0,0.005,0.01,0.02
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_forest import time_call
+from data.training_data import TRAINING_SEED, generate_training_data
+from models.compact import compact_forest, holdout_mae
+from models.valuation import COMPACT_HOLDOUT_ROWS, initialize_model, valuation_model
+
+
+BATCH_SIZES = [1, 64, 4096]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the exact forest with compacted ones")
+    parser.add_argument('--budgets', default='0,0.005,0.01,0.02', help="comma-separated MAE budgets")
+    parser.add_argument('--leaves', default='int16', help="leaf dtype to try first: int16 or float32")
+    args = parser.parse_args()
+
+    initialize_model()
+    exact = valuation_model.flat_forest
+    encoder = valuation_model.feature_encoder
+
+    # The budget is spent on one holdout and reported on another, so the
+    # MAE column is not the number the search optimized
+    search = generate_training_data(COMPACT_HOLDOUT_ROWS, seed=TRAINING_SEED + 1)
+    report = generate_training_data(COMPACT_HOLDOUT_ROWS, seed=TRAINING_SEED + 2)
+    X_search = encoder.transform(search.to_dict('records'))
+    y_search = search['price'].to_numpy(dtype=np.float64)
+    X = encoder.transform(report.to_dict('records'))
+    y = report['price'].to_numpy(dtype=np.float64)
+    X_batch = encoder.transform(generate_training_data(max(BATCH_SIZES), seed=0).to_dict('records'))
+
+    forests = [('exact', exact)]
+    for budget in (float(b) for b in args.budgets.split(',')):
+        compacted, _ = compact_forest(exact, X_search, y_search, budget, leaf_dtype=args.leaves)
+        forests.append((f'budget {budget:g}', compacted))
+
+    print("\n" + "="*100)
+    print(f"🗜️  Forest compaction ({exact.n_trees} trees, depth {exact.max_depth}, "
+          f"{exact.node_count:,} nodes; MAE on {len(y):,} fresh rows, ms per call)")
+    print("="*100)
+    print(f"{'forest':<14} {'trees':>6} {'depth':>6} {'leaves':>8} {'nodes':>9} {'MB':>7} {'MAE':>8} "
+          + ''.join(f"{f'{n} rows':>12}" for n in BATCH_SIZES))
+    base_mb = exact.nbytes / 1e6
+    for name, forest in forests:
+        timings = ''.join(f"{time_call(lambda: forest.predict_mean_std(X_batch[:n]), budget=0.5):>12.3f}"
+                          for n in BATCH_SIZES)
+        print(f"{name:<14} {forest.n_trees:>6} {forest.max_depth:>6} {str(forest.value.dtype):>8} "
+              f"{forest.node_count:>9,} {forest.nbytes / 1e6:>7.2f} {holdout_mae(forest, X, y):>8,.0f}{timings}")
+    print("="*100)
+    print(f"Exact forest: {base_mb:.2f} MB (8-byte nodes with float32 thresholds, float64 leaves)\n")
+
+
+if __name__ == '__main__':
+    main()
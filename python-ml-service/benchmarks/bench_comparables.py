@@ -0,0 +1,51 @@
+"""
+Comparables Index Benchmark
+Build time, memory and k-nearest query latency of the comparables index by training-set size
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_comparables --rows 10000,100000,1000000
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_forest import time_call
+from data.training_data import TRAINING_SEED, generate_training_data
+from models.comparables import ComparablesIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the comparables index at several training-set sizes")
+    parser.add_argument('--rows', default='10000,100000,1000000', help="comma-separated training-set sizes")
+    parser.add_argument('--k', type=int, default=10, help="comparables per query")
+    parser.add_argument('--queries', type=int, default=1000, help="distinct cars to query")
+    args = parser.parse_args()
+
+    # Import scikit-learn up front so the first build is not charged for it
+    import sklearn.neighbors  # noqa: F401
+
+    cars = generate_training_data(args.queries, seed=TRAINING_SEED + 2).to_dict('records')
+
+    print("\n" + "="*78)
+    print(f"🔎 Comparables index (k={args.k}, {len(cars):,} distinct query cars)")
+    print("="*78)
+    print(f"{'rows':>10} {'partitions':>11} {'largest':>9} {'build s':>8} {'MB':>8} {'ms/query':>10}")
+    for n in (int(r) for r in args.rows.split(',')):
+        frame = generate_training_data(n, seed=TRAINING_SEED + 3)
+        start = time.perf_counter()
+        index = ComparablesIndex.build(frame)
+        build_seconds = time.perf_counter() - start
+        largest = max(len(p['price']) for p in index.partitions.values())
+
+        def query_all():
+            for car in cars:
+                index.query(car, args.k)
+
+        ms_per_query = time_call(query_all, budget=1.0) / len(cars)
+        print(f"{n:>10,} {len(index.partitions):>11} {largest:>9,} {build_seconds:>8.2f} "
+              f"{index.nbytes / 1e6:>8.1f} {ms_per_query:>10.4f}")
+    print("="*78 + "\n")
+
+
+if __name__ == '__main__':
+    main()
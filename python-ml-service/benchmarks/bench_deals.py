@@ -0,0 +1,69 @@
+"""
+Top Deals Benchmark
+Latency of ranking the top-k deals among large candidate sets, with and without the surface
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_deals --candidates 10000,100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from data.training_data import TRAINING_SEED, generate_training_data
+from models.deals import DealCandidates, top_deals
+from models.surface import build_surface
+from models.valuation import current_model, ensure_model
+
+
+def _listings(n: int) -> list:
+    frame = generate_training_data(n, seed=TRAINING_SEED + 5)
+    rng = np.random.default_rng(0)
+    frame['listing_price'] = (frame.pop('price') * rng.uniform(0.8, 1.2, n)).astype(int)
+    return frame.to_dict('records')
+
+
+def _seconds(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time top-k deal ranking at several candidate-set sizes")
+    parser.add_argument('--candidates', default='10000,100000', help="comma-separated candidate-set sizes")
+    parser.add_argument('--k', type=int, default=10, help="deals returned")
+    parser.add_argument('--surface-step', type=int, default=5000, help="mileage step of the surface run")
+    args = parser.parse_args()
+
+    ensure_model()
+    model = current_model()
+    sizes = [int(n) for n in args.candidates.split(',')]
+    listings = {n: _listings(n) for n in sizes}
+
+    print("\n" + "="*78)
+    print(f"🏷️  Top {args.k} deals (seconds)")
+    print("="*78)
+    print(f"{'candidates':>10} {'columns':>8} {'model':>8} {'surface':>8} {'kept, all':>10} {'kept, 1 make':>13}")
+    surface, _ = build_surface(model, step=args.surface_step)
+    for n in sizes:
+        columns = _seconds(lambda: DealCandidates.from_records(listings[n]))
+        candidates = DealCandidates.from_records(listings[n])
+        with_model = _seconds(lambda: top_deals(candidates, model, args.k))
+
+        model.surface = surface
+        with_surface = _seconds(lambda: top_deals(candidates, model, args.k))
+        model.surface = None
+
+        # A deals file: scored once per model version, then only filtered and selected
+        candidates.keep_scores = True
+        top_deals(candidates, model, args.k)
+        kept = _seconds(lambda: top_deals(candidates, model, args.k))
+        kept_make = _seconds(lambda: top_deals(candidates, model, args.k, make=['Honda']))
+        print(f"{n:>10,} {columns:>8.3f} {with_model:>8.3f} {with_surface:>8.3f} {kept:>10.4f} {kept_make:>13.4f}")
+    print("="*78 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Estimator Backend Benchmark
+Accuracy, interval calibration, training time and latency of every registered valuation backend
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_estimators
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_forest import time_call
+from data.training_data import TRAINING_SEED, generate_training_data, get_training_data
+from models.estimators import CONFIDENCE_SPREADS, ESTIMATORS, QUANTILES
+from models.valuation import CarValuationModel
+
+
+BATCH_SIZES = [1, 64, 4096]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the valuation estimator backends")
+    parser.add_argument('--estimators', default=','.join(ESTIMATORS), help="comma-separated registry names")
+    parser.add_argument('--holdout', type=int, default=2000, help="fresh synthetic rows to score on")
+    args = parser.parse_args()
+
+    training = get_training_data()
+    holdout = generate_training_data(args.holdout, seed=TRAINING_SEED + 2)
+    cars = holdout.to_dict('records')
+    y = holdout['price'].to_numpy(dtype=np.float64)
+    batch_cars = generate_training_data(max(BATCH_SIZES), seed=0).to_dict('records')
+    coverage_target = QUANTILES[1] - QUANTILES[0]
+
+    rows = []
+    for name in args.estimators.split(','):
+        model = CarValuationModel(estimator=name)
+        start = time.perf_counter()
+        model.train(training)
+        train_seconds = time.perf_counter() - start
+
+        X = model.feature_encoder.transform(cars)
+        mean, spread = model._mean_std(X)
+        half_width = spread * CONFIDENCE_SPREADS
+        X_batch = model.feature_encoder.transform(batch_cars)
+        rows.append({
+            'name': name,
+            'train': train_seconds,
+            'mae': float(np.mean(np.abs(mean - y))),
+            'r2': 1 - float(np.sum((mean - y) ** 2) / np.sum((y - y.mean()) ** 2)),
+            'coverage': float(np.mean(np.abs(y - mean) <= half_width)),
+            'width': float(np.mean(half_width)),
+            'mb': sum(model.memory_footprint().values()) / 1e6,
+            'ms': [time_call(lambda: model._mean_std(X_batch[:n]), budget=0.5) for n in BATCH_SIZES],
+        })
+
+    print("\n" + "="*108)
+    print(f"🏁 Estimator backends (trained on {len(training):,} rows, scored on {len(y):,} fresh rows; "
+          f"interval = confidence, target coverage {coverage_target:.0%})")
+    print("="*108)
+    print(f"{'backend':<8} {'train s':>8} {'MAE':>8} {'R²':>7} {'coverage':>9} {'± width':>9} {'MB':>7} "
+          + ''.join(f"{f'{n} rows ms':>14}" for n in BATCH_SIZES))
+    for r in rows:
+        print(f"{r['name']:<8} {r['train']:>8.2f} {r['mae']:>8,.0f} {r['r2']:>7.3f} {r['coverage']:>9.1%} "
+              f"{r['width']:>9,.0f} {r['mb']:>7.2f}" + ''.join(f"{ms:>14.3f}" for ms in r['ms']))
+    print("="*108 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Featurizer Microbenchmark
+Compares the DataFrame/LabelEncoder path with the precompiled lookup tables
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_featurizer
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+from data.training_data import generate_training_data
+from models.valuation import initialize_model, valuation_model
+
+
+BATCH_SIZES = [1, 64, 1000, 10000]
+
+
+def time_call(fn, repeat: int) -> float:
+    """Best-of-three mean time per call in milliseconds"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+def main():
+    initialize_model()
+    model = valuation_model
+
+    cars = generate_training_data(max(BATCH_SIZES)).drop(columns=['price']).to_dict('records')
+
+    print("\n" + "="*60)
+    print("⏱️  Featurizer benchmark (ms per call)")
+    print("="*60)
+    print(f"{'batch':>8} {'pandas':>12} {'lookup':>12} {'speedup':>10}")
+
+    for size in BATCH_SIZES:
+        batch = cars[:size]
+        repeat = max(1, 2000 // size)
+
+        legacy = lambda: model.prepare_features(pd.DataFrame(batch))[model.features].to_numpy()
+        fast = lambda: model.feature_encoder.transform(batch)
+
+        # Both paths must produce the same matrix the forest sees
+        expected = legacy().astype(np.float32)
+        assert np.array_equal(expected, fast()), "featurizer mismatch"
+
+        legacy_ms = time_call(legacy, max(1, repeat // 10))
+        fast_ms = time_call(fast, repeat)
+        print(f"{size:>8} {legacy_ms:>12.3f} {fast_ms:>12.3f} {legacy_ms / fast_ms:>9.1f}x")
+
+    print("="*60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
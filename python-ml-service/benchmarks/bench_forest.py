@@ -0,0 +1,71 @@
+"""
+Forest Inference Benchmark
+Compares sklearn's predict + per-tree loop with the flattened forest engine
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_forest
+"""
+
+import time
+import numpy as np
+
+from data.training_data import generate_training_data
+from models.valuation import initialize_model, valuation_model
+
+
+BATCH_SIZES = [1, 64, 4096, 100000]
+
+
+def time_call(fn, budget: float = 1.0) -> float:
+    """Mean time per call in milliseconds, repeating for about `budget` seconds"""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget or calls >= 1000:
+            return elapsed / calls * 1000
+
+
+def main():
+    initialize_model()
+    model = valuation_model
+    forest = model.model
+    forest.set_params(n_jobs=1)
+
+    cars = generate_training_data(max(BATCH_SIZES)).to_dict('records')
+    X_all = model.feature_encoder.transform(cars)
+
+    print("\n" + "="*72)
+    print(f"⏱️  Forest inference benchmark ({forest.n_estimators} trees, "
+          f"{model.flat_forest.node_count:,} nodes, ms per call)")
+    print("="*72)
+    print(f"{'batch':>8} {'sklearn+loop':>14} {'sklearn':>12} {'flat':>12} {'speedup':>10}")
+
+    for size in BATCH_SIZES:
+        X = X_all[:size]
+
+        def sklearn_with_loop():
+            forest.predict(X)
+            np.std([tree.predict(X) for tree in forest.estimators_], axis=0)
+
+        sklearn_only = lambda: forest.predict(X)
+        flat = lambda: model.flat_forest.predict_mean_std(X)
+
+        assert np.array_equal(flat()[0], forest.predict(X)), "flat forest mismatch"
+
+        loop_ms = time_call(sklearn_with_loop)
+        sklearn_ms = time_call(sklearn_only)
+        flat_ms = time_call(flat)
+        print(f"{size:>8} {loop_ms:>14.3f} {sklearn_ms:>12.3f} {flat_ms:>12.3f} "
+              f"{loop_ms / flat_ms:>9.1f}x")
+
+    print("="*72)
+    print("sklearn+loop is the old predict path (mean + per-tree std); flat returns both")
+    print("sklearn is the forest mean alone, without the uncertainty step\n")
+
+
+if __name__ == '__main__':
+    main()
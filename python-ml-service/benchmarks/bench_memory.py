@@ -0,0 +1,121 @@
+"""
+Worker Memory Benchmark
+Starts uvicorn with several workers, with and without the shared model, and sums their memory
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_memory --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.loadgen import SERVICE_DIR, free_port, random_car
+from serving.memory import process_memory
+
+
+def child_pids(pid: int):
+    """Direct children of a process (Linux)"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Field 4 is the parent pid; the command name may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def wait_ready(port: int, timeout: float = 120.0):
+    """Until several /health/ready calls in a row succeed (requests spread over workers)"""
+    deadline = time.time() + timeout
+    streak = 0
+    while streak < 20:
+        if time.time() > deadline:
+            raise RuntimeError("Workers did not become ready in time")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=2):
+                streak += 1
+        except OSError:
+            streak = 0
+            time.sleep(0.1)
+
+
+def measure(workers: int, shared: bool, requests: int) -> dict:
+    port = free_port()
+    env = {**os.environ, 'ML_SHARED_MODEL': '1' if shared else '0'}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        rng = random.Random(0)
+        for _ in range(requests):
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/api/valuation",
+                data=json.dumps(random_car(rng)).encode(),
+                headers={'Content-Type': 'application/json'},
+            )
+            urllib.request.urlopen(request, timeout=10).read()
+
+        # uvicorn's supervisor spawns the workers plus a multiprocessing resource tracker
+        pids = []
+        for pid in child_pids(process.pid):
+            with open(f'/proc/{pid}/cmdline') as f:
+                if 'resource_tracker' not in f.read():
+                    pids.append(pid)
+        memories = [process_memory(pid) for pid in pids]
+        memories = [m for m in memories if m.get('rssBytes')]
+        return {
+            'workers': memories,
+            'rss': sum(m['rssBytes'] for m in memories),
+            'pss': sum(m.get('pssBytes', 0) for m in memories),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker memory with and without the shared model")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help="valuation requests before measuring")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    print("\n" + "="*72)
+    print(f"🧠 Memory with {args.workers} uvicorn workers")
+    print("="*72)
+
+    results = {}
+    for shared in (False, True):
+        label = 'shared (mmap)' if shared else 'private copy'
+        results[label] = result = measure(args.workers, shared, args.requests)
+        print(f"\n{label}:")
+        for m in result['workers']:
+            print(f"  pid {m['pid']:>7}  rss {m['rssBytes'] / mb:7.1f} MB  "
+                  f"anon {m.get('rssAnonBytes', 0) / mb:7.1f} MB  "
+                  f"file {m.get('rssFileBytes', 0) / mb:6.1f} MB  pss {m.get('pssBytes', 0) / mb:7.1f} MB")
+        print(f"  total rss {result['rss'] / mb:.1f} MB, total pss {result['pss'] / mb:.1f} MB")
+
+    private, shared = results['private copy'], results['shared (mmap)']
+    print("\n" + "="*72)
+    print(f"PSS saved: {(private['pss'] - shared['pss']) / mb:.1f} MB "
+          f"({1 - shared['pss'] / private['pss']:.0%}) across {args.workers} workers")
+    print("="*72 + "\n")
+
+
+if __name__ == '__main__':
+    main()
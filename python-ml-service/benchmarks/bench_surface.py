@@ -0,0 +1,46 @@
+"""
+Valuation Surface Benchmark
+Build time, size, interpolation error and lookup latency of the valuation surface by grid step
+
+Run from python-ml-service/:
+    python -m benchmarks.bench_surface --steps 10000,5000,2500
+"""
+
+import argparse
+
+from benchmarks.bench_forest import time_call
+from data.training_data import TRAINING_SEED, generate_training_data
+from models.surface import build_surface
+from models.valuation import current_model, ensure_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the valuation surface at several grid steps")
+    parser.add_argument('--steps', default='10000,5000,2500', help="comma-separated mileage steps in km")
+    parser.add_argument('--jobs', type=int, default=None, help="build processes (default: all cores)")
+    args = parser.parse_args()
+
+    ensure_model()
+    model = current_model()
+    cars = generate_training_data(4096, seed=TRAINING_SEED + 2).to_dict('records')
+
+    print("\n" + "="*78)
+    print("🗺️  Valuation surface vs. model")
+    print("="*78)
+    print(f"{'step km':>8} {'build s':>8} {'MB':>7} {'MAE $':>7} {'p99 $':>7} {'rel MAE':>8} "
+          f"{'1 row µs':>9} {'µs/row@4k':>10}")
+    for step in (int(s) for s in args.steps.split(',')):
+        surface, report = build_surface(model, step=step, jobs=args.jobs)
+        error = report['error']
+        one = time_call(lambda: surface.lookup(cars[:1]), budget=0.5) * 1000
+        many = time_call(lambda: surface.lookup(cars), budget=0.5) * 1000 / len(cars)
+        print(f"{step:>8,} {report['buildSeconds']:>8.1f} {report['bytes'] / 1e6:>7.1f} {error['mae']:>7,.0f} "
+              f"{error['p99']:>7,.0f} {error['relativeMae']:>8.2%} {one:>9.1f} {many:>10.2f}")
+
+    model_one = time_call(lambda: model.score(cars[:1]), budget=0.5) * 1000
+    print(f"\nModel (no surface, no cache), 1 row: {model_one:.0f} µs")
+    print("="*78 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+"""
+Local Load Generator
+Drives the API at a fixed request rate or concurrency and reports latency per endpoint
+
+Used through run.py:
+    python run.py load --rps 200 --duration 20
+    python run.py load --concurrency 32 --config "workers=1" --config "workers=2 ML_EXECUTOR=process"
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from data.training_data import MAKES, MODELS, PROVINCES, TRIMS
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    'valuation': '/api/valuation',
+    'depreciation': '/api/depreciation',
+    'full-analysis': '/api/full-analysis',
+}
+
+
+def random_car(rng: random.Random) -> Dict[str, Any]:
+    """A realistic listing drawn from the training data tables"""
+    make = rng.choice(list(MAKES))
+    year = rng.randint(2014, 2024)
+    age = 2024 - year
+    mileage = max(0, int(rng.gauss(18000, 6000) * age))
+    base = MAKES[make]['base_price'] * (1 - MAKES[make]['depreciation']) ** age
+    return {
+        'make': make,
+        'model': rng.choice(MODELS[make]),
+        'year': year,
+        'mileage': mileage,
+        'trim': rng.choice(TRIMS),
+        'province': rng.choice(PROVINCES),
+        'listing_price': int(base * rng.uniform(0.8, 1.2)),
+    }
+
+
+def payload(endpoint: str, rng: random.Random) -> Dict[str, Any]:
+    car = random_car(rng)
+    if endpoint == 'depreciation':
+        return {
+            'make': car['make'],
+            'model': car['model'],
+            'purchasePrice': car['listing_price'],
+            'year': car['year'],
+            'mileage': car['mileage'],
+            'province': car['province'],
+            'years': rng.randint(1, 10),
+        }
+    return car
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection speaking just enough of the protocol for JSON POSTs"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def post(self, path: str, body: bytes) -> Tuple[int, bytes]:
+        if self.writer is None:
+            await self.connect()
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            content = b''
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                content += await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            content = await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection') == 'close':
+            self.close()
+        return status, content
+
+
+class EndpointStats:
+    """Latencies and outcomes for one endpoint"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.status_codes: Dict[int, int] = {}
+
+    def record(self, latency: float, status: Optional[int]):
+        self.latencies.append(latency)
+        if status is None or status >= 400:
+            self.errors += 1
+        key = status if status is not None else 0
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        total = len(latencies)
+        return {
+            'requests': total,
+            'throughput': round(total / elapsed, 1) if elapsed else 0.0,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': percentile(1.0),
+            'errorRate': round(self.errors / total, 4) if total else 0.0,
+            'statusCodes': {str(k): v for k, v in sorted(self.status_codes.items())},
+        }
+
+
+class LoadGenerator:
+    """
+    Sends a random mix of endpoint calls for a fixed duration
+
+    With `rps`, requests are started on a fixed schedule (open loop) and
+    latency is measured from the scheduled start, so a slow server cannot
+    hide queueing delay by slowing the client down. Otherwise `concurrency`
+    clients each send back-to-back requests (closed loop).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        endpoints: List[str],
+        duration: float = 10.0,
+        rps: Optional[float] = None,
+        concurrency: int = 16,
+        max_connections: int = 256,
+        seed: int = 0,
+    ):
+        unknown = [e for e in endpoints if e not in ENDPOINTS]
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {', '.join(unknown)}")
+        self.host = host
+        self.port = port
+        self.endpoints = endpoints
+        self.duration = duration
+        self.rps = rps
+        self.concurrency = concurrency
+        self.max_connections = max_connections
+        self.rng = random.Random(seed)
+        self.stats = {endpoint: EndpointStats() for endpoint in endpoints}
+
+    def _next_request(self) -> Tuple[str, bytes]:
+        endpoint = self.rng.choice(self.endpoints)
+        return endpoint, json.dumps(payload(endpoint, self.rng)).encode()
+
+    async def _send(self, conn: Connection, endpoint: str, body: bytes, started: float):
+        try:
+            status, _ = await conn.post(ENDPOINTS[endpoint], body)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError):
+            conn.close()
+            status = None
+        self.stats[endpoint].record(time.perf_counter() - started, status)
+
+    async def _closed_loop(self, deadline: float):
+        async def client():
+            conn = Connection(self.host, self.port)
+            while time.perf_counter() < deadline:
+                endpoint, body = self._next_request()
+                await self._send(conn, endpoint, body, time.perf_counter())
+            conn.close()
+
+        await asyncio.gather(*(client() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, start: float, deadline: float):
+        idle: List[Connection] = []
+        slots = asyncio.Semaphore(self.max_connections)
+        tasks = set()
+
+        async def fire(endpoint: str, body: bytes, scheduled: float):
+            async with slots:
+                conn = idle.pop() if idle else Connection(self.host, self.port)
+                await self._send(conn, endpoint, body, scheduled)
+                idle.append(conn)
+
+        interval = 1 / self.rps
+        sent = 0
+        while True:
+            scheduled = start + sent * interval
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint, body = self._next_request()
+            task = asyncio.get_running_loop().create_task(fire(endpoint, body, scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        for conn in idle:
+            conn.close()
+
+    async def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        deadline = start + self.duration
+        if self.rps:
+            await self._open_loop(start, deadline)
+        else:
+            await self._closed_loop(deadline)
+        elapsed = time.perf_counter() - start
+        return {endpoint: stats.summary(elapsed) for endpoint, stats in self.stats.items()}
+
+
+def parse_config(spec: str) -> Tuple[str, int, Dict[str, str]]:
+    """
+    Parse a server config like "workers=2 ML_EXECUTOR=process"
+
+    `workers` is the number of uvicorn worker processes; every other key
+    is passed to the service as an environment variable.
+    """
+    workers = 1
+    env = {}
+    for part in spec.split():
+        key, _, value = part.partition('=')
+        if not value:
+            raise ValueError(f"Expected KEY=VALUE in config, got {part!r}")
+        if key == 'workers':
+            workers = int(value)
+        else:
+            env[key] = value
+    return spec or 'default', workers, env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: Dict[str, str], timeout: float = 120.0) -> subprocess.Popen:
+    """Launch uvicorn without --reload and wait until /health/ready returns 200"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=SERVICE_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            # The server accepts connections while the model loads and warms up;
+            # /health/ready answers 503 until it can serve valuations
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1):
+                return process
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                process.terminate()
+                raise RuntimeError(f"Server readiness check failed with HTTP {e.code}")
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass  # Not listening yet
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def print_report(name: str, report: Dict[str, Any]):
+    print(f"\n📋 {name}")
+    print(f"  {'endpoint':<16} {'reqs':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'errors':>8}")
+    for endpoint, row in report.items():
+        print(f"  {endpoint:<16} {row['requests']:>7} {row['throughput']:>8.1f} {row['p50']:>9.2f} "
+              f"{row['p95']:>9.2f} {row['p99']:>9.2f} {row['max']:>9.2f} {row['errorRate']:>8.2%}")
+
+
+def print_comparison(reports: Dict[str, Dict[str, Any]]):
+    print("\n" + "="*72)
+    print("⚖️  Config comparison")
+    print("="*72)
+    print(f"  {'config':<32} {'endpoint':<16} {'req/s':>8} {'p99 ms':>9} {'errors':>8}")
+    for name, report in reports.items():
+        for endpoint, row in report.items():
+            print(f"  {name:<32} {endpoint:<16} {row['throughput']:>8.1f} "
+                  f"{row['p99']:>9.2f} {row['errorRate']:>8.2%}")
+
+
+def run_load(
+    endpoints: List[str],
+    configs: List[str],
+    duration: float,
+    rps: Optional[float],
+    concurrency: int,
+    url: Optional[str] = None,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Run the load once per server config (or against an already running `url`)"""
+    mode = f"{rps:g} req/s" if rps else f"{concurrency} concurrent clients"
+    print(f"\n🔥 Load test: {', '.join(endpoints)} for {duration:g}s at {mode}")
+
+    reports = {}
+    targets: List[Tuple[str, Callable]] = []
+    if url:
+        host, _, port = url.replace('http://', '').rstrip('/').partition(':')
+        targets.append((url, lambda: (None, host, int(port or 80))))
+    else:
+        for spec in configs or ['']:
+            def launch(spec=spec):
+                _, workers, env = parse_config(spec)
+                port = free_port()
+                return start_server(port, workers, env), '127.0.0.1', port
+            targets.append((parse_config(spec)[0], launch))
+
+    for name, launch in targets:
+        print(f"\n🚀 Starting {name}...")
+        process, host, port = launch()
+        try:
+            generator = LoadGenerator(host, port, endpoints, duration=duration,
+                                      rps=rps, concurrency=concurrency, seed=seed)
+            reports[name] = asyncio.run(generator.run())
+        finally:
+            if process is not None:
+                stop_server(process)
+        print_report(name, reports[name])
+
+    if len(reports) > 1:
+        print_comparison(reports)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Saved report to {output}")
+    return reports
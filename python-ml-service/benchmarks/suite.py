@@ -0,0 +1,268 @@
+"""
+ML Service Benchmark Suite
+Times the hot paths at several batch sizes and compares runs against a JSON baseline
+
+Run from python-ml-service/:
+    python -m benchmarks.suite                          # print results
+    python -m benchmarks.suite --save baseline.json     # record a baseline
+    python -m benchmarks.suite --compare baseline.json  # exit 1 on regressions
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import sklearn
+
+from data.training_data import generate_training_data
+from models.depreciation import DepreciationModel
+from models.forest import mean_std
+from models.valuation import CarValuationModel, initialize_model, prediction_cache, valuation_model
+
+
+# Metric compared against the baseline
+TRACKED_METRIC = 'medianMs'
+
+BATCH_SIZES = [1, 64, 1000, 10000]
+QUICK_BATCH_SIZES = [1, 64, 1000]
+
+SUITE_VERSION = 1
+
+
+@contextlib.contextmanager
+def cache_size(size: int):
+    """Run with the shared prediction cache resized (0 disables it)"""
+    previous = prediction_cache.max_size
+    prediction_cache.max_size = size
+    try:
+        yield
+    finally:
+        prediction_cache.max_size = previous
+
+
+def train_quietly(train_df) -> CarValuationModel:
+    """Train a throwaway, uncached model without its progress output"""
+    model = CarValuationModel()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.train(train_df)
+    return model
+
+
+def measure(fn: Callable[[], Any], budget: float, min_calls: int = 5, max_calls: int = 1000) -> Dict[str, float]:
+    """Call fn repeatedly for about `budget` seconds; per-call times in milliseconds"""
+    fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_calls:
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+        if len(times) >= min_calls and time.perf_counter() - start >= budget:
+            break
+    times.sort()
+    return {
+        'calls': len(times),
+        'medianMs': round(statistics.median(times), 4),
+        'p95Ms': round(times[min(len(times) - 1, int(0.95 * len(times)))], 4),
+        'minMs': round(times[0], 4),
+    }
+
+
+class Suite:
+    """Collects named benchmark results"""
+
+    def __init__(self, budget: float, only: Optional[str] = None):
+        self.budget = budget
+        self.only = only
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def bench(self, name: str, fn: Callable[[], Any], rows: int = 1, **kwargs):
+        if self.only and self.only not in name:
+            return
+        result = measure(fn, kwargs.pop('budget', self.budget), **kwargs)
+        result['rowsPerSec'] = round(rows / result['medianMs'] * 1000, 1)
+        self.results[name] = result
+        print(f"  {name:<40} {result['medianMs']:>10.3f} ms  "
+              f"p95 {result['p95Ms']:>10.3f} ms  {result['rowsPerSec']:>14,.0f} rows/s")
+
+
+def bench_models(suite: Suite, sizes: List[int], cache_capacity: int):
+    """Training data, training, featurization, forest and depreciation"""
+    print("\n📊 Models")
+    largest = max(sizes)
+
+    for n in sizes:
+        if n > 1:
+            suite.bench(f"generate_training_data/n={n}", lambda n=n: generate_training_data(n), rows=n)
+
+    # A fresh model per call, never attached to the prediction cache
+    train_df = generate_training_data()
+    suite.bench(f"train/n={len(train_df)}", lambda: train_quietly(train_df), rows=len(train_df),
+                min_calls=1, max_calls=3)
+
+    initialize_model()
+    cars = generate_training_data(largest, seed=7).to_dict('records')
+    for car in cars:
+        car['listing_price'] = car.pop('price')
+
+    for n in sizes:
+        batch = cars[:n]
+        frame = generate_training_data(n, seed=7) if n > 1 else None
+        if frame is not None:
+            suite.bench(f"prepare_features/n={n}",
+                        lambda frame=frame: valuation_model.prepare_features(frame), rows=n)
+        suite.bench(f"featurize/n={n}", lambda batch=batch: valuation_model.featurize(batch), rows=n)
+
+        X = valuation_model.feature_encoder.transform(batch)
+        tree_preds = valuation_model.flat_forest.tree_predictions(X)
+        suite.bench(f"predict.forest/n={n}",
+                    lambda X=X: valuation_model.flat_forest.tree_predictions(X), rows=n)
+        suite.bench(f"predict.uncertainty/n={n}", lambda tp=tree_preds: mean_std(tp), rows=n)
+        suite.bench(f"predict_batch/n={n}", lambda batch=batch: valuation_model.predict_batch(batch), rows=n)
+        with cache_size(cache_capacity):
+            suite.bench(f"predict_batch.cached/n={n}",
+                        lambda batch=batch: valuation_model.predict_batch(batch), rows=n)
+
+    depreciation = DepreciationModel()
+    dep_cars = [
+        {'make': car['make'], 'model': car['model'], 'purchasePrice': car['listing_price'],
+         'year': car['year'], 'mileage': car['mileage'], 'province': car['province'], 'years': 5}
+        for car in cars
+    ]
+    suite.bench("depreciation.predict/n=1", lambda: depreciation.predict(dict(dep_cars[0])))
+    for n in sizes:
+        batch = dep_cars[:n]
+        suite.bench(f"depreciation.predict_batch/n={n}",
+                    lambda batch=batch: depreciation.predict_batch(batch), rows=n)
+
+    return cars, dep_cars
+
+
+def bench_endpoints(suite: Suite, sizes: List[int], cars: List[Dict], dep_cars: List[Dict]):
+    """Every FastAPI route through an in-process client"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    print("\n🌐 Endpoints")
+    valuation_body = {k: cars[0][k] for k in
+                      ('make', 'model', 'year', 'mileage', 'trim', 'province', 'listing_price')}
+    depreciation_body = dep_cars[0]
+
+    def post(client, path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 200, f"{path}: {response.status_code} {response.text[:200]}"
+
+    with TestClient(app) as client:
+        # The model loads in the background after startup
+        while client.get('/health/ready').status_code != 200:
+            time.sleep(0.05)
+        suite.bench("GET /health", lambda: client.get('/health'))
+        suite.bench("GET /stats", lambda: client.get('/stats'))
+        suite.bench("POST /api/valuation", lambda: post(client, '/api/valuation', valuation_body))
+        suite.bench("POST /api/depreciation", lambda: post(client, '/api/depreciation', depreciation_body))
+        suite.bench("POST /api/full-analysis", lambda: post(client, '/api/full-analysis', valuation_body))
+
+        for n in sizes:
+            items = [{k: car[k] for k in valuation_body} for car in cars[:n]]
+            suite.bench(f"POST /api/valuation/batch/n={n}",
+                        lambda items=items: post(client, '/api/valuation/batch', {'items': items}), rows=n)
+            suite.bench(f"POST /api/depreciation/batch/n={n}",
+                        lambda n=n: post(client, '/api/depreciation/batch', {'items': dep_cars[:n]}), rows=n)
+            suite.bench(f"POST /api/full-analysis/batch/n={n}",
+                        lambda items=items: post(client, '/api/full-analysis/batch', {'items': items}), rows=n)
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of benchmarks whose tracked metric got slower than the baseline by more than threshold"""
+    print("\n" + "="*72)
+    print(f"📈 Compared with baseline ({TRACKED_METRIC}, threshold +{threshold:.0%})")
+    print("="*72)
+
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"  {name:<40} {'new':>10}")
+            continue
+        change = result[TRACKED_METRIC] / before[TRACKED_METRIC] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  ❌ REGRESSION'
+        print(f"  {name:<40} {before[TRACKED_METRIC]:>10.3f} → {result[TRACKED_METRIC]:>10.3f} ms "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ML service hot paths")
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression (0.25 = 25%%)")
+    parser.add_argument('--budget', type=float, default=0.5, help="seconds spent per benchmark")
+    parser.add_argument('--quick', action='store_true', help="smaller batches and budget")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this")
+    parser.add_argument('--no-endpoints', action='store_true', help="skip the HTTP endpoints")
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    budget = min(args.budget, 0.2) if args.quick else args.budget
+
+    print("\n" + "="*72)
+    print("⏱️  ML service benchmark suite")
+    print("="*72)
+
+    suite = Suite(budget, only=args.only)
+    # After the warm-up call every timed call would be a cache hit, hiding
+    # featurize/forest regressions; only the `.cached` benchmarks use it
+    cache_capacity = max(prediction_cache.max_size, max(sizes))
+    with cache_size(0):
+        cars, dep_cars = bench_models(suite, sizes, cache_capacity)
+        if not args.no_endpoints:
+            bench_endpoints(suite, sizes, cars, dep_cars)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'version': SUITE_VERSION,
+                'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'environment': environment(),
+                'results': suite.results,
+            }, f, indent=2)
+        print(f"\n💾 Saved {len(suite.results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != environment():
+            print("\n⚠️  Baseline was recorded in a different environment; timings may not be comparable")
+        regressions = compare(suite.results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Submitted Listings Store
+Real listings sent to the service, appended to the synthetic training set
+"""
+
+import csv
+import hashlib
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from data.training_data import get_training_data, get_training_fingerprint
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+LISTINGS_PATH = os.environ.get(
+    'ML_LISTINGS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'artifacts', 'listings.csv')
+)
+
+# Columns stored per listing, in file order
+LISTING_COLUMNS = ['make', 'model', 'year', 'mileage', 'trim', 'province', 'price']
+
+_lock = threading.Lock()
+
+
+def append_listings(rows: List[Dict[str, Any]], path: str = LISTINGS_PATH) -> int:
+    """Append validated listings to the CSV store; returns the total stored"""
+    with _lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=LISTING_COLUMNS, extrasaction='ignore')
+            if is_new:
+                writer.writeheader()
+            writer.writerows(rows)
+        return count_listings(path)
+
+
+def count_listings(path: str = LISTINGS_PATH) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def load_listings(path: str = LISTINGS_PATH) -> 'pd.DataFrame':
+    import pandas as pd
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=LISTING_COLUMNS)
+    return pd.read_csv(path, dtype={'make': str, 'model': str, 'trim': str, 'province': str})
+
+
+def listings_fingerprint(path: str = LISTINGS_PATH) -> str:
+    """Hash of the stored listings ('' when there are none)"""
+    if not os.path.exists(path):
+        return ''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_training_set(path: str = LISTINGS_PATH) -> 'pd.DataFrame':
+    """Synthetic training data followed by every submitted listing"""
+    import pandas as pd
+    synthetic = get_training_data()
+    listings = load_listings(path)
+    if listings.empty:
+        return synthetic
+    return pd.concat([synthetic, listings], ignore_index=True)
+
+
+def get_training_set_fingerprint(path: str = LISTINGS_PATH) -> str:
+    """Fingerprint of get_training_set(); unchanged from the synthetic one when no listings exist"""
+    extra = listings_fingerprint(path)
+    if not extra:
+        return get_training_fingerprint()
+    return hashlib.sha256(f"{get_training_fingerprint()}:{extra}".encode()).hexdigest()
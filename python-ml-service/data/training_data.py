@@ -6,8 +6,26 @@ Generates realistic car listings for ML model training
 import warnings
 warnings.filterwarnings('ignore', category=UserWarning)
 
-import pandas as pd
 import numpy as np
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Iterator
+
+# pandas is imported where frames are built, so the lookup tables below can
+# be used (e.g. by the service at startup) without paying for it
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bump when the generator logic changes so cached model artifacts are retrained
+DATA_VERSION = 2
+TRAINING_SAMPLES = 2000
+TRAINING_SEED = 42
+
+# Rows generated per chunk when streaming
+CHUNK_SIZE = 500_000
 
 # Canadian provinces
 PROVINCES = ['ON', 'QC', 'BC', 'AB', 'MB', 'SK', 'NS', 'NB', 'NL', 'PE', 'NT', 'YT', 'NU']
@@ -59,83 +77,176 @@ PROVINCE_MULTIPLIERS = {
 }
 
 
-def generate_training_data(n_samples=2000):
-    """Generate synthetic car listing data for training"""
-    np.random.seed(42)
-    
-    data = []
+# Lookup tables for the vectorized generator
+_MAKE_NAMES = list(MAKES.keys())
+_MAKE_ARRAY = np.array(_MAKE_NAMES, dtype=object)
+_BASE_PRICE = np.array([MAKES[m]['base_price'] for m in _MAKE_NAMES], dtype=np.float64)
+_DEPRECIATION = np.array([MAKES[m]['depreciation'] for m in _MAKE_NAMES], dtype=np.float64)
+_RELIABILITY = np.array([MAKES[m]['reliability'] for m in _MAKE_NAMES], dtype=np.float64)
+_MODEL_ARRAY = np.array([model for m in _MAKE_NAMES for model in MODELS[m]], dtype=object)
+_MODEL_COUNT = np.array([len(MODELS[m]) for m in _MAKE_NAMES], dtype=np.int64)
+_MODEL_OFFSET = np.concatenate(([0], np.cumsum(_MODEL_COUNT)[:-1]))
+_TRIM_ARRAY = np.array(TRIMS, dtype=object)
+_PROVINCE_ARRAY = np.array(PROVINCES, dtype=object)
+_PROVINCE_MULT = np.array([PROVINCE_MULTIPLIERS[p] for p in PROVINCES], dtype=np.float64)
+
+
+def _generate_chunk(n_samples: int, rng: np.random.Generator) -> 'pd.DataFrame':
+    """Draw every column at once and price the listings with array expressions"""
     current_year = 2024
     
-    for _ in range(n_samples):
-        # Random car selection
-        make = np.random.choice(list(MAKES.keys()))
-        model = np.random.choice(MODELS[make])
-        year = np.random.randint(2015, 2025)
-        age = current_year - year
-        
-        # Mileage (realistic Canadian driving: 15,000-20,000 km/year)
-        avg_km_per_year = np.random.uniform(12000, 22000)
-        mileage = int(age * avg_km_per_year * np.random.uniform(0.8, 1.2))
-        mileage = max(0, mileage)  # New cars have 0 km
-        
-        # Trim
-        trim = np.random.choice(TRIMS)
-        trim_multiplier = 1.0 + (TRIMS.index(trim) * 0.05)  # Higher trims cost more
-        
-        # Province
-        province = np.random.choice(PROVINCES)
-        province_mult = PROVINCE_MULTIPLIERS[province]
-        
-        # Calculate base price
-        make_data = MAKES[make]
-        base_price = make_data['base_price']
-        
-        # Apply depreciation (compound yearly)
-        depreciation_rate = make_data['depreciation']
-        depreciated_value = base_price * (1 - depreciation_rate) ** age
-        
-        # Apply mileage penalty (high mileage reduces value)
-        expected_mileage = age * 18000
-        if mileage > expected_mileage:
-            excess_km = mileage - expected_mileage
-            mileage_penalty = 1 - (excess_km / 200000) * 0.15  # Max 15% penalty
-            mileage_penalty = max(0.85, mileage_penalty)
-        else:
-            mileage_penalty = 1.0
-        
-        # Calculate final price
-        price = depreciated_value * trim_multiplier * province_mult * mileage_penalty
-        
-        # Add some random variance (±8%)
-        price = price * np.random.uniform(0.92, 1.08)
-        price = int(price / 100) * 100  # Round to nearest $100
-        
-        # Ensure minimum price
-        price = max(5000, price)
+    # Random car selection
+    make_idx = rng.integers(0, len(_MAKE_NAMES), n_samples)
+    model_idx = _MODEL_OFFSET[make_idx] + (rng.random(n_samples) * _MODEL_COUNT[make_idx]).astype(np.int64)
+    year = rng.integers(2015, 2025, n_samples)
+    age = current_year - year
+    
+    # Mileage (realistic Canadian driving: 15,000-20,000 km/year)
+    avg_km_per_year = rng.uniform(12000, 22000, n_samples)
+    mileage = (age * avg_km_per_year * rng.uniform(0.8, 1.2, n_samples)).astype(np.int64)
+    mileage = np.maximum(0, mileage)  # New cars have 0 km
+    
+    # Trim (higher trims cost more) and province
+    trim_idx = rng.integers(0, len(TRIMS), n_samples)
+    trim_multiplier = 1.0 + trim_idx * 0.05
+    province_idx = rng.integers(0, len(PROVINCES), n_samples)
+    province_mult = _PROVINCE_MULT[province_idx]
+    
+    # Apply depreciation (compound yearly)
+    depreciated_value = _BASE_PRICE[make_idx] * (1 - _DEPRECIATION[make_idx]) ** age
+    
+    # Apply mileage penalty (high mileage reduces value, max 15%)
+    excess_km = mileage - age * 18000
+    mileage_penalty = np.where(
+        excess_km > 0,
+        np.maximum(0.85, 1 - (excess_km / 200000) * 0.15),
+        1.0
+    )
+    
+    # Calculate final price with ±8% variance, rounded down to $100
+    price = depreciated_value * trim_multiplier * province_mult * mileage_penalty
+    price = price * rng.uniform(0.92, 1.08, n_samples)
+    price = (price / 100).astype(np.int64) * 100
+    
+    # Ensure minimum price
+    price = np.maximum(5000, price)
+    
+    import pandas as pd
+    return pd.DataFrame({
+        'make': _MAKE_ARRAY[make_idx],
+        'model': _MODEL_ARRAY[model_idx],
+        'year': year.astype(np.int64),
+        'mileage': mileage,
+        'trim': _TRIM_ARRAY[trim_idx],
+        'province': _PROVINCE_ARRAY[province_idx],
+        'price': price,
+        'age': age.astype(np.int64),
+        'reliability_score': _RELIABILITY[make_idx],
+    })
+
+
+def iter_training_data(
+    n_samples: int,
+    chunk_size: int = CHUNK_SIZE,
+    seed: int = TRAINING_SEED
+) -> Iterator['pd.DataFrame']:
+    """
+    Stream synthetic listings in chunks so memory stays bounded
+    
+    Chunk i is drawn from its own generator seeded with (seed, i), so the
+    same seed and chunk size always reproduce the same rows.
+    """
+    for i, start in enumerate(range(0, n_samples, chunk_size)):
+        rng = np.random.default_rng([seed, i])
+        yield _generate_chunk(min(chunk_size, n_samples - start), rng)
+
+
+def generate_training_data(
+    n_samples: int = TRAINING_SAMPLES,
+    seed: int = TRAINING_SEED,
+    chunk_size: int = CHUNK_SIZE
+) -> 'pd.DataFrame':
+    """Generate synthetic car listing data for training"""
+    chunks = list(iter_training_data(n_samples, chunk_size, seed))
+    if len(chunks) == 1:
+        return chunks[0]
+    import pandas as pd
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_training_data(
+    path: str,
+    n_samples: int,
+    chunk_size: int = CHUNK_SIZE,
+    seed: int = TRAINING_SEED
+) -> int:
+    """Stream synthetic listings to a CSV or Parquet file; returns rows written"""
+    rows = 0
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet requires pyarrow: pip install pyarrow")
         
-        data.append({
-            'make': make,
-            'model': model,
-            'year': year,
-            'mileage': mileage,
-            'trim': trim,
-            'province': province,
-            'price': price,
-            'age': age,
-            'reliability_score': make_data['reliability'],
-        })
+        writer = None
+        try:
+            for chunk in iter_training_data(n_samples, chunk_size, seed):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
     
-    return pd.DataFrame(data)
+    for i, chunk in enumerate(iter_training_data(n_samples, chunk_size, seed)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        rows += len(chunk)
+    return rows
 
 
 def get_training_data():
     """Get training data (generate if not exists)"""
-    return generate_training_data(2000)
+    return generate_training_data(TRAINING_SAMPLES)
+
+
+def get_training_fingerprint() -> str:
+    """Hash of everything that determines the generated training set"""
+    spec = {
+        'version': DATA_VERSION,
+        'n_samples': TRAINING_SAMPLES,
+        'seed': TRAINING_SEED,
+        'provinces': PROVINCES,
+        'makes': MAKES,
+        'models': MODELS,
+        'trims': TRIMS,
+        'province_multipliers': PROVINCE_MULTIPLIERS,
+    }
+    payload = json.dumps(spec, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
 
 
 if __name__ == '__main__':
-    # Test data generation
-    df = generate_training_data(100)
-    print(df.head(10))
-    print(f"\nDataset shape: {df.shape}")
-    print(f"\nPrice statistics:\n{df['price'].describe()}")
+    parser = argparse.ArgumentParser(description="Generate synthetic car listings")
+    parser.add_argument('--rows', type=int, default=100, help="Number of listings")
+    parser.add_argument('--out', help="CSV or .parquet file to stream rows into")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=TRAINING_SEED)
+    args = parser.parse_args()
+    
+    if args.out:
+        start = time.perf_counter()
+        rows = write_training_data(args.out, args.rows, args.chunk_size, args.seed)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(args.out) / 1e6
+        print(f"✅ Wrote {rows:,} rows to {args.out} ({size_mb:.1f} MB) in {elapsed:.1f}s "
+              f"({rows / elapsed:,.0f} rows/s)")
+    else:
+        # Test data generation
+        df = generate_training_data(args.rows, seed=args.seed)
+        print(df.head(10))
+        print(f"\nDataset shape: {df.shape}")
+        print(f"\nPrice statistics:\n{df['price'].describe()}")
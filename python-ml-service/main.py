@@ -3,21 +3,68 @@
 AI-powered car valuation and depreciation prediction
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from functools import partial
+from typing import Any, Dict, List, Optional
+import asyncio
+import csv
+import io
+import json
+import os
 import uvicorn
 
 # Import models
-from models.valuation import get_valuation, initialize_model
-from models.depreciation import get_depreciation
+from data.listings import append_listings
+from models.valuation import (
+    current_model, ensure_model, get_comparables, get_valuation, get_valuations, prediction_cache
+)
+from models.comparables import MAX_COMPARABLES
+from models.deals import DEALS_PATH, MAX_CANDIDATES, MAX_TOP_K, get_top_deals
+from models.depreciation import MAX_HORIZON, get_depreciation, get_depreciations
+from models.features import CURRENT_YEAR
+from models.pipeline import get_full_analyses
+from models.retrain import Retrainer
+from models.surface import SURFACE_ENABLED, start_surface_build
+from models.timing import StageStats, current_timer, server_timing
+from serving.batcher import MicroBatcher
+from serving.executor import ExecutorSaturated, InferenceExecutor
+from serving.metrics import MetricsMiddleware, ServiceMetrics, model_collector, stats_collector
+from serving.memory import process_memory
+from serving.ndjson import NDJSONResponse, stream_chunk_size, stream_chunks
+from serving.readiness import Readiness, warm_start, warmup_batch_size
+
+# Startup phases; the model loads in the background after the port is bound
+readiness = Readiness(
+    started=_import_started, import_seconds=time.perf_counter() - _import_started
+)
+
+# Request counts, latency histograms and model gauges for /metrics
+metrics = ServiceMetrics()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response whose rendering is recorded as the `serialize` stage"""
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            metrics.observe_stage('serialize', time.perf_counter() - start)
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="6ixKar ML Service",
     description="AI-powered car valuation and depreciation prediction for Canadian market",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse
 )
 
 # CORS middleware (allow Next.js to call this)
@@ -31,10 +78,111 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+
+# CPU-bound inference runs here so the event loop keeps serving
+executor = InferenceExecutor.from_env()
+executor.on_stages = metrics.observe_stages
+
+# Per-stage timings of the fused full-analysis pipeline
+analysis_stats = StageStats()
+
+# Concurrent single-car valuations are grouped into one model call
+USE_MICROBATCH = os.environ.get('ML_MICROBATCH', '1') != '0'
+batcher = MicroBatcher.from_env(
+    get_valuations, executor.run, max_concurrent=executor.workers, max_queue=executor.max_queue
+)
+
+# Retrains on submitted listings in the background and hot-swaps the model;
+# a promoted model gets its own valuation surface
+retrainer = Retrainer.from_env(on_promote=start_surface_build if SURFACE_ENABLED else None)
+
+metrics.add_collector(model_collector(current_model))
+metrics.add_collector(lambda: [
+    ('ml_process_memory_bytes', 'gauge', 'Memory of this worker process by kind (rss, rssAnon, rssFile, pss)',
+     [({'pid': str(os.getpid()), 'kind': key[:-len('Bytes')]}, value)
+      for key, value in process_memory().items() if key.endswith('Bytes')]),
+    ('ml_model_shared', 'gauge', 'Whether the forest is served from the shared memory map',
+     [({}, int(current_model().mapped))]),
+    ('ml_ready', 'gauge', 'Whether the service takes prediction traffic', [({}, int(readiness.ready))]),
+    ('ml_startup_phase_seconds', 'gauge', 'Time spent in each startup phase',
+     [({'phase': phase}, round(seconds, 4)) for phase, seconds in readiness.timings.items()]),
+])
+metrics.add_collector(stats_collector('executor', executor.stats, {
+    'queueDepth': ('queue_depth', 'gauge', 'Inference jobs waiting for a worker'),
+    'inFlight': ('in_flight', 'gauge', 'Inference jobs queued or running'),
+    'workers': ('workers', 'gauge', 'Inference pool size'),
+    'completed': ('completed_total', 'counter', 'Inference jobs finished'),
+    'failed': ('failed_total', 'counter', 'Inference jobs that raised'),
+    'rejected': ('rejected_total', 'counter', 'Inference jobs rejected with 503'),
+}))
+metrics.add_collector(stats_collector(
+    'cache', lambda: prediction_cache.stats() if executor.kind == 'thread' else None, {
+        'size': ('size', 'gauge', 'Prediction cache entries'),
+        'hits': ('hits_total', 'counter', 'Prediction cache hits'),
+        'misses': ('misses_total', 'counter', 'Prediction cache misses'),
+        'evictions': ('evictions_total', 'counter', 'Prediction cache LRU evictions'),
+    }
+))
+metrics.add_collector(stats_collector(
+    'batcher', lambda: batcher.stats() if USE_MICROBATCH else None, {
+        'batches': ('batches_total', 'counter', 'Micro-batches dispatched'),
+        'items': ('items_total', 'counter', 'Requests grouped into micro-batches'),
+        'rejected': ('rejected_total', 'counter', 'Requests rejected with the micro-batch queue full'),
+    }
+))
+
+
+async def value_car(car_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Value one car, through the micro-batcher when enabled"""
+    if not USE_MICROBATCH:
+        return await executor.run(get_valuation, car_data)
+    
+    result = await batcher.submit(car_data)
+    if 'error' in result:
+        raise ValueError(result['error'])
+    return result
+
+
+def saturated(e: ExecutorSaturated) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def require_model():
+    """Reject valuation traffic until the model is loaded and warmed up"""
+    if not readiness.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not ready (phase: {readiness.phase})",
+            headers={"Retry-After": "1"}
+        )
+
+
+def record_parse(seconds: float):
+    """Inside the inference executor parse time joins the job's stages"""
+    timer = current_timer()
+    if timer is not None:
+        timer.add('parse', seconds)
+    else:
+        metrics.observe_stage('parse', seconds)
+
+
+class TimedModel(BaseModel):
+    """Request model whose validation time is recorded as the `parse` stage"""
+
+    @model_validator(mode='wrap')
+    @classmethod
+    def _timed_parse(cls, data: Any, handler):
+        start = time.perf_counter()
+        try:
+            return handler(data)
+        finally:
+            record_parse(time.perf_counter() - start)
 
 
 # Request/Response Models
-class ValuationRequest(BaseModel):
+class ValuationRequest(TimedModel):
     make: str
     model: str
     year: int
@@ -57,13 +205,44 @@ class ValuationRequest(BaseModel):
         }
 
 
-class DepreciationRequest(BaseModel):
+class BatchRequest(TimedModel):
+    items: List[Dict[str, Any]]
+
+
+class BatchValuationRequest(BatchRequest):
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"make": "Honda", "model": "CR-V", "year": 2022, "mileage": 35000,
+                     "trim": "EX", "province": "ON", "listing_price": 28500},
+                    {"make": "Toyota", "model": "RAV4", "year": 2021, "mileage": 50000,
+                     "trim": "Limited", "province": "BC", "listing_price": 35000}
+                ]
+            }
+        }
+
+
+# Upper bound on items per batch call
+MAX_BATCH_SIZE = 10000
+
+
+def format_validation_error(e: ValidationError) -> str:
+    """Compact one-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'item'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+class DepreciationRequest(TimedModel):
     make: str
     model: str
     purchasePrice: int
     year: int = 2024
     mileage: int = 0
     province: str = "ON"
+    years: int = Field(5, ge=1, le=MAX_HORIZON)
 
     class Config:
         json_schema_extra = {
@@ -73,7 +252,56 @@ class DepreciationRequest(BaseModel):
                 "purchasePrice": 40000,
                 "year": 2024,
                 "mileage": 0,
-                "province": "BC"
+                "province": "BC",
+                "years": 5
+            }
+        }
+
+
+class TopDealsRequest(TimedModel):
+    # Checked before the items are validated, so an oversized body fails fast
+    listings: Optional[List[Dict[str, Any]]] = Field(None, max_length=MAX_CANDIDATES)
+    k: int = Field(10, ge=1, le=MAX_TOP_K)
+    make: Optional[List[str]] = None
+    province: Optional[List[str]] = None
+    min_price: Optional[int] = Field(None, ge=0)
+    max_price: Optional[int] = Field(None, ge=0)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "listings": [
+                    {"make": "Honda", "model": "CR-V", "year": 2022, "mileage": 35000,
+                     "trim": "EX", "province": "ON", "listing_price": 28500},
+                    {"make": "Toyota", "model": "RAV4", "year": 2021, "mileage": 50000,
+                     "trim": "Limited", "province": "BC", "listing_price": 35000}
+                ],
+                "k": 10,
+                "province": ["ON", "BC"],
+                "max_price": 40000
+            }
+        }
+
+
+class Listing(BaseModel):
+    """A sold or listed car with its real price, used as training data"""
+    make: str
+    model: str
+    year: int = Field(..., ge=1980, le=CURRENT_YEAR)
+    mileage: int = Field(..., ge=0)
+    trim: str = "Base"
+    province: str = "ON"
+    price: int = Field(..., gt=0)
+
+
+class BatchDepreciationRequest(BatchRequest):
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"make": "Toyota", "model": "RAV4", "purchasePrice": 40000, "years": 10},
+                    {"make": "BMW", "model": "X5", "purchasePrice": 70000}
+                ]
             }
         }
 
@@ -87,7 +315,19 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "valuation": "/api/valuation",
+            "valuationBatch": "/api/valuation/batch",
+            "valuationStream": "/api/valuation/stream",
             "depreciation": "/api/depreciation",
+            "depreciationBatch": "/api/depreciation/batch",
+            "fullAnalysis": "/api/full-analysis",
+            "fullAnalysisBatch": "/api/full-analysis/batch",
+            "topDeals": "/api/deals/top",
+            "model": "/api/model",
+            "listings": "/api/model/listings",
+            "retrain": "/api/model/retrain",
+            "metrics": "/metrics",
+            "live": "/health/live",
+            "ready": "/health/ready",
             "docs": "/docs"
         }
     }
@@ -95,12 +335,71 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "6ixKar ML"}
+    """Healthy only once the model is ready (same as /health/ready)"""
+    return await health_ready()
+
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process is up and startup has not failed"""
+    body = {"status": "alive", "phase": readiness.phase,
+            "uptimeSeconds": readiness.status()["uptimeSeconds"]}
+    if readiness.failed:
+        return JSONResponse(status_code=503, content={**body, "status": "failed", "error": readiness.error})
+    return body
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: the model is loaded and warmed up, so the first prediction is fast"""
+    model = current_model()
+    body = {
+        "status": "healthy" if readiness.ready else "starting",
+        "service": "6ixKar ML",
+        **readiness.status(),
+        "model": {
+            "loaded": model.is_trained,
+            "version": model.version,
+            "estimator": model.estimator,
+        },
+    }
+    if not readiness.ready:
+        if readiness.failed:
+            body["status"] = "failed"
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@app.get("/stats")
+async def stats():
+    """Inference executor, micro-batcher and prediction cache statistics"""
+    return {
+        "executor": executor.stats(),
+        "batcher": batcher.stats() if USE_MICROBATCH else None,
+        # With a process executor each worker keeps its own cache
+        "cache": prediction_cache.stats() if executor.kind == 'thread' else None,
+        "fullAnalysis": analysis_stats.stats(),
+        "startup": readiness.status(),
+        "retrain": retrainer.status(),
+        # This worker only; each uvicorn worker answers for itself
+        "memory": {**process_memory(), "sharedModel": current_model().mapped}
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text-format metrics: per-route requests, stage latencies, model gauges"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 # Valuation endpoint
 @app.post("/api/valuation")
-async def predict_valuation(request: ValuationRequest):
+async def predict_valuation(
+    request: ValuationRequest,
+    comparables: int = Query(0, ge=0, le=MAX_COMPARABLES, description="Nearest training listings to include"),
+):
     """
     Predict fair market price and calculate deal score
     
@@ -109,64 +408,339 @@ async def predict_valuation(request: ValuationRequest):
     - dealScore: 0-100 score (higher = better deal)
     - pricePosition: How listing compares to market
     - advice: Recommendation for user
+    - comparables: with ?comparables=k, the k most similar training
+      listings of the same make and model with their prices
     """
+    require_model()
     try:
-        car_data = request.dict()
-        result = get_valuation(car_data)
-        return result
+        car_data = request.model_dump()
+        if not comparables:
+            return await value_car(car_data)
+        result, similar = await asyncio.gather(
+            value_car(car_data), executor.run(get_comparables, car_data, comparables)
+        )
+        return {**result, "comparables": similar}
+    except ExecutorSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Valuation error: {str(e)}")
 
 
+def run_items(items: List[Dict[str, Any]], schema, predict_batch) -> List[Dict[str, Any]]:
+    """Validate items one by one, then score all valid ones in a single batch"""
+    results: List[Dict[str, Any]] = [None] * len(items)
+    valid_rows = []
+    valid_items = []
+    for i, item in enumerate(items):
+        try:
+            valid_items.append(schema(**item).model_dump())
+            valid_rows.append(i)
+        except ValidationError as e:
+            results[i] = {"error": format_validation_error(e)}
+    
+    for i, result in zip(valid_rows, predict_batch(valid_items)):
+        results[i] = result
+    return results
+
+
+def value_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return run_items(items, ValuationRequest, get_valuations)
+
+
+def depreciate_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return run_items(items, DepreciationRequest, get_depreciations)
+
+
+def check_batch_size(request: BatchRequest):
+    if len(request.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {MAX_BATCH_SIZE})"
+        )
+
+
+def batch_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r)
+    }
+
+
+# Batch valuation endpoint
+@app.post("/api/valuation/batch")
+async def predict_valuation_batch(request: BatchValuationRequest):
+    """
+    Value many cars in one call
+    
+    Items are validated individually, featurized together and scored with a
+    single forest call. Results come back in input order; invalid items get
+    an `error` entry instead of failing the whole batch.
+    """
+    require_model()
+    check_batch_size(request)
+    try:
+        results = await executor.run(value_items, request.items)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Valuation error: {str(e)}")
+    
+    return batch_response(results)
+
+
+# Records per chunk and longest accepted line for the NDJSON stream
+STREAM_CHUNK = stream_chunk_size()
+MAX_STREAM_LINE = 64 * 1024
+
+
+async def value_chunk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Value one stream chunk, waiting for room in the executor instead of failing"""
+    while True:
+        try:
+            return await executor.run(value_items, items)
+        except ExecutorSaturated:
+            await asyncio.sleep(0.05)
+        except Exception as e:
+            return [{"error": f"Valuation error: {str(e)}"}] * len(items)
+
+
+# Streaming valuation endpoint
+@app.post("/api/valuation/stream")
+async def predict_valuation_stream(request: Request):
+    """
+    Value a newline-delimited stream of listings
+    
+    The body holds one ValuationRequest JSON object per line
+    (application/x-ndjson). Listings are valued in chunks of ML_STREAM_CHUNK
+    as they are uploaded, and every chunk's results are streamed back as
+    NDJSON as soon as it finishes, so memory stays flat for any input size.
+    Each result line carries the input `line` number; invalid lines get an
+    `error` entry.
+    """
+    require_model()
+    return NDJSONResponse(stream_chunks(request.stream(), value_chunk, STREAM_CHUNK, MAX_STREAM_LINE))
+
+
+# Top deals endpoint
+@app.post("/api/deals/top")
+async def top_deals(request: TopDealsRequest):
+    """
+    The k best deals among many candidate listings
+    
+    Candidates come from `listings` (each a ValuationRequest with a
+    `listing_price`) or, when it is left out, from the ML_DEALS_PATH file.
+    They are filtered by make, province and price band, scored in one
+    vectorized pass and only the top k are selected and returned, best
+    first, as /api/valuation entries with their input `index`. Fair prices
+    of the file's listings are kept until the model changes.
+    """
+    require_model()
+    if request.listings is None and not DEALS_PATH:
+        raise HTTPException(status_code=400, detail="No listings given and ML_DEALS_PATH is not set")
+    try:
+        return await executor.run(
+            get_top_deals, request.listings, request.k, make=request.make, province=request.province,
+            min_price=request.min_price, max_price=request.max_price
+        )
+    except ExecutorSaturated as e:
+        raise saturated(e)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Deals file not found: {DEALS_PATH}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ranking error: {str(e)}")
+
+
 # Depreciation endpoint
 @app.post("/api/depreciation")
 async def predict_depreciation(request: DepreciationRequest):
     """
-    Predict 5-year depreciation curve
+    Predict depreciation curve (5 years by default, up to 15 with `years`)
     
     Returns:
-    - yearlyValues: Value for each year (0-5)
+    - yearlyValues: Value for each year (0 to `years`)
     - annualDepreciationRate: % per year
     - resaleValue5Year: Expected value after 5 years
     - percentRetained: % of original value retained
     - advice: Resale strategy recommendation
     """
     try:
-        car_data = request.dict()
-        result = get_depreciation(car_data)
+        car_data = request.model_dump()
+        result = await executor.run(get_depreciation, car_data)
         return result
+    except ExecutorSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Depreciation error: {str(e)}")
 
 
+# Batch depreciation endpoint
+@app.post("/api/depreciation/batch")
+async def predict_depreciation_batch(request: BatchDepreciationRequest):
+    """
+    Predict depreciation curves for many cars in one call
+    
+    Curves for all items are computed together with array operations.
+    Results come back in input order; invalid items get an `error` entry.
+    """
+    check_batch_size(request)
+    try:
+        results = await executor.run(depreciate_items, request.items)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Depreciation error: {str(e)}")
+    
+    return batch_response(results)
+
+
+def analyze_items(items: List[Dict[str, Any]]):
+    """Validate items, then run the fused pipeline on all valid ones"""
+    stages = {}
+    
+    def analyze(cars):
+        results, timings = get_full_analyses(cars)
+        stages.update(timings)
+        return results
+    
+    return run_items(items, ValuationRequest, analyze), stages
+
+
 # Combined endpoint (for convenience)
 @app.post("/api/full-analysis")
-async def full_analysis(request: ValuationRequest):
+async def full_analysis(request: ValuationRequest, response: Response):
     """
     Get both valuation and depreciation in one call
+    
+    Runs as one fused plan: the car is featurized once, and the predicted
+    fair price feeds the depreciation curve directly. Per-stage timings
+    are returned in the Server-Timing header.
     """
+    require_model()
     try:
-        # Get valuation
-        valuation_data = request.dict()
-        valuation = get_valuation(valuation_data)
-        
-        # Get depreciation (using fair price)
-        depreciation_data = {
-            'make': request.make,
-            'model': request.model,
-            'purchasePrice': valuation['fairPrice'],
-            'year': request.year,
-            'mileage': request.mileage,
-            'province': request.province
-        }
-        depreciation = get_depreciation(depreciation_data)
-        
-        return {
-            "valuation": valuation,
-            "depreciation": depreciation
-        }
+        results, stages = await executor.run(get_full_analyses, [request.model_dump()])
+    except ExecutorSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+    
+    analysis_stats.record(stages)
+    response.headers["Server-Timing"] = server_timing(stages)
+    
+    if "error" in results[0]:
+        raise HTTPException(status_code=500, detail=f"Analysis error: {results[0]['error']}")
+    return results[0]
+
+
+# Batch full-analysis endpoint
+@app.post("/api/full-analysis/batch")
+async def full_analysis_batch(request: BatchValuationRequest, response: Response):
+    """
+    Valuation and depreciation for many cars through the fused pipeline
+    
+    Results come back in input order; invalid items get an `error` entry.
+    """
+    require_model()
+    check_batch_size(request)
+    try:
+        results, stages = await executor.run(analyze_items, request.items)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+    
+    analysis_stats.record(stages)
+    response.headers["Server-Timing"] = server_timing(stages)
+    return batch_response(results)
+
+
+def parse_listings(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """Rows from a CSV body (with a header line) or JSON {"items": [...]} / [...]"""
+    if 'csv' in content_type:
+        return list(csv.DictReader(io.StringIO(body.decode('utf-8-sig'))))
+    data = json.loads(body)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError('expected a list of listings or {"items": [...]}')
+    return items
+
+
+def require_retrainable():
+    require_model()
+    if executor.kind != 'thread':
+        # Process workers each hold their own copy that a swap here would not reach
+        raise HTTPException(status_code=409, detail="Retraining needs the thread executor (ML_EXECUTOR=thread)")
+
+
+@app.get("/api/model")
+async def model_info():
+    """Version and training metadata of the model serving requests, plus retrain jobs"""
+    model = current_model()
+    return {
+        "version": model.version,
+        "estimator": model.estimator,
+        "loaded": model.is_trained,
+        "shared": model.mapped,
+        "metadata": model.metadata,
+        "retrain": retrainer.status(),
+    }
+
+
+@app.post("/api/model/listings", status_code=202)
+async def add_listings(request: Request, retrain: bool = True):
+    """
+    Add real listings to the training set and retrain in the background
+    
+    Send JSON ({"items": [...]}) or CSV (Content-Type: text/csv) with
+    make, model, year, mileage, trim, province and price. Valid rows are
+    stored and a retrain is queued; inference keeps using the current model
+    until the new one is trained, evaluated and swapped in.
+    """
+    require_retrainable()
+    try:
+        rows = parse_listings(await request.body(), request.headers.get('content-type', ''))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid listings: {e}")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Too many listings: {len(rows)} (max {MAX_BATCH_SIZE})")
+    
+    accepted = []
+    errors = []
+    for i, row in enumerate(rows):
+        try:
+            accepted.append(Listing(**row).model_dump())
+        except (ValidationError, TypeError) as e:
+            detail = format_validation_error(e) if isinstance(e, ValidationError) else "not an object"
+            errors.append({"index": i, "error": detail})
+    if not accepted:
+        raise HTTPException(status_code=422, detail={"message": "No valid listings", "errors": errors})
+    
+    stored = await asyncio.to_thread(append_listings, accepted)
+    return {
+        "accepted": len(accepted),
+        "errors": errors,
+        "stored": stored,
+        "job": retrainer.request('listings') if retrain else None,
+    }
+
+
+@app.post("/api/model/retrain", status_code=202)
+async def retrain_model():
+    """Retrain on the synthetic data plus all stored listings, in the background"""
+    require_retrainable()
+    return {"job": retrainer.request('manual')}
+
+
+def load_model():
+    """Load the model, then build its valuation surface in the background if enabled"""
+    ensure_model()
+    if not SURFACE_ENABLED:
+        return
+    if executor.kind != 'thread':
+        # Process workers each hold their own model, which a surface here would not reach
+        print("⚠️ ML_SURFACE needs the thread executor (ML_EXECUTOR=thread); scoring with the model only")
+        return
+    start_surface_build(current_model())
 
 
 # Initialize ML model on startup
@@ -175,13 +749,29 @@ async def startup_event():
     print("\n" + "="*50)
     print("🍁 6ixKar ML Service Starting...")
     print("="*50)
-    initialize_model()
+    print(f"⏱️  App imported in {readiness.timings['import'] * 1000:.0f}ms")
+    executor.start()
+    print(f"🧵 Inference executor: {executor.workers} {executor.kind} worker(s), queue {executor.max_queue}")
+    if USE_MICROBATCH:
+        batcher.start()
+        print(f"📦 Micro-batching: up to {batcher.max_batch} items / {batcher.max_wait * 1000:g}ms")
+    # Model loading and warm-up continue in the background; /health/ready
+    # turns 200 when they finish
+    readiness.start(partial(
+        warm_start, load=load_model, executor=executor, batch_size=warmup_batch_size()
+    ))
     print("="*50)
-    print("✅ Service ready at http://localhost:8000")
+    print("🚦 Listening at http://localhost:8000 (model loading in background)")
     print("📚 API docs at http://localhost:8000/docs")
     print("="*50 + "\n")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await batcher.stop()
+    executor.shutdown()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,311 @@
+"""
+Offline Bulk Scoring
+Values a CSV or Parquet listings file in chunks on a process pool, resumable after an interruption
+
+Run from python-ml-service/:
+    python run.py score listings.csv --output scored.csv
+"""
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from models.depreciation import SUMMARY_YEARS, DepreciationModel
+from models.valuation import CarValuationModel, score_deals
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Rows per chunk; each chunk is one model call and one part file
+CHUNK_ROWS = 50_000
+
+# Columns a row needs to be scored, and the API's defaults for the optional ones
+REQUIRED_COLUMNS = ['make', 'model', 'year', 'mileage']
+DEFAULTS = {'trim': 'Base', 'province': 'ON'}
+
+# Appended to the input columns in the output
+RESULT_COLUMNS = ['fair_price', 'price_std', 'deal_score', 'resale_value_5yr', 'error']
+
+
+def file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Unsupported file type {extension or path!r} (use .csv or .parquet)")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator['pd.DataFrame']:
+    """The input file as DataFrames of at most `chunk_rows` rows, never all at once"""
+    import pandas as pd
+
+    if file_format(path) == 'csv':
+        text = {column: str for column in ('make', 'model', 'trim', 'province')}
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=text)
+    else:
+        parquet = _pyarrow().parquet.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def score_frame(
+    frame: 'pd.DataFrame',
+    valuation: CarValuationModel,
+    depreciation: DepreciationModel,
+) -> 'pd.DataFrame':
+    """
+    The input rows with fair price, spread, deal score and 5-year resale appended
+
+    Uses the same featurization, scoring and depreciation curves as
+    /api/full-analysis, vectorized over the whole frame. Rows that cannot
+    be scored keep their input columns and get an `error` instead.
+    """
+    import pandas as pd
+
+    n = len(frame)
+    cars = frame.reindex(columns=REQUIRED_COLUMNS + list(DEFAULTS) + ['listing_price'])
+    for field, default in DEFAULTS.items():
+        cars[field] = cars[field].fillna(default).astype(str)
+    for field in ('year', 'mileage', 'listing_price'):
+        cars[field] = pd.to_numeric(cars[field], errors='coerce')
+
+    error = np.full(n, '', dtype=object)
+    for field in reversed(REQUIRED_COLUMNS):
+        error[cars[field].isna().to_numpy()] = f"{field}: missing or invalid"
+    valid = np.flatnonzero(error == '')
+
+    records = cars.iloc[valid].to_dict('records')
+    rows, mean, std = valuation.score(records)
+    scored = valid[rows]
+    unscored = np.setdiff1d(valid, scored)
+    error[unscored] = 'Input contains infinity or NaN'
+
+    fair_price = mean.astype(np.int64)
+    listing = cars['listing_price'].to_numpy(dtype=np.float64)[scored]
+    listing = np.where(np.isnan(listing), fair_price, listing)
+    deals = score_deals(fair_price, listing, std)
+    makes = cars['make'].to_numpy()[scored]
+    resale = depreciation.calculate_depreciation_curves(fair_price, makes, SUMMARY_YEARS)[:, SUMMARY_YEARS]
+
+    def nullable(values):
+        data = np.zeros(n, dtype=np.int64)
+        data[scored] = values
+        mask = np.ones(n, dtype=bool)
+        mask[scored] = False
+        return pd.arrays.IntegerArray(data, mask)
+
+    out = frame.copy()
+    out['fair_price'] = nullable(fair_price)
+    out['deal_score'] = nullable(deals['deal_score'])
+    out['resale_value_5yr'] = nullable(resale)
+    price_std = np.full(n, np.nan)
+    price_std[scored] = np.round(std, 1)
+    out['price_std'] = price_std
+    out['error'] = error
+    return out[[c for c in frame.columns if c not in RESULT_COLUMNS] + RESULT_COLUMNS]
+
+
+def write_frame(frame: 'pd.DataFrame', path: str):
+    """Write atomically, so a part file on disk is always complete"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if file_format(path) == 'csv':
+        frame.to_csv(tmp_path, index=False)
+    else:
+        _pyarrow()
+        frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _init_worker():
+    """Load the model once per pool process"""
+    from models.valuation import current_model, ensure_model
+
+    ensure_model()
+    # Bulk rows are mostly unique: skip the prediction cache and its mileage rounding
+    current_model().cache = None
+
+
+def _score_part(frame: 'pd.DataFrame', path: str) -> Tuple[int, int]:
+    from models.depreciation import depreciation_model
+    from models.valuation import current_model
+
+    scored = score_frame(frame, current_model(), depreciation_model)
+    write_frame(scored, path)
+    return len(scored), int((scored['error'] != '').sum())
+
+
+def _parts_dir(output: str) -> str:
+    return f"{output}.parts"
+
+
+def _part_path(parts_dir: str, index: int, fmt: str) -> str:
+    return os.path.join(parts_dir, f"part-{index:06d}.{fmt}")
+
+
+def _manifest(input_path: str, chunk_rows: int) -> Dict[str, Any]:
+    """What the parts were scored from; a resume must match it exactly"""
+    from data.listings import get_training_set_fingerprint
+    from models.valuation import current_model
+
+    stat = os.stat(input_path)
+    return {
+        'input': os.path.abspath(input_path),
+        'size': stat.st_size,
+        'mtimeNs': stat.st_mtime_ns,
+        'chunkRows': chunk_rows,
+        'model': current_model().fingerprint(get_training_set_fingerprint()),
+    }
+
+
+def _prepare_parts(parts_dir: str, manifest: Dict[str, Any], restart: bool):
+    path = os.path.join(parts_dir, 'manifest.json')
+    if restart:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        if previous != manifest:
+            changed = ', '.join(k for k in manifest if previous.get(k) != manifest[k])
+            raise ValueError(
+                f"{parts_dir} is from a different run ({changed} changed); use --restart to discard it"
+            )
+        return
+    os.makedirs(parts_dir, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def score_parts(
+    input_path: str,
+    parts_dir: str,
+    fmt: str,
+    chunk_rows: int = CHUNK_ROWS,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Score every chunk that has no part file yet
+
+    Chunks are read one at a time and handed to the pool, with at most two
+    per worker in flight, so memory stays bounded for any file size. Each
+    worker writes its own part file.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    stats = {'chunks': 0, 'resumedChunks': 0, 'rows': 0, 'resumedRows': 0, 'errors': 0}
+    started = last_report = time.perf_counter()
+
+    def collect(done):
+        nonlocal last_report
+        for future in done:
+            rows, errors = future.result()
+            stats['rows'] += rows
+            stats['errors'] += errors
+        now = time.perf_counter()
+        if now - last_report >= 2:
+            last_report = now
+            rate = stats['rows'] / (now - started)
+            print(f"   {stats['rows'] + stats['resumedRows']:,} rows ({rate:,.0f} rows/s)")
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        pending = set()
+        try:
+            for index, frame in enumerate(read_chunks(input_path, chunk_rows)):
+                stats['chunks'] += 1
+                path = _part_path(parts_dir, index, fmt)
+                if os.path.exists(path):
+                    stats['resumedChunks'] += 1
+                    stats['resumedRows'] += len(frame)
+                    continue
+                if len(pending) >= 2 * jobs:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(pool.submit(_score_part, frame, path))
+            collect(pending)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    stats['seconds'] = round(time.perf_counter() - started, 2)
+    stats['rowsPerSecond'] = round(stats['rows'] / stats['seconds']) if stats['seconds'] else 0
+    return stats
+
+
+def merge_parts(parts_dir: str, output: str, fmt: str, chunks: int):
+    """Concatenate the part files, in input order, into the output file"""
+    paths = [_part_path(parts_dir, index, fmt) for index in range(chunks)]
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    if fmt == 'csv':
+        with open(tmp_path, 'w', newline='') as out:
+            for i, path in enumerate(paths):
+                with open(path, newline='') as part:
+                    header = part.readline()
+                    if i == 0:
+                        out.write(header)
+                    shutil.copyfileobj(part, out)
+    else:
+        parquet = _pyarrow().parquet
+        writer = None
+        try:
+            for path in paths:
+                table = parquet.read_table(path)
+                if writer is None:
+                    writer = parquet.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp_path, output)
+
+
+def run_bulk(
+    input_path: str,
+    output: str,
+    chunk_rows: int = CHUNK_ROWS,
+    jobs: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Score a listings file into `output` (CSV or Parquet, by extension)
+
+    Finished chunks are kept in `<output>.parts/` until the output is
+    written, so rerunning the same command after an interruption only
+    scores the chunks that are missing.
+    """
+    fmt = file_format(output)
+    file_format(input_path)
+    parts_dir = _parts_dir(output)
+    _prepare_parts(parts_dir, _manifest(input_path, chunk_rows), restart)
+
+    jobs = jobs or os.cpu_count() or 1
+    print(f"📄 Scoring {input_path} in chunks of {chunk_rows:,} rows on {jobs} process(es)")
+    try:
+        stats = score_parts(input_path, parts_dir, fmt, chunk_rows, jobs)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ Interrupted; finished chunks are kept in {parts_dir}, rerun the same command to resume")
+        raise
+
+    if stats['resumedChunks']:
+        print(f"↩️ Resumed: {stats['resumedChunks']} chunk(s), {stats['resumedRows']:,} rows already scored")
+    print(f"⚡ Scored {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rowsPerSecond']:,} rows/s, {stats['errors']:,} errors)")
+
+    merge_parts(parts_dir, output, fmt, stats['chunks'])
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    print(f"💾 Wrote {output}")
+    return stats
@@ -0,0 +1,116 @@
+"""
+Prediction Cache
+LRU + TTL cache of forest outputs keyed by the encoded feature vector
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Caches (fair price, std) per encoded feature row for one model version
+
+    Only the model output is cached; deal scores depend on the listing
+    price and are always computed per request. Versions increase with every
+    trained or loaded model: entries from an older version are dropped as
+    soon as a newer version is seen, and calls still made by an older model
+    bypass the cache.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0, mileage_bucket: int = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.mileage_bucket = mileage_bucket
+
+        self._entries: 'OrderedDict[Hashable, Tuple[float, float, float]]' = OrderedDict()
+        self._version: Optional[Any] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> 'PredictionCache':
+        """Build from ML_CACHE_SIZE, ML_CACHE_TTL and ML_CACHE_MILEAGE_BUCKET"""
+        return cls(
+            max_size=int(os.environ.get('ML_CACHE_SIZE', 10000)),
+            ttl=float(os.environ.get('ML_CACHE_TTL', 3600)),
+            mileage_bucket=int(os.environ.get('ML_CACHE_MILEAGE_BUCKET', 0)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_version(self, version: Any) -> bool:
+        """Switch to a newer model version; False for calls from an older one"""
+        if self._version is not None and version < self._version:
+            # A request still finishing on a replaced model must not evict
+            # the new model's entries
+            return False
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return True
+
+    def get_many(self, keys: List[Hashable], version: Any) -> List[Optional[Tuple[float, float]]]:
+        """Look up keys for a model version; None for misses"""
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += len(keys)
+                return [None] * len(keys)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found.append((entry[0], entry[1]))
+        return found
+
+    def put_many(self, items: List[Tuple[Hashable, float, float]], version: Any):
+        """Store (key, mean, std) results computed by a model version"""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if not self._check_version(version):
+                return
+            for key, mean, std in items:
+                self._entries[key] = (mean, std, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': len(self._entries),
+            'maxSize': self.max_size,
+            'ttlSeconds': self.ttl,
+            'mileageBucket': self.mileage_bucket,
+            'modelVersion': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
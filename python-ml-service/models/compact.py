@@ -0,0 +1,79 @@
+"""
+Forest Compaction
+Narrows leaf values and prunes depth and trees while held-out MAE stays within a budget
+"""
+
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from models.forest import FlatForest
+
+
+def holdout_mae(forest: FlatForest, X: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean(np.abs(forest.predict(X) - y)))
+
+
+def compact_forest(
+    forest: FlatForest,
+    X: np.ndarray,
+    y: np.ndarray,
+    budget: float,
+    leaf_dtype: str = 'int16',
+    scale: float = 100.0,
+    tree_step: float = 0.1,
+) -> Tuple[FlatForest, Dict[str, Any]]:
+    """
+    Greedily shrink a forest until held-out MAE would rise more than `budget`
+
+    Tries, in order: narrower leaf values (`leaf_dtype`, falling back to
+    float32), one level less depth at a time, then `tree_step` of the trees
+    at a time. A step is kept only if MAE stays within (1 + budget) times
+    the original forest's; the first rejected depth or tree step ends that
+    phase. Returns the compacted forest and a report of every attempt.
+    """
+    started = time.perf_counter()
+    baseline = holdout_mae(forest, X, y)
+    limit = baseline * (1 + budget)
+    steps: List[Dict[str, Any]] = []
+
+    def attempt(name: str, candidate: FlatForest) -> bool:
+        mae = holdout_mae(candidate, X, y)
+        kept = mae <= limit
+        steps.append({'step': name, 'mae': round(mae, 2), 'bytes': candidate.nbytes, 'kept': kept})
+        return kept
+
+    best = forest
+    for dtype in dict.fromkeys((leaf_dtype, 'float32')):
+        if dtype == 'float64':
+            break
+        candidate = best.quantize(dtype, scale)
+        if attempt(f'leaves {dtype}', candidate):
+            best = candidate
+            break
+
+    for depth in range(best.max_depth - 1, 0, -1):
+        candidate = best.prune(max_depth=depth)
+        if not attempt(f'depth {depth}', candidate):
+            break
+        best = candidate
+
+    step = max(1, int(round(best.n_trees * tree_step)))
+    while best.n_trees - step >= 1:
+        candidate = best.prune(n_trees=best.n_trees - step)
+        if not attempt(f'trees {candidate.n_trees}', candidate):
+            break
+        best = candidate
+
+    report = {
+        'budget': budget,
+        'holdoutRows': len(y),
+        'before': {'mae': round(baseline, 2), 'bytes': forest.nbytes, 'nodes': forest.node_count,
+                   'trees': forest.n_trees, 'maxDepth': forest.max_depth},
+        'after': {'mae': round(holdout_mae(best, X, y), 2), 'bytes': best.nbytes, 'nodes': best.node_count,
+                  'trees': best.n_trees, 'maxDepth': best.max_depth, 'leafDtype': str(best.value.dtype)},
+        'steps': steps,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    return best, report
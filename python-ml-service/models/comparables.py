@@ -0,0 +1,120 @@
+"""
+Comparable Listings Index
+Nearest training listings to a car, searched with one KD-tree per make and model
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Distance units: one model year, MILEAGE_SCALE km and a different trim each count as about 1
+MILEAGE_SCALE = 15_000.0
+TRIM_WEIGHT = 1.0
+
+# Most comparables one query may ask for
+MAX_COMPARABLES = 50
+
+
+class ComparablesIndex:
+    """
+    Training listings partitioned by (make, model), each with a KD-tree over
+    scaled year, mileage and trim
+
+    Trims are one-hot columns scaled so that any two different trims are
+    TRIM_WEIGHT apart; a trim the partition has never seen is equally far
+    from all of them. A query only searches its own partition, so its cost
+    depends on that partition's size, not on the whole training set.
+    """
+
+    def __init__(self):
+        self.partitions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.trims: List[str] = []
+        self.trim_codes: Dict[str, int] = {}
+        self.provinces: List[str] = []
+        self.rows = 0
+
+    @classmethod
+    def build(cls, frame: 'pd.DataFrame', leaf_size: int = 40) -> 'ComparablesIndex':
+        import pandas as pd
+        from sklearn.neighbors import KDTree
+
+        index = cls()
+        trim = pd.Categorical(frame['trim'].astype(str))
+        province = pd.Categorical(frame['province'].astype(str))
+        index.trims = [str(t) for t in trim.categories]
+        index.trim_codes = {t: code for code, t in enumerate(index.trims)}
+        index.provinces = [str(p) for p in province.categories]
+        index.rows = len(frame)
+
+        columns = {
+            'year': frame['year'].to_numpy(dtype=np.int16),
+            'mileage': frame['mileage'].to_numpy(dtype=np.int32),
+            'trim': trim.codes.astype(np.int16),
+            'province': province.codes.astype(np.int16),
+            'price': frame['price'].to_numpy(dtype=np.int32),
+        }
+        groups = frame.groupby([frame['make'].astype(str), frame['model'].astype(str)], sort=False).indices
+        for key, rows in groups.items():
+            partition = {name: values[rows] for name, values in columns.items()}
+            # Trims present in this partition, as global codes; the one-hot columns follow this order
+            partition['trims'] = np.unique(partition['trim'])
+            local_trim = np.searchsorted(partition['trims'], partition['trim'])
+            points = _points(partition['year'], partition['mileage'], local_trim, len(partition['trims']))
+            partition['tree'] = KDTree(points, leaf_size=leaf_size)
+            index.partitions[key] = partition
+        return index
+
+    def query(self, car: Dict[str, Any], k: int = 10) -> List[Dict[str, Any]]:
+        """
+        The k listings of the same make and model nearest to `car`, closest first
+
+        Returns [] for a make and model the index has no listings for.
+        """
+        partition = self.partitions.get((str(car['make']), str(car['model'])))
+        if partition is None or k <= 0:
+            return []
+        k = min(k, len(partition['price']))
+
+        trims = partition['trims']
+        code = self.trim_codes.get(str(car.get('trim')), -1)
+        position = int(np.searchsorted(trims, code))
+        local_trim = position if position < len(trims) and trims[position] == code else -1
+        point = _points(
+            np.array([car['year']]), np.array([car['mileage']]), np.array([local_trim]), len(trims)
+        )
+        distances, rows = partition['tree'].query(point, k=k)
+
+        return [
+            {
+                'year': int(partition['year'][row]),
+                'mileage': int(partition['mileage'][row]),
+                'trim': self.trims[partition['trim'][row]],
+                'province': self.provinces[partition['province'][row]],
+                'price': int(partition['price'][row]),
+                'distance': round(float(distance), 3),
+            }
+            for distance, row in zip(distances[0], rows[0])
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes in the trees and the stored listing columns"""
+        total = 0
+        for partition in self.partitions.values():
+            total += sum(array.nbytes for array in partition['tree'].get_arrays())
+            total += sum(value.nbytes for name, value in partition.items() if name != 'tree')
+        return total
+
+
+def _points(year: np.ndarray, mileage: np.ndarray, local_trim: np.ndarray, n_trims: int) -> np.ndarray:
+    """Scaled search coordinates; a local_trim of -1 (unseen trim) leaves its one-hot row empty"""
+    points = np.zeros((len(year), 2 + n_trims), dtype=np.float64)
+    points[:, 0] = year
+    points[:, 1] = np.asarray(mileage, dtype=np.float64) / MILEAGE_SCALE
+    known = np.flatnonzero(local_trim >= 0)
+    # Two different one-hot rows are sqrt(2) * weight apart, so scale to make that TRIM_WEIGHT
+    points[known, 2 + local_trim[known]] = TRIM_WEIGHT / np.sqrt(2)
+    return points
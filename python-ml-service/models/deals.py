@@ -0,0 +1,216 @@
+"""
+Top Deals
+Scores a large set of candidate listings in one pass and returns only the best k deals
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.bulk import DEFAULTS, REQUIRED_COLUMNS, read_chunks
+from models.timing import StageTimer, current_timer, timed
+from models.valuation import CarValuationModel, current_model
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Candidate listings (CSV or Parquet) ranked when a request brings none
+DEALS_PATH = os.environ.get('ML_DEALS_PATH', '')
+
+# Most deals one request may ask for, and most candidates it may send inline.
+# Scoring 10,000 takes about 0.2 s on one core without the surface; larger
+# sets belong in the ML_DEALS_PATH file, whose scores are kept between requests
+MAX_TOP_K = 100
+MAX_CANDIDATES = 10_000
+
+CATEGORY_FIELDS = ('make', 'model', 'trim', 'province')
+
+
+class DealCandidates:
+    """
+    Listings with an asking price, held as columns
+
+    Rows missing a required field or a positive `listing_price` are dropped
+    on the way in and counted in `skipped`; `index` keeps each remaining
+    row's position in the input. With `keep_scores`, fair prices for every
+    row are computed once per model version and reused by later rankings.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], skipped: int = 0, keep_scores: bool = False):
+        self.columns = columns
+        self.skipped = skipped
+        self.keep_scores = keep_scores
+        self._scores: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_frame(cls, frame: 'pd.DataFrame', keep_scores: bool = False) -> 'DealCandidates':
+        import pandas as pd
+
+        cars = frame.reindex(columns=REQUIRED_COLUMNS + list(DEFAULTS) + ['listing_price'])
+        for field, default in DEFAULTS.items():
+            cars[field] = cars[field].fillna(default)
+        numeric = {
+            field: pd.to_numeric(cars[field], errors='coerce').to_numpy(dtype=np.float64)
+            for field in ('year', 'mileage', 'listing_price')
+        }
+        valid = (
+            cars['make'].notna().to_numpy() & cars['model'].notna().to_numpy()
+            & np.isfinite(numeric['year']) & np.isfinite(numeric['mileage']) & (numeric['listing_price'] > 0)
+        )
+        rows = np.flatnonzero(valid)
+        columns = {field: cars[field].astype(str).to_numpy(dtype=object)[rows] for field in CATEGORY_FIELDS}
+        columns.update({field: values[rows] for field, values in numeric.items()})
+        columns['index'] = rows
+        return cls(columns, skipped=len(frame) - len(rows), keep_scores=keep_scores)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'DealCandidates':
+        import pandas as pd
+        # Column by column is several times faster than DataFrame.from_records
+        fields = REQUIRED_COLUMNS + list(DEFAULTS) + ['listing_price']
+        return cls.from_frame(pd.DataFrame({field: [record.get(field) for record in records] for field in fields}))
+
+    def __len__(self) -> int:
+        return len(self.columns['index'])
+
+    def select(
+        self,
+        make: Optional[Sequence[str]] = None,
+        province: Optional[Sequence[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> np.ndarray:
+        """Rows whose make and province are among the given ones and whose price is in the band"""
+        mask = np.ones(len(self), dtype=bool)
+        if make:
+            mask &= np.isin(self.columns['make'], list(make))
+        if province:
+            mask &= np.isin(self.columns['province'], list(province))
+        if min_price is not None:
+            mask &= self.columns['listing_price'] >= min_price
+        if max_price is not None:
+            mask &= self.columns['listing_price'] <= max_price
+        return np.flatnonzero(mask)
+
+    def scores(
+        self,
+        model: CarValuationModel,
+        rows: np.ndarray,
+        timer: Optional[StageTimer] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fair price and spread for the given rows (NaN where they cannot be scored)"""
+        if not self.keep_scores:
+            return self._score(model, rows, timer)
+        scores = self._scores
+        if scores is None or scores[0] != model.version:
+            scores = (model.version, *self._score(model, np.arange(len(self)), timer))
+            self._scores = scores
+        return scores[1][rows], scores[2][rows]
+
+    def _score(self, model: CarValuationModel, rows: np.ndarray, timer: Optional[StageTimer]):
+        return model.score_columns(
+            self.columns['year'][rows],
+            self.columns['mileage'][rows],
+            {field: self.columns[field][rows] for field in CATEGORY_FIELDS},
+            timer,
+        )
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """The given rows as listing dicts, with integer year, mileage and price"""
+        return [
+            {
+                'make': self.columns['make'][i],
+                'model': self.columns['model'][i],
+                'year': int(self.columns['year'][i]),
+                'mileage': int(self.columns['mileage'][i]),
+                'trim': self.columns['trim'][i],
+                'province': self.columns['province'][i],
+                'listing_price': int(self.columns['listing_price'][i]),
+            }
+            for i in rows
+        ]
+
+
+def top_deals(
+    candidates: DealCandidates,
+    model: CarValuationModel,
+    k: int = 10,
+    make: Optional[Sequence[str]] = None,
+    province: Optional[Sequence[str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    timer: Optional[StageTimer] = None,
+) -> Dict[str, Any]:
+    """
+    The k matching candidates furthest below their fair price, best first
+
+    Deal score is monotonic in the percent below fair price but saturates
+    at 100, so candidates are ranked by the percent itself. Only the top k
+    are picked (argpartition) and sorted, and only they get full
+    valuation entries, as /api/valuation would return them.
+    """
+    with timed(timer, 'rank'):
+        rows = candidates.select(make, province, min_price, max_price)
+    mean, std = candidates.scores(model, rows, timer)
+
+    with timed(timer, 'rank'):
+        scored = np.flatnonzero(~np.isnan(mean))
+        fair_price = np.trunc(mean[scored])
+        listing_price = candidates.columns['listing_price'][rows[scored]]
+        price_diff_percent = (fair_price - listing_price) / fair_price * 100
+
+        k = min(k, len(scored))
+        best = np.argpartition(-price_diff_percent, k - 1)[:k] if 0 < k < len(scored) else np.arange(k)
+        # Best first; equal deals in input order
+        best = best[np.lexsort((scored[best], -price_diff_percent[best]))]
+        best = scored[best]
+
+    with timed(timer, 'score'):
+        picked = rows[best]
+        cars = candidates.records(picked)
+        valuations = model.build_results(cars, np.arange(len(cars)), mean[best], std[best])
+        deals = [
+            {'index': int(candidates.columns['index'][i]),
+             **{field: value for field, value in car.items() if field != 'listing_price'}, **valuation}
+            for i, car, valuation in zip(picked, cars, valuations)
+        ]
+    return {
+        'deals': deals,
+        'candidates': len(candidates) + candidates.skipped,
+        'skipped': candidates.skipped,
+        'matched': len(rows),
+        'scored': len(scored),
+    }
+
+
+_file_lock = threading.Lock()
+_file_candidates: Optional[Tuple[Tuple[str, int, int], DealCandidates]] = None
+
+
+def file_candidates(path: str) -> DealCandidates:
+    """Candidates from the listings file, reloaded only when the file changes"""
+    global _file_candidates
+    info = os.stat(path)
+    key = (path, info.st_size, info.st_mtime_ns)
+    with _file_lock:
+        if _file_candidates is None or _file_candidates[0] != key:
+            import pandas as pd
+            frame = pd.concat(list(read_chunks(path)), ignore_index=True)
+            _file_candidates = (key, DealCandidates.from_frame(frame, keep_scores=True))
+        return _file_candidates[1]
+
+
+def get_top_deals(listings: Optional[List[Dict[str, Any]]] = None, k: int = 10, **filters) -> Dict[str, Any]:
+    """Top deals among the given listings, or among the ML_DEALS_PATH file when there are none"""
+    timer = current_timer()
+    if listings is None:
+        candidates = file_candidates(DEALS_PATH)
+    else:
+        with timed(timer, 'parse'):
+            candidates = DealCandidates.from_records(listings)
+    result = top_deals(candidates, current_model(), k, timer=timer, **filters)
+    result['source'] = 'request' if listings is not None else 'file'
+    return result
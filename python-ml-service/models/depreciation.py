@@ -9,6 +9,8 @@ warnings.filterwarnings('ignore', category=UserWarning)
 import numpy as np
 from typing import Dict, Any, List
 
+from models.timing import timed
+
 
 # Brand depreciation rates (annual %)
 BRAND_DEPRECIATION = {
@@ -33,14 +35,79 @@ BRAND_DEPRECIATION = {
 DEFAULT_DEPRECIATION = 0.16
 
 
+# Longest supported forecast horizon (years)
+MAX_HORIZON = 15
+
+# Minimum horizon used for the 5-year summary fields
+SUMMARY_YEARS = 5
+
+
+def _adjusted_rate(rate: float, year: int) -> float:
+    """
+    Depreciation slows down slightly over time
+    Years 1-2: Full rate
+    Years 3-4: 0.9x rate
+    Years 5+: 0.8x rate
+    """
+    if year <= 2:
+        return rate
+    elif year <= 4:
+        return rate * 0.9
+    return rate * 0.8
+
+
 class DepreciationModel:
     def __init__(self):
         self.brand_rates = BRAND_DEPRECIATION
+        
+        # Precomputed per-brand tables; the last row is the default rate
+        self.brand_index = {make: i for i, make in enumerate(self.brand_rates)}
+        rates = list(self.brand_rates.values()) + [DEFAULT_DEPRECIATION]
+        self.rates = np.array(rates, dtype=np.float64)
+        
+        # step_factors[b, y - 1]: value multiplier applied in year y
+        self.step_factors = np.array([
+            [1 - _adjusted_rate(rate, year) for year in range(1, MAX_HORIZON + 1)]
+            for rate in rates
+        ], dtype=np.float64)
     
     def get_depreciation_rate(self, make: str) -> float:
         """Get brand-specific depreciation rate"""
         return self.brand_rates.get(make, DEFAULT_DEPRECIATION)
     
+    def _brand_rows(self, makes: List[str]) -> np.ndarray:
+        default = len(self.rates) - 1
+        return np.fromiter(
+            (self.brand_index.get(make, default) for make in makes),
+            dtype=np.intp, count=len(makes)
+        )
+    
+    def calculate_depreciation_curves(
+        self,
+        purchase_prices: np.ndarray,
+        makes: List[str],
+        years: int = 5
+    ) -> np.ndarray:
+        """
+        Year-by-year values for N cars as an (N, years + 1) integer array
+        
+        Compounds the value one year at a time across all cars at once and
+        truncates each year's value to an integer, exactly like the
+        original per-car loop.
+        """
+        if not 0 <= years <= MAX_HORIZON:
+            raise ValueError(f"years must be between 0 and {MAX_HORIZON}")
+        
+        factors = self.step_factors[self._brand_rows(makes), :years]
+        current_value = np.asarray(purchase_prices, dtype=np.float64)
+        
+        values = np.empty((len(current_value), years + 1), dtype=np.int64)
+        values[:, 0] = np.asarray(purchase_prices, dtype=np.int64)
+        for year in range(years):
+            current_value = current_value * factors[:, year]
+            values[:, year + 1] = current_value
+        return values
+    
     def calculate_depreciation_curve(
         self,
         purchase_price: int,
@@ -51,45 +118,82 @@ class DepreciationModel:
         Calculate year-by-year depreciation
         Uses compound depreciation model with slight curve adjustment
         """
-        rate = self.get_depreciation_rate(make)
-        
-        values = [purchase_price]
-        current_value = purchase_price
-        
-        for year in range(1, years + 1):
-            # Depreciation slows down slightly over time
-            # Years 1-2: Full rate
-            # Years 3-4: 0.9x rate
-            # Years 5+: 0.8x rate
-            if year <= 2:
-                adjusted_rate = rate
-            elif year <= 4:
-                adjusted_rate = rate * 0.9
-            else:
-                adjusted_rate = rate * 0.8
-            
-            current_value = current_value * (1 - adjusted_rate)
-            values.append(int(current_value))
-        
-        return values
+        return self.calculate_depreciation_curves([purchase_price], [make], years)[0].tolist()
     
     def predict(self, car_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict depreciation for a car"""
-        purchase_price = car_data.get('purchasePrice', car_data.get('price', 0))
-        make = car_data['make']
-        current_year = car_data.get('year', 2024)
-        current_mileage = car_data.get('mileage', 0)
+        result = self.predict_batch([car_data])[0]
+        if 'error' in result:
+            raise ValueError(result['error'])
+        return result
+    
+    def predict_batch(self, cars: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Predict depreciation for many cars with one vectorized curve computation
         
-        # Calculate 5-year curve
-        yearly_values = self.calculate_depreciation_curve(purchase_price, make, 5)
+        Each car may set its own `years` horizon (default 5). Summary fields
+        (resale value, retention rating, advice) always use the 5-year value.
+        Cars that cannot be scored get an {'error': ...} entry.
+        """
+        return self.predict_arrays(
+            purchase_prices=[car.get('purchasePrice', car.get('price', 0)) for car in cars],
+            makes=[car['make'] for car in cars],
+            model_years=[car.get('year', 2024) for car in cars],
+            horizons=[car.get('years') or SUMMARY_YEARS for car in cars],
+        )
+    
+    def predict_arrays(
+        self,
+        purchase_prices,
+        makes: List[str],
+        model_years: List[int],
+        horizons: List[int]
+    ) -> List[Dict[str, Any]]:
+        """Depreciation results from column arrays (e.g. predicted fair prices)"""
+        if len(makes) == 0:
+            return []
         
+        valid_horizon = np.array([1 <= h <= MAX_HORIZON for h in horizons], dtype=bool)
+        
+        longest = max([h for h in horizons if 1 <= h <= MAX_HORIZON], default=SUMMARY_YEARS)
+        curves = self.calculate_depreciation_curves(
+            purchase_prices, makes, max(longest, SUMMARY_YEARS)
+        )
+        prices = curves[:, 0]
+        resale = curves[:, SUMMARY_YEARS]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_retained = (resale / prices) * 100
+            percent_by_year = (curves / prices[:, None]) * 100
+        
+        results = []
+        for i in range(len(makes)):
+            if not valid_horizon[i]:
+                results.append({'error': f"years must be between 1 and {MAX_HORIZON}"})
+                continue
+            if prices[i] == 0:
+                results.append({'error': 'purchasePrice must be non-zero'})
+                continue
+            results.append(self._build_result(
+                model_years[i], makes[i], int(prices[i]), curves[i, :horizons[i] + 1].tolist(),
+                int(resale[i]), float(percent_retained[i]), percent_by_year[i].tolist()
+            ))
+        return results
+    
+    def _build_result(
+        self,
+        current_year: int,
+        make: str,
+        purchase_price: int,
+        yearly_values: List[int],
+        resale_value_5_year: int,
+        percent_retained: float,
+        percent_by_year: List[float]
+    ) -> Dict[str, Any]:
         # Get depreciation rate
         annual_rate = self.get_depreciation_rate(make)
         
         # Calculate totals
-        resale_value_5_year = yearly_values[-1]
         total_depreciation = purchase_price - resale_value_5_year
-        percent_retained = (resale_value_5_year / purchase_price) * 100
         
         # Generate advice
         if percent_retained >= 70:
@@ -109,15 +213,16 @@ class DepreciationModel:
             advice = f"❌ {make} has high depreciation. Buy used or plan to keep long-term."
         
         # Calculate per-year breakdown
-        year_breakdown = []
-        for i, value in enumerate(yearly_values):
-            year_breakdown.append({
+        year_breakdown = [
+            {
                 'year': current_year + i,
                 'value': value,
                 'age': i,
                 'depreciationFromNew': purchase_price - value,
-                'percentRetained': round((value / purchase_price) * 100, 1)
-            })
+                'percentRetained': round(percent_by_year[i], 1)
+            }
+            for i, value in enumerate(yearly_values)
+        ]
         
         return {
             'yearlyValues': yearly_values,
@@ -138,4 +243,11 @@ depreciation_model = DepreciationModel()
 
 def get_depreciation(car_data: Dict[str, Any]) -> Dict[str, Any]:
     """Get depreciation prediction"""
-    return depreciation_model.predict(car_data)
+    with timed(None, 'depreciation'):
+        return depreciation_model.predict(car_data)
+
+
+def get_depreciations(cars: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get depreciation predictions for a batch of cars"""
+    with timed(None, 'depreciation'):
+        return depreciation_model.predict_batch(cars)
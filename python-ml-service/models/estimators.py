@@ -0,0 +1,167 @@
+"""
+Valuation Estimator Registry
+The regressors CarValuationModel can be trained with, selected by name (ML_ESTIMATOR)
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Interval bounds of the boosting backend; the forest's ±1.5 std is also about 90%
+QUANTILES = (0.05, 0.95)
+
+# The response reports `confidence` as 1.5 spreads and grades `modelConfidence`
+# on the spread, so an interval half-width w maps to a spread of w / 1.5
+CONFIDENCE_SPREADS = 1.5
+
+ESTIMATOR = os.environ.get('ML_ESTIMATOR', 'forest')
+
+# HistGradientBoostingRegressor bins category codes, so they must stay below max_bins
+MAX_CATEGORIES = 255
+
+
+class Estimator:
+    """
+    One registry entry
+
+    `build(params)` returns an unfitted sklearn-style regressor. With
+    `native_categories` the model is fed category codes straight from
+    FeatureEncoder (fitted from the data, no LabelEncoder or
+    prepare_features) and `build` also gets `categorical`, a mask of the
+    feature columns to split on as categories rather than as numbers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[Dict[str, Any]], Any],
+        params: Dict[str, Any],
+        native_categories: bool = False,
+    ):
+        self.name = name
+        self.build = build
+        self.params = params
+        self.native_categories = native_categories
+
+
+ESTIMATORS: Dict[str, Estimator] = {}
+
+
+def check_categories(vocab: Dict[str, Dict[str, int]], limit: int = MAX_CATEGORIES):
+    """Reject native categorical features with more categories than the booster can bin"""
+    too_many = [f"{field} ({len(lookup)})" for field, lookup in vocab.items() if len(lookup) > limit]
+    if too_many:
+        raise ValueError(
+            f"Too many categories for the boosting backend (at most {limit}): {', '.join(too_many)}"
+        )
+
+
+def register(estimator: Estimator) -> Estimator:
+    ESTIMATORS[estimator.name] = estimator
+    return estimator
+
+
+def get_estimator(name: str) -> Estimator:
+    try:
+        return ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown estimator {name!r} (choose from {', '.join(ESTIMATORS)})") from None
+
+
+class QuantileBoostingRegressor:
+    """
+    HistGradientBoostingRegressor for the price plus one quantile model per interval bound
+
+    `predict_interval` returns the point estimate and the bounds, from which
+    the spread is derived; no per-tree predictions are needed. Categorical
+    feature columns use the histogram booster's native category splits.
+
+    Prediction runs on one OpenMP thread: the inference executor already
+    runs one job per core, and letting each job also spawn a thread per
+    core oversubscribes the CPU.
+    """
+
+    def __init__(
+        self,
+        categorical: Optional[Sequence[bool]] = None,
+        quantiles: Tuple[float, float] = QUANTILES,
+        **params
+    ):
+        self.categorical = None if categorical is None else list(categorical)
+        self.quantiles = tuple(quantiles)
+        self.params = params
+        self.point = None
+        self.bounds: List[Any] = []
+
+    def _new(self, **loss):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(
+            categorical_features=self.categorical, early_stopping=False, **loss, **self.params
+        )
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'QuantileBoostingRegressor':
+        self.point = self._new().fit(X, y)
+        self.bounds = [self._new(loss='quantile', quantile=q).fit(X, y) for q in self.quantiles]
+        self.n_features_in_ = self.point.n_features_in_
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        with _single_thread():
+            return self.point.predict(X)
+
+    def predict_interval(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Point estimate, lower and upper bound for every row"""
+        with _single_thread():
+            lower, upper = (model.predict(X) for model in self.bounds)
+            return self.point.predict(X), np.minimum(lower, upper), np.maximum(lower, upper)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes in the fitted trees' node arrays"""
+        return sum(
+            predictor.nodes.nbytes
+            for model in (self.point, *self.bounds)
+            for iteration in model._predictors
+            for predictor in iteration
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return sum(model.n_iter_ for model in (self.point, *self.bounds))
+
+
+_threadpools = None
+
+
+def _single_thread():
+    """Limit OpenMP to one thread in the calling thread"""
+    global _threadpools
+    if _threadpools is None:
+        # Built once: threadpool_limits() rescans the loaded libraries on every call (~7 ms)
+        from threadpoolctl import ThreadpoolController
+        _threadpools = ThreadpoolController()
+    return _threadpools.limit(limits=1, user_api='openmp')
+
+
+def _random_forest(params: Dict[str, Any]):
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(**params)
+
+
+register(Estimator('forest', _random_forest, params={
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'random_state': 42,
+    'n_jobs': -1,
+}))
+
+register(Estimator('hgb', lambda params: QuantileBoostingRegressor(**params), params={
+    'max_iter': 100,
+    'learning_rate': 0.2,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 20,
+    'random_state': 42,
+}, native_categories=True))
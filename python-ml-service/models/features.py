@@ -0,0 +1,126 @@
+"""
+Fast Feature Encoding
+Maps raw car records straight into the model's feature matrix
+"""
+
+import numpy as np
+from typing import Dict, Any, List, Sequence
+
+
+# Reference year used for the age feature
+CURRENT_YEAR = 2024
+
+# Raw field behind each encoded categorical feature
+CATEGORICAL_FIELDS = {
+    'make_encoded': 'make',
+    'model_encoded': 'model',
+    'trim_encoded': 'trim',
+    'province_encoded': 'province',
+}
+
+
+class FeatureEncoder:
+    """
+    Precompiled category lookup tables built once from the fitted encoders
+
+    Produces exactly the values of CarValuationModel.prepare_features as a
+    float32 matrix (the dtype the forest uses internally) without pandas or
+    per-value LabelEncoder calls. Unseen categories encode to 0.
+    """
+
+    def __init__(self, encoders: Dict[str, Any], features: Sequence[str]):
+        self.features = list(features)
+        self.vocab = {
+            field: {str(value): code for code, value in enumerate(encoder.classes_)}
+            for field, encoder in encoders.items()
+        }
+
+    @classmethod
+    def fit(cls, frame, features: Sequence[str]) -> 'FeatureEncoder':
+        """Lookup tables straight from a training DataFrame (codes as LabelEncoder would assign)"""
+        vocab = {}
+        for feature in features:
+            field = CATEGORICAL_FIELDS.get(feature)
+            if field is not None:
+                values = np.unique(frame[field].astype(str))
+                vocab[field] = {str(value): code for code, value in enumerate(values)}
+        return cls.from_vocab(vocab, features)
+
+    @classmethod
+    def from_vocab(cls, vocab: Dict[str, Dict[str, int]], features: Sequence[str]) -> 'FeatureEncoder':
+        """Rebuild from saved lookup tables, without the sklearn encoders"""
+        encoder = cls({}, features)
+        encoder.vocab = {field: dict(lookup) for field, lookup in vocab.items()}
+        return encoder
+
+    def transform(self, cars: List[Dict[str, Any]], mileage_bucket: int = 0) -> np.ndarray:
+        """
+        Encode a list of car dicts into an (n_cars, n_features) float32 matrix
+
+        With a mileage_bucket, mileage is rounded to the nearest multiple of
+        it first so nearby cars share one feature vector.
+        """
+        n = len(cars)
+        year = np.fromiter((car['year'] for car in cars), dtype=np.float64, count=n)
+        mileage = np.fromiter((car['mileage'] for car in cars), dtype=np.float64, count=n)
+        if mileage_bucket:
+            mileage = np.round(mileage / mileage_bucket) * mileage_bucket
+        codes = {}
+        for feature in self.features:
+            field = CATEGORICAL_FIELDS.get(feature)
+            if field is not None:
+                lookup = self.vocab[field]
+                codes[field] = np.fromiter(
+                    (lookup.get(car[field], 0) for car in cars), dtype=np.float32, count=n
+                )
+        return self.transform_codes(year, mileage, codes)
+
+    def transform_columns(
+        self,
+        year: np.ndarray,
+        mileage: np.ndarray,
+        categories: Dict[str, np.ndarray],
+        mileage_bucket: int = 0
+    ) -> np.ndarray:
+        """`transform` for cars held as year and mileage arrays and raw category arrays by field"""
+        if mileage_bucket:
+            mileage = np.round(np.asarray(mileage, dtype=np.float64) / mileage_bucket) * mileage_bucket
+        codes = {}
+        for feature in self.features:
+            field = CATEGORICAL_FIELDS.get(feature)
+            if field is not None:
+                lookup = self.vocab[field]
+                values = categories[field]
+                codes[field] = np.fromiter(
+                    (lookup.get(value, 0) for value in values), dtype=np.float32, count=len(values)
+                )
+        return self.transform_codes(year, mileage, codes)
+
+    def transform_codes(
+        self,
+        year: np.ndarray,
+        mileage: np.ndarray,
+        codes: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Feature matrix from year and mileage arrays and already-encoded category codes by field"""
+        year = np.asarray(year, dtype=np.float64)
+        mileage = np.asarray(mileage, dtype=np.float64)
+        X = np.empty((len(year), len(self.features)), dtype=np.float32)
+        age = CURRENT_YEAR - year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mileage_per_year = mileage / (age + 1)
+
+        numeric = {
+            'year': year,
+            'mileage': mileage,
+            'age': age,
+            'mileage_per_year': mileage_per_year,
+        }
+
+        for col, feature in enumerate(self.features):
+            if feature in numeric:
+                X[:, col] = numeric[feature]
+            else:
+                X[:, col] = codes[CATEGORICAL_FIELDS[feature]]
+
+        return X
@@ -0,0 +1,285 @@
+"""
+Flattened Random Forest Inference Engine
+Every tree of a fitted forest in contiguous arrays, traversed with numpy
+"""
+
+import json
+import os
+
+import numpy as np
+from typing import Optional, Tuple
+
+
+# Rows traversed per pass; keeps the (n_trees, chunk) working set in cache
+CHUNK_ROWS = 256
+
+# Bump when the node layout changes (part of the model fingerprint)
+LAYOUT_VERSION = 2
+
+# One 8-byte record per node so each traversal step is a single gather:
+# float32 threshold, offset from the node to its left child, feature index
+NODE_DTYPE = np.dtype({
+    'names': ['threshold', 'child', 'feature'],
+    'formats': [np.float32, np.uint16, np.uint8],
+    'offsets': [0, 4, 6],
+    'itemsize': 8,
+})
+
+# For trees with more nodes than a uint16 offset can span
+WIDE_NODE_DTYPE = np.dtype({
+    'names': ['threshold', 'child', 'feature'],
+    'formats': [np.float32, np.uint32, np.uint8],
+    'offsets': [0, 4, 8],
+    'itemsize': 12,
+})
+
+# Leaf value types accepted by quantize(); int16 stores whole multiples of a scale
+LEAF_DTYPES = ('float64', 'float32', 'int16')
+
+
+class FlatForest:
+    """
+    A fitted RandomForestRegressor exported into flat node arrays
+
+    All trees are stored back to back in one node array, each tree in
+    breadth-first order so the two children of a split are adjacent:
+    a row moves `child` nodes ahead when its feature is <= the threshold and
+    `child + 1` ahead otherwise. Leaves have offset 0 and an infinite
+    threshold, so a fixed number of steps (the deepest tree's depth) walks
+    every row to its leaf without masks. Features are float32, so a float64
+    threshold t splits them exactly like the largest float32 <= t, which is
+    what is stored; per-tree outputs match `tree.predict` bit for bit.
+
+    Leaf values are float64 unless `quantize` narrowed them; `value_scale`
+    turns stored values back into prices.
+    """
+
+    def __init__(
+        self,
+        nodes: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        value_scale: float = 1.0,
+    ):
+        self.nodes = nodes
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.value_scale = value_scale
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'FlatForest':
+        """Export the fitted trees of a RandomForestRegressor"""
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        largest = max(tree.node_count for tree in trees)
+        dtype = NODE_DTYPE if largest <= np.iinfo(np.uint16).max else WIDE_NODE_DTYPE
+        nodes = np.zeros(sum(tree.node_count for tree in trees), dtype=dtype)
+        value = np.empty(len(nodes), dtype=np.float64)
+        roots = np.empty(len(trees), dtype=np.int32)
+
+        offset = 0
+        for t, tree in enumerate(trees):
+            order, child = _breadth_first_layout(tree.children_left, tree.children_right)
+            is_leaf = tree.children_left[order] < 0
+            block = slice(offset, offset + tree.node_count)
+
+            nodes['threshold'][block] = np.where(is_leaf, np.inf, _round_down_f32(tree.threshold[order]))
+            nodes['child'][block] = child - np.arange(tree.node_count)
+            nodes['feature'][block] = np.where(is_leaf, 0, tree.feature[order])
+            value[block] = tree.value[order, 0, 0]
+            roots[t] = offset
+            offset += tree.node_count
+
+        return cls(
+            nodes=nodes,
+            value=value,
+            roots=roots,
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=forest.n_features_in_,
+        )
+
+    def save(self, directory: str):
+        """Write the arrays as .npy files (plus a small JSON header) that `load` can map"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('nodes', 'value', 'roots'):
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'forest.json'), 'w') as f:
+            json.dump({'layout': LAYOUT_VERSION, 'max_depth': self.max_depth,
+                       'n_features': self.n_features, 'value_scale': self.value_scale}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'FlatForest':
+        """
+        Load saved arrays, by default memory-mapped read-only
+
+        Mapped arrays live in the OS page cache, so every process that maps
+        the same files shares one physical copy of the forest.
+        """
+        with open(os.path.join(directory, 'forest.json')) as f:
+            header = json.load(f)
+        if header.get('layout') != LAYOUT_VERSION:
+            raise ValueError(f"Forest layout {header.get('layout')} in {directory}, expected {LAYOUT_VERSION}")
+        mode = 'r' if mmap else None
+        # np.asarray drops the memmap subclass (and its per-slice overhead)
+        # while keeping the mapping alive through .base
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode))
+            for name in ('nodes', 'value', 'roots')
+        }
+        return cls(max_depth=header['max_depth'], n_features=header['n_features'],
+                   value_scale=header.get('value_scale', 1.0), **arrays)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def threshold(self) -> np.ndarray:
+        return self.nodes['threshold']
+
+    @property
+    def feature(self) -> np.ndarray:
+        return self.nodes['feature']
+
+    @property
+    def child(self) -> np.ndarray:
+        return self.nodes['child']
+
+    @property
+    def nbytes(self) -> int:
+        return self.nodes.nbytes + self.value.nbytes + self.roots.nbytes
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf index reached in every tree, as an (n_trees, n_rows) array"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.int32)
+        for start in range(0, n_rows, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, n_rows)
+            leaves[:, start:stop] = self._apply_chunk(X[start:stop])
+        return leaves
+
+    def _apply_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+        row_offsets = np.arange(n_rows, dtype=np.int32) * np.int32(self.n_features)
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            step = self.nodes[node]
+            x = flat_X[row_offsets + step['feature']]
+            node += step['child']
+            node += x > step['threshold']
+        return node
+
+    def tree_predictions(self, X: np.ndarray) -> np.ndarray:
+        """Return an (n_trees, n_rows) array of each tree's prediction"""
+        values = self.value[self.apply(X)]
+        if self.value.dtype == np.float64 and self.value_scale == 1.0:
+            return values
+        return values.astype(np.float64) * self.value_scale
+
+    def quantize(self, dtype: str, scale: float = 100.0) -> 'FlatForest':
+        """
+        A copy with narrower leaf values: float32, or int16 multiples of `scale`
+
+        Lossy: prices move by up to half a `scale` per tree (int16) or by
+        float32 rounding.
+        """
+        if dtype not in LEAF_DTYPES:
+            raise ValueError(f"Leaf dtype must be one of {LEAF_DTYPES}, got {dtype!r}")
+        prices = self.value.astype(np.float64) * self.value_scale
+        if dtype == 'int16':
+            units = np.round(prices / scale)
+            if np.abs(units).max(initial=0) > np.iinfo(np.int16).max:
+                raise ValueError(f"Leaf values do not fit int16 at scale {scale}")
+            value, value_scale = units.astype(np.int16), scale
+        else:
+            value, value_scale = prices.astype(dtype), 1.0
+        return FlatForest(self.nodes, value, self.roots, self.max_depth, self.n_features, value_scale)
+
+    def prune(self, max_depth: Optional[int] = None, n_trees: Optional[int] = None) -> 'FlatForest':
+        """
+        A copy keeping the first `n_trees` trees, each cut at `max_depth`
+
+        Nodes at the cut depth become leaves predicting their training mean
+        (sklearn stores a value for every node). Trees are breadth first, so
+        the kept nodes of each tree are a prefix of its block.
+        """
+        n_trees = self.n_trees if n_trees is None else min(n_trees, self.n_trees)
+        max_depth = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+        ends = np.append(self.roots[1:], len(self.nodes))[:n_trees]
+        depth = self.node_depths()
+
+        keep = np.zeros(len(self.nodes), dtype=bool)
+        for start, end in zip(self.roots[:n_trees], ends):
+            keep[start:end] = depth[start:end] <= max_depth
+        nodes = self.nodes[keep]
+        cut = depth[keep] == max_depth
+        nodes['threshold'][cut] = np.inf
+        nodes['child'][cut] = 0
+
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        roots = kept_before[self.roots[:n_trees]].astype(np.int32)
+        return FlatForest(nodes, self.value[keep], roots, max_depth, self.n_features, self.value_scale)
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node (roots are 0)"""
+        depth = np.zeros(len(self.nodes), dtype=np.int32)
+        parents = np.flatnonzero(self.nodes['child'] != 0)
+        left = parents + self.nodes['child'][parents]
+        # Parents come before their children, so each pass settles one more level
+        for _ in range(self.max_depth):
+            depth[left] = depth[parents] + 1
+            depth[left + 1] = depth[parents] + 1
+        return depth
+
+    def predict_mean_std(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Forest mean and spread across trees for every row"""
+        return mean_std(self.tree_predictions(X))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Forest mean, equal to RandomForestRegressor.predict"""
+        return self.predict_mean_std(X)[0]
+
+
+def _breadth_first_layout(children_left: np.ndarray, children_right: np.ndarray):
+    """
+    Reorder a tree breadth first with sibling pairs stored next to each other
+
+    Returns the original node id at each new position and, per new position,
+    the new index of its left child (its own index for leaves).
+    """
+    order = [0]
+    child = np.empty(len(children_left), dtype=np.int32)
+    i = 0
+    while i < len(order):
+        node = order[i]
+        if children_left[node] < 0:
+            child[i] = i
+        else:
+            child[i] = len(order)
+            order.append(children_left[node])
+            order.append(children_right[node])
+        i += 1
+    return np.asarray(order, dtype=np.intp), child
+
+
+def _round_down_f32(threshold: np.ndarray) -> np.ndarray:
+    """The largest float32 <= each threshold"""
+    rounded = threshold.astype(np.float32)
+    return np.where(rounded > threshold, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+
+
+def mean_std(tree_predictions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and std over the tree axis of an (n_trees, n_rows) array"""
+    n_trees = tree_predictions.shape[0]
+    # Accumulate tree by tree (like RandomForestRegressor.predict) so the
+    # mean matches sklearn bit for bit instead of using pairwise summation
+    mean = np.cumsum(tree_predictions, axis=0)[-1] / n_trees
+    std = np.std(tree_predictions, axis=0)
+    return mean, std
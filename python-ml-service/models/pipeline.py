@@ -0,0 +1,60 @@
+"""
+Fused Full-Analysis Pipeline
+Valuation and depreciation as one plan over a batch of cars
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+from models.depreciation import SUMMARY_YEARS, DepreciationModel, depreciation_model
+from models.timing import StageTimer, current_timer, timed
+from models.valuation import CarValuationModel, current_model, ensure_model
+
+
+class AnalysisPipeline:
+    """
+    Featurizes cars once, runs the forest once, and feeds the predicted fair
+    prices straight into the vectorized depreciation step
+
+    Output per car matches the separate endpoints:
+    {'valuation': {...}, 'depreciation': {...}}, or {'error': ...}.
+    """
+
+    def __init__(self, valuation: CarValuationModel, depreciation: DepreciationModel):
+        self.valuation = valuation
+        self.depreciation = depreciation
+
+    def run(self, cars: List[Dict[str, Any]], timer: StageTimer = None) -> List[Dict[str, Any]]:
+        if not cars:
+            return []
+
+        rows, mean, std = self.valuation.score(cars, timer)
+        with timed(timer, 'score'):
+            valuations = self.valuation.build_results(cars, rows, mean, std)
+
+        with timed(timer, 'depreciation'):
+            # Depreciation starts from the predicted fair price
+            depreciations = self.depreciation.predict_arrays(
+                purchase_prices=mean.astype(np.int64),
+                makes=[cars[i]['make'] for i in rows],
+                model_years=[cars[i].get('year', 2024) for i in rows],
+                horizons=[SUMMARY_YEARS] * len(rows),
+            )
+
+        results = [valuations[i] for i in range(len(cars))]
+        for i, depreciation in zip(rows, depreciations):
+            if 'error' in depreciation:
+                results[i] = depreciation
+            else:
+                results[i] = {'valuation': valuations[i], 'depreciation': depreciation}
+        return results
+
+
+def get_full_analyses(cars: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """Run the fused pipeline; returns results and seconds spent per stage"""
+    ensure_model()
+
+    # Inside the inference executor, stages go to the executor's timer
+    timer = current_timer() or StageTimer()
+    results = AnalysisPipeline(current_model(), depreciation_model).run(cars, timer)
+    return results, timer.stages
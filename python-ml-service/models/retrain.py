@@ -0,0 +1,207 @@
+"""
+Background Retraining
+Trains a candidate model on the growing training set and hot-swaps it in when it holds up
+"""
+
+import collections
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from data.listings import LISTINGS_PATH, count_listings, get_training_set, get_training_set_fingerprint
+from models.valuation import CarValuationModel, current_model, get_artifact_path, prediction_cache, swap_model
+
+
+# Share of the training set held out to compare the candidate with the live model
+HOLDOUT_FRACTION = 0.15
+HOLDOUT_SEED = 7
+
+
+def evaluate(model: CarValuationModel, cars: List[Dict[str, Any]], prices: np.ndarray) -> Dict[str, float]:
+    """MAE and R² of a model on labelled cars, straight through the estimator (no cache)"""
+    X = model.feature_encoder.transform(cars)
+    predicted, _ = model._mean_std(X)
+    errors = predicted - prices
+    total = float(np.sum((prices - prices.mean()) ** 2))
+    return {
+        'mae': round(float(np.mean(np.abs(errors))), 2),
+        'r2': round(1 - float(np.sum(errors ** 2)) / total, 4) if total else 0.0,
+    }
+
+
+class Retrainer:
+    """
+    Retrains the valuation model in a background thread
+
+    Inference keeps using the live model while the candidate trains. The
+    candidate is fitted without the held-out rows and promoted only if its
+    MAE on them is within `tolerance` of the live model's reference: the
+    held-out fit behind the last promotion, scored on the same rows. The
+    holdout mask comes from a fixed seed, so it is stable as listings are
+    appended. Until the first promotion there is no reference (the startup
+    model saw every row), so the candidate is gated on `min_r2` instead.
+
+    A candidate that passes is refitted on every row, saved as the model
+    artifact for the new training set and swapped in with swap_model;
+    requests already running finish on the model they started with. A
+    retrain requested while one is running is queued as a single follow-up.
+    Only this process swaps: other workers load the saved artifact when
+    they restart.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = 0.05,
+        min_r2: float = 0.8,
+        history: int = 20,
+        listings_path: str = LISTINGS_PATH,
+        on_promote: Optional[Callable[[CarValuationModel], Any]] = None,
+    ):
+        self.tolerance = tolerance
+        self.min_r2 = min_r2
+        self.listings_path = listings_path
+        self.on_promote = on_promote
+        self.jobs = collections.deque(maxlen=history)
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._active = False
+        self._pending: Optional[Dict[str, Any]] = None
+        # Held-out fit of the last promoted model, and the version it stands in for
+        self._reference: Optional[CarValuationModel] = None
+        self._reference_version: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'Retrainer':
+        """Configure from ML_RETRAIN_* environment variables"""
+        return cls(
+            tolerance=float(os.environ.get('ML_RETRAIN_TOLERANCE', 0.05)),
+            min_r2=float(os.environ.get('ML_RETRAIN_MIN_R2', 0.8)),
+            **kwargs
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._active
+
+    def request(self, reason: str = 'manual') -> Dict[str, Any]:
+        """Start a retrain, or queue one behind the running job; returns the job"""
+        with self._lock:
+            if self._pending is not None:
+                return dict(self._pending)
+            self._ids += 1
+            job = {'id': self._ids, 'reason': reason, 'status': 'queued', 'requestedAt': time.time()}
+            self.jobs.append(job)
+            if self._active:
+                self._pending = job
+            else:
+                self._active = True
+                self._thread = threading.Thread(target=self._run, args=(job,), name='retrain', daemon=True)
+                self._thread.start()
+            return dict(job)
+
+    def _run(self, job: Dict[str, Any]):
+        while job is not None:
+            self._retrain(job)
+            with self._lock:
+                job, self._pending = self._pending, None
+                self._active = job is not None
+
+    def _new_model(self, live: CarValuationModel) -> CarValuationModel:
+        """Same backend and params as the live model; n_jobs=1 leaves the other cores to inference"""
+        params = dict(live.params)
+        if 'n_jobs' in params:
+            params['n_jobs'] = 1
+        return CarValuationModel(cache=prediction_cache, params=params, estimator=live.estimator)
+
+    def _retrain(self, job: Dict[str, Any]):
+        job['status'] = 'training'
+        started = time.perf_counter()
+        try:
+            # Fingerprint before reading: listings appended meanwhile make the artifact stale, never wrong
+            data_fingerprint = get_training_set_fingerprint(self.listings_path)
+            frame = get_training_set(self.listings_path)
+            rng = np.random.default_rng(HOLDOUT_SEED)
+            holdout = rng.random(len(frame)) < HOLDOUT_FRACTION
+            train, test = frame[~holdout], frame[holdout]
+
+            live = current_model()
+            candidate = self._new_model(live)
+            candidate.train(train)
+
+            cars = test.to_dict('records')
+            prices = test['price'].to_numpy(dtype=np.float64)
+            score = evaluate(candidate, cars, prices)
+            reference = self._reference if self._reference_version == live.version else None
+            job.update({
+                'rows': len(frame),
+                'holdoutRows': len(test),
+                'listings': count_listings(self.listings_path),
+                'trainingSeconds': round(candidate.metadata['training_seconds'], 3),
+                'candidate': score,
+                'live': {
+                    'version': live.version,
+                    'inSample': reference is None,
+                    **evaluate(reference or live, cars, prices),
+                },
+            })
+
+            if reference is not None:
+                limit = job['live']['mae'] * (1 + self.tolerance)
+                job['promoted'] = score['mae'] <= limit
+                reason = f"MAE ${score['mae']:,.0f} > ${limit:,.0f}"
+            else:
+                job['promoted'] = score['r2'] >= self.min_r2
+                reason = f"R² {score['r2']:.3f} < {self.min_r2}"
+            if job['promoted']:
+                promoted = self._new_model(live)
+                promoted.train(frame)
+                job['trainingSeconds'] = round(
+                    job['trainingSeconds'] + promoted.metadata['training_seconds'], 3
+                )
+                job['artifact'] = self._save(promoted, data_fingerprint)
+                swap_model(promoted)
+                self._reference, self._reference_version = candidate, promoted.version
+                if self.on_promote is not None:
+                    self.on_promote(promoted)
+                job['version'] = promoted.version
+                print(f"🔄 Promoted model v{promoted.version}: holdout MAE ${score['mae']:,.0f}, "
+                      f"R² {score['r2']:.3f}")
+            else:
+                print(f"⚠️ Kept model v{live.version}: candidate {reason}")
+            job['status'] = 'done'
+        except Exception as e:
+            job.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+            print(f"❌ Retrain failed: {job['error']}")
+        finally:
+            job['seconds'] = round(time.perf_counter() - started, 3)
+
+    def _save(self, model: CarValuationModel, data_fingerprint: str) -> Optional[str]:
+        """Save as the artifact a restart loads for this training set; None if it cannot be written"""
+        fingerprint = model.fingerprint(data_fingerprint)
+        path = get_artifact_path(fingerprint)
+        try:
+            model.save(path, fingerprint)
+        except OSError as e:
+            print(f"⚠️ Could not save the promoted model artifact: {e}")
+            return None
+        return os.path.basename(path)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no retrain is running or queued (scripts and tests)"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self._active
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'tolerance': self.tolerance,
+            'minR2': self.min_r2,
+            'listings': count_listings(self.listings_path),
+            'jobs': [dict(job) for job in self.jobs],
+        }
@@ -0,0 +1,371 @@
+"""
+Materialized Valuation Surface
+Fair price and spread precomputed for every category combination on a mileage grid
+"""
+
+import copy
+import itertools
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data.training_data import MODELS, PROVINCES, TRIMS
+from models.features import CURRENT_YEAR
+
+if TYPE_CHECKING:
+    from models.valuation import CarValuationModel
+
+
+# Build a surface for every trained or loaded model the service promotes
+SURFACE_ENABLED = os.environ.get('ML_SURFACE', '0') == '1'
+SURFACE_STEP = int(os.environ.get('ML_SURFACE_STEP', 5_000))
+SURFACE_MAX_MILEAGE = int(os.environ.get('ML_SURFACE_MAX_KM', 250_000))
+
+# The model years in the training data
+SURFACE_YEARS = range(2015, CURRENT_YEAR + 1)
+
+# Category combinations per pool task; each is len(years) x grid rows through the model
+CELLS_PER_TASK = 200
+
+# Seconds pool workers get to start before the build falls back to this process
+WORKER_START_TIMEOUT = 60
+
+# Fresh synthetic listings the interpolation error is measured on
+ERROR_SAMPLES = 5000
+
+Key = Tuple[str, str, str, str]
+
+
+class ValuationSurface:
+    """
+    Fair price and spread per (make, model, trim, province) and model year,
+    sampled every `step` km from 0 to `max_mileage`
+
+    `lookup` interpolates linearly between the two nearest grid points.
+    Cars outside the grid (other years, higher mileage) or with a category
+    combination the surface has no cell for are left for the model.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Key],
+        years: Sequence[int],
+        step: int,
+        mean: np.ndarray,
+        std: np.ndarray,
+    ):
+        self.cells = {key: i for i, key in enumerate(keys)}
+        self.first_year = int(years[0])
+        self.n_years = len(years)
+        self.step = step
+        self.max_mileage = (mean.shape[2] - 1) * step
+        # (cells, years, grid points)
+        self.mean = mean
+        self.std = std
+
+    def lookup(
+        self,
+        cars: List[Dict[str, Any]],
+        mileage_bucket: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interpolated fair price and spread for every car (NaN off the surface), and the hit mask
+
+        With a mileage_bucket, mileage is rounded to the nearest multiple of
+        it first, as the featurizer does.
+        """
+        if len(cars) == 1:
+            return self._lookup_one(cars[0], mileage_bucket)
+        n = len(cars)
+        cell = self.cell_index(((car['make'], car['model'], car['trim'], car['province']) for car in cars), n)
+        year = np.fromiter((car['year'] for car in cars), dtype=np.float64, count=n)
+        mileage = np.fromiter((car['mileage'] for car in cars), dtype=np.float64, count=n)
+        return self.interpolate(cell, year, mileage, mileage_bucket)
+
+    def lookup_columns(
+        self,
+        year: np.ndarray,
+        mileage: np.ndarray,
+        categories: Dict[str, np.ndarray],
+        mileage_bucket: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """`lookup` for cars held as year and mileage arrays and category arrays by field"""
+        keys = zip(categories['make'], categories['model'], categories['trim'], categories['province'])
+        return self.interpolate(self.cell_index(keys, len(year)), year, mileage, mileage_bucket)
+
+    def cell_index(self, keys: Iterable[Key], n: int) -> np.ndarray:
+        """Cell of each (make, model, trim, province), -1 where the surface has none"""
+        cells = self.cells
+        return np.fromiter((cells.get(key, -1) for key in keys), dtype=np.intp, count=n)
+
+    def interpolate(
+        self,
+        cell: np.ndarray,
+        year: np.ndarray,
+        mileage: np.ndarray,
+        mileage_bucket: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = len(cell)
+        year = np.asarray(year, dtype=np.float64)
+        mileage = np.asarray(mileage, dtype=np.float64)
+        if mileage_bucket:
+            mileage = np.round(mileage / mileage_bucket) * mileage_bucket
+        year_index = year - self.first_year
+        hit = (
+            (cell >= 0) & (year_index >= 0) & (year_index < self.n_years) & (year_index == np.floor(year_index))
+            & (mileage >= 0) & (mileage <= self.max_mileage)
+        )
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        rows = np.flatnonzero(hit)
+        if len(rows) == 0:
+            return mean, std, hit
+
+        position = mileage[rows] / self.step
+        left = np.minimum(position.astype(np.intp), self.mean.shape[2] - 2)
+        fraction = position - left
+        c, y = cell[rows], year_index[rows].astype(np.intp)
+        for out, table in ((mean, self.mean), (std, self.std)):
+            out[rows] = table[c, y, left] * (1 - fraction) + table[c, y, left + 1] * fraction
+        return mean, std, hit
+
+    def _lookup_one(self, car: Dict[str, Any], mileage_bucket: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """`lookup` for a single car in plain Python, skipping the array setup"""
+        cell = self.cells.get((car['make'], car['model'], car['trim'], car['province']))
+        year = car['year'] - self.first_year
+        mileage = car['mileage']
+        if mileage_bucket:
+            # round() breaks ties to even, like np.round in the featurizer
+            mileage = round(mileage / mileage_bucket) * mileage_bucket
+        if cell is None or not (0 <= year < self.n_years and year == int(year) and 0 <= mileage <= self.max_mileage):
+            return np.full(1, np.nan), np.full(1, np.nan), np.zeros(1, dtype=bool)
+        position = mileage / self.step
+        left = min(int(position), self.mean.shape[2] - 2)
+        fraction = position - left
+        mean_row = self.mean[cell, int(year)]
+        std_row = self.std[cell, int(year)]
+        return (
+            np.array([mean_row[left] * (1 - fraction) + mean_row[left + 1] * fraction]),
+            np.array([std_row[left] * (1 - fraction) + std_row[left + 1] * fraction]),
+            np.ones(1, dtype=bool),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.mean.nbytes + self.std.nbytes
+
+
+def surface_keys(vocab: Dict[str, Dict[str, int]], pairs: Optional[Sequence[Tuple[str, str]]] = None) -> List[Key]:
+    """Every known (make, model) with every trim and province the model was trained on"""
+    pairs = pairs or [(make, model) for make, models in MODELS.items() for model in models]
+    pairs = [(make, model) for make, model in pairs if make in vocab['make'] and model in vocab['model']]
+    trims = [trim for trim in TRIMS if trim in vocab['trim']]
+    provinces = [province for province in PROVINCES if province in vocab['province']]
+    return [
+        (make, model, trim, province)
+        for (make, model), trim, province in itertools.product(pairs, trims, provinces)
+    ]
+
+
+def _cell_values(
+    model: 'CarValuationModel',
+    codes: Dict[str, np.ndarray],
+    years: np.ndarray,
+    grid: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Model mean and spread for a block of cells at every year and grid mileage"""
+    n_cells = len(next(iter(codes.values())))
+    per_cell = len(years) * len(grid)
+    X = model.feature_encoder.transform_codes(
+        np.tile(np.repeat(years, len(grid)), n_cells),
+        np.tile(grid, n_cells * len(years)),
+        {field: np.repeat(values, per_cell) for field, values in codes.items()},
+    )
+    mean, std = model._mean_std(X)
+    shape = (n_cells, len(years), len(grid))
+    # float64, so grid points give the model's exact value and truncate to the same dollar
+    return mean.reshape(shape), std.reshape(shape)
+
+
+_worker_model = None
+
+
+def _init_worker(path: str):
+    global _worker_model
+    with open(path, 'rb') as f:
+        _worker_model = pickle.load(f)
+
+
+def _score_cells(codes: Dict[str, np.ndarray], years: np.ndarray, grid: np.ndarray):
+    return _cell_values(_worker_model, codes, years, grid)
+
+
+def _inference_copy(model: 'CarValuationModel') -> 'CarValuationModel':
+    """Just what scoring needs, to ship to pool workers"""
+    stripped = copy.copy(model)
+    stripped.cache = None
+    stripped.comparables = None
+    stripped.surface = None
+    if stripped.flat_forest is not None:
+        # The flattened forest scores on its own; skip pickling the sklearn one
+        stripped._estimator_state = None
+        stripped.model = None
+    return stripped
+
+
+def _score_on_pool(
+    model: 'CarValuationModel',
+    blocks: List[Dict[str, np.ndarray]],
+    years: np.ndarray,
+    grid: np.ndarray,
+    jobs: int,
+) -> Optional[List[Tuple[np.ndarray, np.ndarray]]]:
+    """Score the blocks on a spawned pool, or None if its workers do not start"""
+    # Workers read the model from a file: sent through the spawn pipe, a
+    # worker stuck in the caller's __main__ would block submit() itself
+    with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as f:
+        pickle.dump(_inference_copy(model), f, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        # Spawned, not forked: this usually runs in a thread of the serving process
+        context = multiprocessing.get_context('spawn')
+        pool = ProcessPoolExecutor(jobs, mp_context=context, initializer=_init_worker, initargs=(f.name,))
+        try:
+            pool.submit(os.getpid).result(timeout=WORKER_START_TIMEOUT)
+        except (TimeoutError, BrokenProcessPool) as e:
+            print(f"⚠️ Surface workers did not start ({type(e).__name__}); "
+                  f"is the caller's __main__ guarded? Building in this process")
+            # No public way to stop workers stuck importing __main__
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+            return None
+        with pool:
+            return list(pool.map(_score_cells, blocks, itertools.repeat(years), itertools.repeat(grid)))
+    finally:
+        os.remove(f.name)
+
+
+def build_surface(
+    model: 'CarValuationModel',
+    step: int = SURFACE_STEP,
+    max_mileage: int = SURFACE_MAX_MILEAGE,
+    jobs: Optional[int] = None,
+    pairs: Optional[Sequence[Tuple[str, str]]] = None,
+) -> Tuple[ValuationSurface, Dict[str, Any]]:
+    """
+    Evaluate the model on every cell of the grid and measure the interpolation error
+
+    Blocks of cells are scored on a process pool (`jobs`, default all
+    cores), then the interpolation error is measured against the model.
+    Returns the surface and a report.
+
+    Pool workers are spawned, so they re-import the caller's `__main__`:
+    scripts calling this with jobs > 1 need an `if __name__ == '__main__'`
+    guard. Without one the workers never come up; after
+    WORKER_START_TIMEOUT seconds they are killed and the build runs with
+    jobs=1 (`jobs` in the report says which).
+    """
+    started = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    vocab = model.feature_encoder.vocab
+    keys = surface_keys(vocab, pairs)
+    years = np.array(SURFACE_YEARS, dtype=np.float64)
+    grid = np.arange(0, max_mileage + step, step, dtype=np.float64)
+
+    fields = ('make', 'model', 'trim', 'province')
+    codes = {
+        field: np.array([vocab[field][key[i]] for key in keys], dtype=np.float32)
+        for i, field in enumerate(fields)
+    }
+    blocks = [
+        {field: values[start:start + CELLS_PER_TASK] for field, values in codes.items()}
+        for start in range(0, len(keys), CELLS_PER_TASK)
+    ]
+    results = _score_on_pool(model, blocks, years, grid, jobs) if jobs > 1 else None
+    if results is None:
+        jobs = 1
+        results = [_cell_values(model, block, years, grid) for block in blocks]
+    surface = ValuationSurface(
+        keys, SURFACE_YEARS, step,
+        np.concatenate([mean for mean, _ in results]), np.concatenate([std for _, std in results]),
+    )
+    build_seconds = time.perf_counter() - started
+
+    report = {
+        'cells': len(keys),
+        'years': [int(years[0]), int(years[-1])],
+        'step': step,
+        'maxMileage': surface.max_mileage,
+        'points': int(surface.mean.size),
+        'bytes': surface.nbytes,
+        'jobs': jobs,
+        'buildSeconds': round(build_seconds, 2),
+        'error': interpolation_error(surface, model),
+    }
+    return surface, report
+
+
+def interpolation_error(
+    surface: ValuationSurface,
+    model: 'CarValuationModel',
+    samples: int = ERROR_SAMPLES,
+) -> Dict[str, float]:
+    """
+    Surface vs. model fair price and spread on fresh synthetic listings
+
+    The listings are drawn like the training data (not from the training
+    seed), so the error is weighted towards the cars the service sees.
+    """
+    from data.training_data import TRAINING_SEED, generate_training_data
+
+    cars = generate_training_data(samples, seed=TRAINING_SEED + 1).to_dict('records')
+    mean, std, hit = surface.lookup(cars)
+    if not hit.any():
+        return {'samples': samples, 'coverage': 0.0}
+    cars = [car for car, on_surface in zip(cars, hit) if on_surface]
+    exact_mean, exact_std = model._mean_std(model.feature_encoder.transform(cars))
+    mean, std = mean[hit], std[hit]
+    error = np.abs(mean - exact_mean)
+    return {
+        'samples': samples,
+        'coverage': round(float(hit.mean()), 4),
+        'mae': round(float(error.mean()), 2),
+        'p99': round(float(np.percentile(error, 99)), 2),
+        'max': round(float(error.max()), 2),
+        'relativeMae': round(float((error / exact_mean).mean()), 5),
+        'stdMae': round(float(np.abs(std - exact_std).mean()), 2),
+    }
+
+
+def start_surface_build(model: 'CarValuationModel', **kwargs) -> threading.Thread:
+    """
+    Build a model's surface in a background thread and attach it when done
+
+    Until then (or if the build fails) the model scores every car itself.
+    The report goes to `metadata['surface']`.
+    """
+    def run():
+        try:
+            surface, report = build_surface(model, **kwargs)
+        except Exception as e:
+            print(f"⚠️ Could not build the valuation surface: {e}")
+            return
+        model.metadata['surface'] = report
+        model.surface = surface
+        error = report['error']
+        print(f"🗺️ Valuation surface for model v{model.version}: {report['cells']:,} cells x "
+              f"{report['points'] // report['cells']} points ({report['bytes'] / 1e6:.1f} MB) "
+              f"in {report['buildSeconds']:.1f}s; interpolation MAE ${error['mae']:,.0f} "
+              f"(p99 ${error['p99']:,.0f})")
+
+    thread = threading.Thread(target=run, name='surface-build', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,232 @@
+"""
+Forest Hyperparameter Sweep
+Cross-validated search over forest sizes and depths, trading accuracy against size and latency
+
+Run from python-ml-service/:
+    python run.py sweep --trees 25,50,100,200 --depths 8,12,15,20,none
+"""
+
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from data.listings import get_training_set, get_training_set_fingerprint
+from models.forest import FlatForest
+from models.valuation import (
+    ARTIFACT_DIR, FOREST_PARAMS, CarValuationModel, get_artifact_path
+)
+
+
+SWEEP_DIR = os.path.join(ARTIFACT_DIR, 'sweep')
+
+# Written next to the artifacts; point ML_FOREST_PARAMS at it to serve the chosen forest
+PARAMS_PATH = os.path.join(ARTIFACT_DIR, 'forest_params.json')
+
+# Rows per call for the batch latency measurement
+BATCH_ROWS = 1024
+
+
+def feature_matrix(refresh: bool = False) -> Tuple[str, bool]:
+    """
+    Encode the training set once and cache X and y on disk
+
+    Keyed by the training-set fingerprint, so new listings or a new
+    generator produce a new file. Returns the path and whether it was cached.
+    """
+    fingerprint = get_training_set_fingerprint()
+    path = os.path.join(SWEEP_DIR, f"features-{fingerprint[:16]}.npz")
+    if os.path.exists(path) and not refresh:
+        return path, True
+
+    model = CarValuationModel()
+    df = model.prepare_features(get_training_set(), fit=True)
+    os.makedirs(SWEEP_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, X=df[model.features].to_numpy(dtype=np.float64), y=df['price'].to_numpy(dtype=np.float64))
+    os.replace(tmp_path, path)
+    return path, False
+
+
+def evaluate_params(params: Dict[str, Any], path: str, folds: int, seed: int) -> Dict[str, Any]:
+    """
+    K-fold held-out MAE for one forest config, then a fit on all rows
+
+    Runs in a pool worker; every fit is single-threaded so workers do not
+    compete for cores. Returns the flattened forest for latency timing.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import KFold
+
+    with np.load(path) as data:
+        X, y = data['X'], data['y']
+    full_params = {**FOREST_PARAMS, **params, 'n_jobs': 1}
+
+    maes = []
+    fit_seconds = []
+    for train, test in KFold(folds, shuffle=True, random_state=seed).split(X):
+        estimator = RandomForestRegressor(**full_params)
+        start = time.perf_counter()
+        estimator.fit(X[train], y[train])
+        fit_seconds.append(time.perf_counter() - start)
+        maes.append(float(np.mean(np.abs(estimator.predict(X[test]) - y[test]))))
+
+    estimator = RandomForestRegressor(**full_params)
+    start = time.perf_counter()
+    estimator.fit(X, y)
+    train_seconds = time.perf_counter() - start
+    flat = FlatForest.from_sklearn(estimator)
+
+    return {
+        'params': params,
+        'maeMean': round(float(np.mean(maes)), 2),
+        'maeStd': round(float(np.std(maes)), 2),
+        'foldFitSeconds': round(float(np.mean(fit_seconds)), 3),
+        'trainSeconds': round(train_seconds, 3),
+        # Pickled estimator, as stored in the model artifact
+        'sizeBytes': len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)),
+        'flatBytes': flat.nbytes,
+        'nodes': flat.node_count,
+        'maxDepth': flat.max_depth,
+        'flat': flat,
+    }
+
+
+def time_ms(fn, budget: float = 0.5) -> float:
+    """Median milliseconds per call over about `budget` seconds"""
+    fn()
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < 5 or (time.perf_counter() < deadline and len(samples) < 2000):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(float(np.median(samples)) * 1000, 4)
+
+
+def pareto_front(results: List[Dict[str, Any]], keys=('maeMean', 'singleRowMs', 'sizeBytes')) -> List[int]:
+    """Indices of results no other result beats on every key (lower is better)"""
+    front = []
+    for i, a in enumerate(results):
+        dominated = any(
+            all(b[k] <= a[k] for k in keys) and any(b[k] < a[k] for k in keys)
+            for j, b in enumerate(results) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def choose(results: List[Dict[str, Any]], tolerance: float) -> Dict[str, Any]:
+    """
+    The fastest Pareto-optimal config whose MAE is within `tolerance` of the best
+
+    Ties on latency go to the smaller model.
+    """
+    front = [results[i] for i in pareto_front(results)]
+    best_mae = min(r['maeMean'] for r in front)
+    eligible = [r for r in front if r['maeMean'] <= best_mae * (1 + tolerance)]
+    return min(eligible, key=lambda r: (r['singleRowMs'], r['sizeBytes']))
+
+
+def write_artifact(params: Dict[str, Any], report: Dict[str, Any]) -> str:
+    """Train the chosen config on all rows and save it where the service looks for it"""
+    model = CarValuationModel(params={**FOREST_PARAMS, **params})
+    model.train(get_training_set())
+    fingerprint = model.fingerprint(get_training_set_fingerprint())
+    path = get_artifact_path(fingerprint)
+    model.save(path, fingerprint)
+
+    tmp_path = f"{PARAMS_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'params': params, 'artifact': os.path.basename(path), 'sweep': report}, f, indent=2)
+    os.replace(tmp_path, PARAMS_PATH)
+    return path
+
+
+def run_sweep(
+    trees: List[int],
+    depths: List[Optional[int]],
+    folds: int = 5,
+    jobs: Optional[int] = None,
+    seed: int = 0,
+    tolerance: float = 0.01,
+    refresh: bool = False,
+    output: Optional[str] = None,
+    save: bool = True,
+) -> Dict[str, Any]:
+    """Sweep every (n_estimators, max_depth) pair and save the chosen forest"""
+    started = time.perf_counter()
+    path, cached = feature_matrix(refresh)
+    with np.load(path) as data:
+        X = data['X'].astype(np.float32)
+    print(f"🧮 Feature matrix {X.shape[0]:,} x {X.shape[1]} "
+          f"({'cached' if cached else 'built'}: {os.path.relpath(path)})")
+
+    grid = [{'n_estimators': n, 'max_depth': d} for n, d in itertools.product(trees, depths)]
+    jobs = jobs or os.cpu_count() or 1
+    print(f"🔍 {len(grid)} configs x {folds} folds on {jobs} process(es)")
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(evaluate_params, grid, itertools.repeat(path),
+                                itertools.repeat(folds), itertools.repeat(seed)))
+
+    # Latency is timed here, one config at a time, so pool workers do not skew it
+    batch = X[:BATCH_ROWS]
+    for result in results:
+        flat = result.pop('flat')
+        result['singleRowMs'] = time_ms(lambda: flat.predict_mean_std(X[:1]))
+        result['batchMs'] = time_ms(lambda: flat.predict_mean_std(batch))
+
+    front = set(pareto_front(results))
+    chosen = choose(results, tolerance)
+    for i, result in enumerate(results):
+        result['pareto'] = i in front
+
+    report = {
+        'rows': int(X.shape[0]),
+        'folds': folds,
+        'seed': seed,
+        'tolerance': tolerance,
+        'batchRows': len(batch),
+        'seconds': round(time.perf_counter() - started, 1),
+        'chosen': chosen['params'],
+        'results': results,
+    }
+    _print_report(report)
+
+    if save:
+        artifact = write_artifact(chosen['params'], {k: v for k, v in report.items() if k != 'results'})
+        report['artifact'] = artifact
+        print(f"💾 Saved {os.path.relpath(artifact)}")
+        print(f"   Serve it with ML_FOREST_PARAMS={os.path.relpath(PARAMS_PATH)}")
+
+    output = output or os.path.join(SWEEP_DIR, f"sweep-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Report written to {os.path.relpath(output)}")
+    return report
+
+
+def _print_report(report: Dict[str, Any]):
+    print("\n" + "="*96)
+    batch_label = f"{report['batchRows']} rows ms"
+    print(f"{'trees':>6} {'depth':>6} {'MAE':>9} {'± std':>7} {'fit s':>7} {'size MB':>8} "
+          f"{'nodes':>9} {'1 row ms':>9} {batch_label:>13}")
+    print("="*96)
+    chosen = report['chosen']
+    for r in sorted(report['results'], key=lambda r: r['maeMean']):
+        params = r['params']
+        mark = '⭐' if params == chosen else ('·' if r['pareto'] else ' ')
+        print(f"{params['n_estimators']:>6} {str(params['max_depth']):>6} {r['maeMean']:>9,.0f} "
+              f"{r['maeStd']:>7,.0f} {r['trainSeconds']:>7.2f} {r['sizeBytes'] / 1e6:>8.1f} "
+              f"{r['nodes']:>9,} {r['singleRowMs']:>9.3f} {r['batchMs']:>13.2f}  {mark}")
+    print("="*96)
+    print(f"⭐ chosen, · Pareto-optimal (MAE, single-row latency, size); "
+          f"chosen = fastest within {report['tolerance']:.0%} of the best MAE\n")
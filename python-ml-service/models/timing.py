@@ -0,0 +1,90 @@
+"""
+Stage Timing
+Lightweight per-stage wall-clock timings for the prediction pipelines
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+class StageTimer:
+    """Accumulates seconds spent in each named stage of one call"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Value for an HTTP Server-Timing header from per-stage seconds"""
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items())
+
+
+# Timer collecting stages for the call running in this thread, if any
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar('current_timer', default=None)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def recording(timer: StageTimer) -> Iterator[StageTimer]:
+    """Make `timer` collect every stage timed inside this block"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def timed(timer: Optional[StageTimer], name: str) -> Iterator[None]:
+    """Time a stage into `timer`, or the current recording timer, or do nothing"""
+    if timer is None:
+        timer = _current_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+class StageStats:
+    """Running count, total and max time per stage across many calls"""
+
+    def __init__(self):
+        self.count = 0
+        self._total: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+
+    def record(self, stages: Dict[str, float]):
+        self.count += 1
+        for name, seconds in stages.items():
+            self._total[name] = self._total.get(name, 0.0) + seconds
+            self._max[name] = max(self._max.get(name, 0.0), seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.count,
+            'stages': {
+                name: {
+                    'meanMs': round(total / self.count * 1000, 3),
+                    'maxMs': round(self._max[name] * 1000, 3),
+                    'totalMs': round(total * 1000, 1),
+                }
+                for name, total in self._total.items()
+            },
+        }
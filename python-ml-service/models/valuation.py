@@ -7,35 +7,160 @@ import warnings
 warnings.filterwarnings('ignore', category=UserWarning)
 
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+import hashlib
+import json
 import pickle
+import itertools
 import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from importlib.metadata import version as package_version
+
+from models.cache import PredictionCache
+from models.features import CATEGORICAL_FIELDS, CURRENT_YEAR, FeatureEncoder
+from models.compact import compact_forest
+from models.comparables import ComparablesIndex
+from models.estimators import CONFIDENCE_SPREADS, ESTIMATOR, MAX_CATEGORIES, check_categories, get_estimator
+from models.forest import LAYOUT_VERSION, FlatForest, mean_std
+from models.timing import StageTimer, current_timer, timed
+
+# pandas and scikit-learn take over a second to import; they are only
+# needed to train, fingerprint or unpickle a model, so import them there
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Bump when the artifact layout or feature set changes
+MODEL_VERSION = 5
+
+FEATURES = [
+    'year', 'mileage', 'age', 'mileage_per_year',
+    'make_encoded', 'model_encoded', 'trim_encoded', 'province_encoded'
+]
+
+# The registry's dict, so the sweep override below applies to it too
+FOREST_PARAMS = get_estimator('forest').params
+
+# A params file written by the sweep (python run.py sweep) replaces the defaults
+if os.environ.get('ML_FOREST_PARAMS'):
+    with open(os.environ['ML_FOREST_PARAMS']) as _f:
+        FOREST_PARAMS.update(json.load(_f)['params'])
+
+# Compact the flattened forest while held-out MAE rises at most this fraction
+# (e.g. 0.01); unset serves the exact forest
+COMPACT_BUDGET = float(os.environ['ML_COMPACT_BUDGET']) if os.environ.get('ML_COMPACT_BUDGET') else None
+COMPACT_LEAVES = os.environ.get('ML_COMPACT_LEAVES', 'int16')
+
+# Fresh synthetic rows (not the training seed) that the compaction budget is measured on
+COMPACT_HOLDOUT_ROWS = 2000
+
+# Params that do not change the fitted model
+RUNTIME_PARAMS = {'n_jobs', 'verbose'}
+
+# Serve from memory-mapped forest arrays shared by every worker process
+SHARED_MODEL = os.environ.get('ML_SHARED_MODEL', '0') == '1'
+
+ARTIFACT_DIR = os.environ.get(
+    'ML_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'artifacts')
+)
+
+
+# Every trained or loaded model gets a new version number
+_model_versions = itertools.count(1)
+
+# Serializes unpickling the estimator state of a loaded model
+_restore_lock = threading.Lock()
+
+
+class _Restored:
+    """
+    Attribute that `load` leaves in the artifact's estimator state
+
+    The state is unpickled on first read, so serving a loaded forest never
+    imports scikit-learn.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if obj._estimator_state is not None:
+            obj._restore_estimator()
+        return obj.__dict__.get(self.name)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
 
 
 class CarValuationModel:
-    def __init__(self):
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=15,
-            min_samples_split=5,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.make_encoder = LabelEncoder()
-        self.model_encoder = LabelEncoder()
-        self.trim_encoder = LabelEncoder()
-        self.province_encoder = LabelEncoder()
+    model = _Restored()
+    make_encoder = _Restored()
+    model_encoder = _Restored()
+    trim_encoder = _Restored()
+    province_encoder = _Restored()
+    
+    def __init__(
+        self,
+        cache: Optional[PredictionCache] = None,
+        params: Optional[Dict[str, Any]] = None,
+        estimator: str = ESTIMATOR,
+    ):
+        # Pickled sklearn estimator and encoders of a loaded artifact
+        self._estimator_state: Optional[bytes] = None
+        # Comparables artifact (path, fingerprint) of a loaded model, read on first lookup
+        self._comparables_source: Optional[Tuple[str, str]] = None
+        # Backend from models/estimators.py: 'forest' (default) or 'hgb'
+        self.estimator = get_estimator(estimator).name
+        self.params = dict(get_estimator(estimator).params if params is None else params)
+        # Estimator and encoders are created on first train (or set by load);
+        # a model loaded with load_mapped has neither, only the inference tables.
+        # Only the forest backend has a flat_forest (and can be compacted or mapped)
+        self.model = None
+        self.make_encoder = None
+        self.model_encoder = None
+        self.trim_encoder = None
+        self.province_encoder = None
+        self.features = list(FEATURES)
+        self.flat_forest = None
+        self.feature_encoder = None
+        # Nearest training listings; built by train, not part of a mapped export
+        self.comparables = None
+        # Precomputed prices on a mileage grid (models/surface.py), attached once built
+        self.surface = None
+        self.cache = cache
+        self.version = 0
+        self.metadata: Dict[str, Any] = {}
+        self.mapped = False
         self.is_trained = False
     
-    def prepare_features(self, df: pd.DataFrame, fit=False) -> pd.DataFrame:
+    def _new_estimator(self):
+        estimator = get_estimator(self.estimator)
+        if estimator.native_categories:
+            categorical = [feature in CATEGORICAL_FIELDS for feature in self.features]
+            return estimator.build({**self.params, 'categorical': categorical})
+        return estimator.build(self.params)
+    
+    @property
+    def native_categories(self) -> bool:
+        return get_estimator(self.estimator).native_categories
+    
+    def prepare_features(self, df: 'pd.DataFrame', fit=False) -> 'pd.DataFrame':
         """Prepare features for model"""
         df = df.copy()
         
         # Encode categorical variables
         if fit:
+            from sklearn.preprocessing import LabelEncoder
+            self.make_encoder = LabelEncoder()
+            self.model_encoder = LabelEncoder()
+            self.trim_encoder = LabelEncoder()
+            self.province_encoder = LabelEncoder()
             df['make_encoded'] = self.make_encoder.fit_transform(df['make'])
             df['model_encoded'] = self.model_encoder.fit_transform(df['model'])
             df['trim_encoded'] = self.trim_encoder.fit_transform(df['trim'])
@@ -56,7 +181,7 @@ class CarValuationModel:
             )
         
         # Create age feature
-        df['age'] = 2024 - df['year']
+        df['age'] = CURRENT_YEAR - df['year']
         
         # Create mileage per year feature
         df['mileage_per_year'] = df['mileage'] / (df['age'] + 1)
@@ -67,24 +192,34 @@ class CarValuationModel:
         """Safely encode value, return 0 if unseen"""
         try:
             return encoder.transform([value])[0]
-        except:
+        except (ValueError, KeyError):
             return 0  # Default encoding for unseen categories
     
-    def train(self, training_data: pd.DataFrame):
+    def train(self, training_data: 'pd.DataFrame'):
         """Train the model"""
-        df = self.prepare_features(training_data, fit=True)
-        
-        # Select features
-        features = [
-            'year', 'mileage', 'age', 'mileage_per_year',
-            'make_encoded', 'model_encoded', 'trim_encoded', 'province_encoded'
-        ]
-        
-        X = df[features]
-        y = df['price']
+        if self.model is None:
+            self.model = self._new_estimator()
+        if self.native_categories:
+            # Codes straight from the featurizer used for serving, no LabelEncoders
+            self.feature_encoder = FeatureEncoder.fit(training_data, self.features)
+            check_categories(self.feature_encoder.vocab, self.params.get('max_bins', MAX_CATEGORIES))
+            X = self.feature_encoder.transform(training_data.to_dict('records'))
+            y = training_data['price'].to_numpy(dtype=np.float64)
+        else:
+            df = self.prepare_features(training_data, fit=True)
+            X = df[self.features]
+            y = df['price']
         
         # Train model
+        start = time.perf_counter()
         self.model.fit(X, y)
+        self.metadata = {
+            'training_seconds': time.perf_counter() - start,
+            'training_rows': len(X),
+            'trained_at': time.time(),
+        }
+        self.comparables = ComparablesIndex.build(training_data)
+        self._prepare_inference()
         self.is_trained = True
         
         # Calculate training accuracy
@@ -93,98 +228,722 @@ class CarValuationModel:
         
         print(f"✅ Model trained successfully!")
         print(f"📊 Mean Absolute Error: ${mae:,.0f}")
-        print(f"📈 R² Score: {self.model.score(X, y):.3f}")
+        print(f"📈 R² Score: {1 - np.sum((predictions - y) ** 2) / np.sum((y - np.mean(y)) ** 2):.3f}")
+    
+    def memory_footprint(self) -> Dict[str, int]:
+        """Bytes held by the fitted sklearn trees (if loaded) and by the flattened forest"""
+        if self.flat_forest is None:
+            return {'boosting': self.model.nbytes}
+        footprint = {'flat_forest': self.flat_forest.nbytes}
+        # Only count the sklearn trees once something has loaded them
+        if self.__dict__.get('_model') is not None and self._estimator_state is None:
+            sklearn_bytes = 0
+            for estimator in self.model.estimators_:
+                state = estimator.tree_.__getstate__()
+                sklearn_bytes += state['nodes'].nbytes + state['values'].nbytes
+            footprint['sklearn'] = sklearn_bytes
+        return footprint
+    
+    def _prepare_inference(self):
+        """Build the lookup tables used on the prediction path"""
+        self._new_version()
+        if self.native_categories:
+            # The feature encoder was fitted with the model (or loaded with it)
+            self.flat_forest = None
+            return
+        self.flat_forest = FlatForest.from_sklearn(self.model)
+        self.feature_encoder = FeatureEncoder({
+            'make': self.make_encoder,
+            'model': self.model_encoder,
+            'trim': self.trim_encoder,
+            'province': self.province_encoder,
+        }, self.features)
+        if COMPACT_BUDGET is not None:
+            self.compact(COMPACT_BUDGET, COMPACT_LEAVES)
+    
+    @property
+    def comparables(self) -> Optional[ComparablesIndex]:
+        if self._comparables_source is not None:
+            self._load_comparables()
+        return self.__dict__.get('_comparables')
+    
+    @comparables.setter
+    def comparables(self, index: Optional[ComparablesIndex]):
+        self._comparables_source = None
+        self._comparables = index
+    
+    def _new_version(self):
+        self.version = next(_model_versions)
+        self.surface = None
+    
+    def _restore_estimator(self):
+        """Unpickle the estimator state `load` deferred"""
+        with _restore_lock:
+            state, self._estimator_state = self._estimator_state, None
+            if state is None:
+                return
+            for name, value in pickle.loads(state).items():
+                if self.__dict__.get('_' + name) is None:
+                    self.__dict__['_' + name] = value
+    
+    def _load_comparables(self):
+        """Read the comparables artifact `load` deferred; a bad one leaves no index"""
+        with _restore_lock:
+            source, self._comparables_source = self._comparables_source, None
+            if source is None:
+                return
+            path, fingerprint = source
+            try:
+                with open(path, 'rb') as f:
+                    artifact = pickle.load(f)
+            except FileNotFoundError:
+                return
+            except Exception as e:
+                print(f"⚠️ Could not read comparables artifact {path}: {e}")
+                return
+            if artifact.get('model_version') != MODEL_VERSION or artifact.get('fingerprint') != fingerprint:
+                print(f"⚠️ Comparables artifact {path} does not match the model")
+                return
+            if hashlib.sha256(artifact['payload']).hexdigest() != artifact.get('sha256'):
+                print(f"⚠️ Comparables artifact {path} failed its content hash check")
+                return
+            self._comparables = pickle.loads(artifact['payload'])
+    
+    def compact(self, budget: float, leaf_dtype: str = 'int16') -> Dict[str, Any]:
+        """Shrink the flattened forest within a held-out MAE budget (see models/compact.py)"""
+        from data.training_data import TRAINING_SEED, generate_training_data
+        
+        holdout = generate_training_data(COMPACT_HOLDOUT_ROWS, seed=TRAINING_SEED + 1)
+        X = self.feature_encoder.transform(holdout.to_dict('records'))
+        self.flat_forest, report = compact_forest(
+            self.flat_forest, X, holdout['price'].to_numpy(dtype=np.float64), budget, leaf_dtype
+        )
+        self.metadata['compaction'] = report
+        before, after = report['before'], report['after']
+        print(f"🗜️  Compacted forest {before['bytes'] / 1e6:.1f} MB -> {after['bytes'] / 1e6:.1f} MB "
+              f"({after['trees']} trees, depth {after['maxDepth']}, {after['leafDtype']} leaves); "
+              f"holdout MAE ${before['mae']:,.0f} -> ${after['mae']:,.0f}")
+        return report
     
     def predict(self, car_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict fair price and calculate deal score"""
+        result = self.predict_batch([car_data])[0]
+        if 'error' in result:
+            raise ValueError(result['error'])
+        return result
+    
+    def predict_batch(
+        self,
+        cars: List[Dict[str, Any]],
+        timer: Optional[StageTimer] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Value many cars with one featurization pass and one forest call
+        
+        Results are returned in input order; rows that cannot be scored get
+        an {'error': ...} entry instead of failing the whole batch.
+        """
         if not self.is_trained:
             raise ValueError("Model not trained yet!")
+        if not cars:
+            return []
+        
+        rows, mean, std = self.score(cars, timer)
+        with timed(timer, 'score'):
+            return self.build_results(cars, rows, mean, std)
+    
+    def score(self, cars: List[Dict[str, Any]], timer: Optional[StageTimer] = None):
+        """
+        Row indices of the cars that can be scored, with their fair price and spread
         
-        # Convert to DataFrame
-        df = pd.DataFrame([car_data])
-        df = self.prepare_features(df, fit=False)
+        Cars on the valuation surface (once built) are interpolated from it
+        as the `surface` stage; the rest are featurized and run through the
+        model. Both round mileage to `mileage_bucket`. Rows may come back in
+        any order.
+        """
+        surface = self.surface
+        if surface is None:
+            with timed(timer, 'featurize'):
+                X, rows = self.featurize(cars)
+            mean, std = self.estimate(X, timer)
+            return rows, mean, std
         
-        # Prepare features
-        features = [
-            'year', 'mileage', 'age', 'mileage_per_year',
-            'make_encoded', 'model_encoded', 'trim_encoded', 'province_encoded'
+        with timed(timer, 'surface'):
+            surface_mean, surface_std, hit = surface.lookup(cars, self.mileage_bucket)
+        if hit.all():
+            return np.arange(len(cars)), surface_mean, surface_std
+        hits = np.flatnonzero(hit)
+        misses = np.flatnonzero(~hit)
+        with timed(timer, 'featurize'):
+            X, rows = self.featurize([cars[i] for i in misses])
+        mean, std = self.estimate(X, timer)
+        return (
+            np.concatenate([hits, misses[rows]]),
+            np.concatenate([surface_mean[hits], mean]),
+            np.concatenate([surface_std[hits], std]),
+        )
+    
+    def score_columns(
+        self,
+        year: np.ndarray,
+        mileage: np.ndarray,
+        categories: Dict[str, np.ndarray],
+        timer: Optional[StageTimer] = None
+    ):
+        """
+        `score` for cars held as columns, with fair price and spread NaN where they cannot be scored
+        
+        Meant for large candidate sets: the prediction cache is skipped so
+        they do not evict the entries serving single valuations, but mileage
+        is bucketed the same way, so prices match `score`.
+        """
+        n = len(year)
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        misses = np.arange(n)
+        surface = self.surface
+        if surface is not None:
+            with timed(timer, 'surface'):
+                surface_mean, surface_std, hit = surface.lookup_columns(
+                    year, mileage, categories, self.mileage_bucket
+                )
+            mean[hit], std[hit] = surface_mean[hit], surface_std[hit]
+            misses = np.flatnonzero(~hit)
+        if len(misses) == 0:
+            return mean, std
+        
+        with timed(timer, 'featurize'):
+            X = self.feature_encoder.transform_columns(
+                year[misses], mileage[misses], {field: values[misses] for field, values in categories.items()},
+                mileage_bucket=self.mileage_bucket
+            )
+            valid = np.isfinite(X).all(axis=1)
+        if valid.any():
+            rows = misses[valid]
+            mean[rows], std[rows] = self._mean_std(X[valid], timer)
+        return mean, std
+    
+    def featurize(self, cars: List[Dict[str, Any]]):
+        """
+        Feature matrix for the cars that can be scored, and their row indices
+        
+        Rows with non-finite features (e.g. a model year after 2024) are left out.
+        """
+        X = self.feature_encoder.transform(cars, mileage_bucket=self.mileage_bucket)
+        valid = np.isfinite(X).all(axis=1)
+        if valid.all():
+            return X, np.arange(len(cars))
+        rows = np.flatnonzero(valid)
+        return X[rows], rows
+    
+    @property
+    def _use_cache(self) -> bool:
+        return self.cache is not None and self.cache.enabled
+    
+    @property
+    def mileage_bucket(self) -> int:
+        """Mileage rounding applied to every prediction while the cache is on (ML_CACHE_MILEAGE_BUCKET)"""
+        return self.cache.mileage_bucket if self._use_cache else 0
+    
+    def estimate(self, X: np.ndarray, timer: Optional[StageTimer] = None):
+        """
+        Fair price and spread for each row
+        
+        For the forest, the mean and std across trees, timed as the `forest`
+        (tree traversal) and `uncertainty` (mean and std over trees) stages.
+        For boosting, the point model and the interval bounds (`boosting`)
+        turned into a spread (`uncertainty`). Plus `cache` for lookups when
+        caching is on.
+        """
+        if len(X) == 0:
+            return np.empty(0), np.empty(0)
+        if self._use_cache:
+            return self._cached_mean_std(X, timer)
+        return self._mean_std(X, timer)
+    
+    def _mean_std(self, X: np.ndarray, timer: Optional[StageTimer] = None):
+        if self.flat_forest is None:
+            with timed(timer, 'boosting'):
+                point, lower, upper = self.model.predict_interval(X)
+            with timed(timer, 'uncertainty'):
+                return point, (upper - lower) / (2 * CONFIDENCE_SPREADS)
+        with timed(timer, 'forest'):
+            tree_predictions = self.flat_forest.tree_predictions(X)
+        with timed(timer, 'uncertainty'):
+            return mean_std(tree_predictions)
+    
+    def build_results(
+        self,
+        cars: List[Dict[str, Any]],
+        rows: np.ndarray,
+        mean: np.ndarray,
+        std: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """Deal scores and response dicts for the scored rows, in input order"""
+        results: List[Dict[str, Any]] = [
+            {'error': 'Input contains infinity or NaN'} for _ in range(len(cars))
         ]
+        if len(rows) == 0:
+            return results
         
-        X = df[features]
+        fair_price = mean.astype(np.int64)
         
-        # Predict
-        fair_price = int(self.model.predict(X)[0])
+        # Default the listing price to the fair price when it is not provided
+        listing_price = [cars[i].get('listing_price') for i in rows]
+        listing_price = [
+            int(fair) if price is None else price
+            for price, fair in zip(listing_price, fair_price)
+        ]
+        scores = score_deals(fair_price, np.asarray(listing_price, dtype=np.float64), std)
         
-        # Calculate confidence interval (using tree predictions)
-        tree_predictions = [tree.predict(X)[0] for tree in self.model.estimators_]
-        std_dev = np.std(tree_predictions)
-        confidence = int(std_dev * 1.5)  # ~90% confidence
+        for j, i in enumerate(rows):
+            fair = int(fair_price[j])
+            listing = listing_price[j]
+            results[i] = {
+                'fairPrice': fair,
+                'listingPrice': listing,
+                'dealScore': int(scores['deal_score'][j]),
+                'pricePosition': str(scores['position'][j]),
+                'confidence': f"±${int(scores['confidence'][j]):,}",
+                'priceDifference': int(fair - listing),
+                'percentDifference': round(float(scores['price_diff_percent'][j]), 1),
+                'advice': str(scores['advice'][j]),
+                'modelConfidence': str(scores['model_confidence'][j])
+            }
         
-        # Calculate deal score if listing price provided
-        listing_price = car_data.get('listing_price', fair_price)
+        return results
+    
+    def _cached_mean_std(self, X: np.ndarray, timer: Optional[StageTimer] = None):
+        """Forest mean and std, only running the forest for uncached rows"""
+        with timed(timer, 'cache'):
+            keys = [row.tobytes() for row in X]
+            cached = self.cache.get_many(keys, self.version)
         
-        # Deal score: 0-100 scale
-        # Perfect score (100) = 15% below fair price
-        # Bad score (0) = 20% above fair price
-        price_diff_percent = ((fair_price - listing_price) / fair_price) * 100
+        mean = np.empty(len(keys), dtype=np.float64)
+        std = np.empty(len(keys), dtype=np.float64)
         
-        if price_diff_percent >= 15:
-            deal_score = 100
-        elif price_diff_percent <= -20:
-            deal_score = 0
-        else:
-            # Linear scale between -20% and +15%
-            deal_score = int(((price_diff_percent + 20) / 35) * 100)
-        
-        deal_score = max(0, min(100, deal_score))
-        
-        # Determine position
-        if price_diff_percent > 10:
-            position = f"{abs(int(price_diff_percent))}% below market"
-            advice = "🎉 Excellent deal! This is well below market value."
-        elif price_diff_percent > 5:
-            position = f"{abs(int(price_diff_percent))}% below market"
-            advice = "✅ Good deal! Price is below fair market value."
-        elif price_diff_percent > -5:
-            position = "at market value"
-            advice = "📊 Fair price. Aligned with market average."
-        elif price_diff_percent > -10:
-            position = f"{abs(int(price_diff_percent))}% above market"
-            advice = "⚠️ Slightly overpriced. Consider negotiating."
-        else:
-            position = f"{abs(int(price_diff_percent))}% above market"
-            advice = "❌ Overpriced. Not recommended at this price."
-        
-        return {
-            'fairPrice': fair_price,
-            'listingPrice': listing_price,
-            'dealScore': deal_score,
-            'pricePosition': position,
-            'confidence': f"±${confidence:,}",
-            'priceDifference': int(fair_price - listing_price),
-            'percentDifference': round(price_diff_percent, 1),
-            'advice': advice,
-            'modelConfidence': 'high' if std_dev < 2000 else 'medium' if std_dev < 4000 else 'low'
+        # Identical rows within a batch only go through the forest once
+        missing: Dict[bytes, List[int]] = {}
+        for i, (key, hit) in enumerate(zip(keys, cached)):
+            if hit is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                mean[i], std[i] = hit
+        
+        if missing:
+            first_rows = [indices[0] for indices in missing.values()]
+            miss_mean, miss_std = self._mean_std(X[first_rows], timer)
+            for indices, row_mean, row_std in zip(missing.values(), miss_mean, miss_std):
+                mean[indices] = row_mean
+                std[indices] = row_std
+            self.cache.put_many(
+                list(zip(missing.keys(), miss_mean.tolist(), miss_std.tolist())), self.version
+            )
+        
+        return mean, std
+    
+    def fingerprint(self, data_fingerprint: str) -> str:
+        """Hash of the model config and training data an artifact must match"""
+        spec = {
+            'model_version': MODEL_VERSION,
+            'estimator': self.estimator,
+            # Read from package metadata so mapped workers never import sklearn
+            'sklearn': package_version('scikit-learn'),
+            'params': {
+                k: repr(v) for k, v in sorted(self.params.items())
+                if k not in RUNTIME_PARAMS
+            },
+            'features': self.features,
+            'data': data_fingerprint,
+            # The mapped export stores the flattened (and maybe compacted) forest
+            'forest_layout': LAYOUT_VERSION,
+            'compact': [COMPACT_BUDGET, COMPACT_LEAVES] if COMPACT_BUDGET is not None else None,
+        }
+        payload = json.dumps(spec, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+    
+    def save(self, path: str, fingerprint: str):
+        """
+        Save the model as one versioned artifact in two parts
+        
+        The inference part (flattened forest, category lookup tables,
+        metadata) is all a loaded forest serves from; the estimator part
+        (sklearn estimator, LabelEncoders) is only unpickled when something
+        asks for it. Each part has its own hash. The comparables index goes
+        to its own artifact next to it (see `get_comparables_path`).
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained yet!")
+        
+        inference = pickle.dumps({
+            'estimator': self.estimator,
+            'features': self.features,
+            'vocab': self.feature_encoder.vocab,
+            # Already compacted, so loading skips the export and compaction
+            'flat_forest': self.flat_forest,
+            'metadata': self.metadata,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        estimator = pickle.dumps({
+            'model': self.model,
+            'make_encoder': self.make_encoder,
+            'model_encoder': self.model_encoder,
+            'trim_encoder': self.trim_encoder,
+            'province_encoder': self.province_encoder,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        comparables_path = get_comparables_path(path)
+        if self.comparables is not None:
+            index = pickle.dumps(self.comparables, protocol=pickle.HIGHEST_PROTOCOL)
+            _write_artifact(comparables_path, {
+                'model_version': MODEL_VERSION,
+                'fingerprint': fingerprint,
+                'sha256': hashlib.sha256(index).hexdigest(),
+                'payload': index,
+            })
+        elif os.path.exists(comparables_path):
+            os.remove(comparables_path)
+        
+        artifact = {
+            'model_version': MODEL_VERSION,
+            'fingerprint': fingerprint,
+            'sha256': hashlib.sha256(inference).hexdigest(),
+            'estimator_sha256': hashlib.sha256(estimator).hexdigest(),
+            'created_at': time.time(),
+            'payload': inference,
+            'estimator_payload': estimator,
         }
+        _write_artifact(path, artifact)
+    
+    def load(self, path: str, fingerprint: Optional[str] = None) -> bool:
+        """
+        Load an artifact; returns False if it is missing, stale or corrupt
+        
+        Both parts are hash-checked, but a forest only unpickles the
+        inference part: the sklearn estimator and encoders are restored on
+        first use, and the comparables artifact is read on the first lookup.
+        Boosting serves from its estimator, so it is restored right away.
+        """
+        if not os.path.exists(path):
+            return False
+        
+        try:
+            with open(path, 'rb') as f:
+                artifact = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read model artifact {path}: {e}")
+            return False
+        
+        if artifact.get('model_version') != MODEL_VERSION:
+            return False
+        if fingerprint is not None and artifact.get('fingerprint') != fingerprint:
+            return False
+        
+        payload = artifact['payload']
+        estimator = artifact['estimator_payload']
+        if (hashlib.sha256(payload).hexdigest() != artifact.get('sha256')
+                or hashlib.sha256(estimator).hexdigest() != artifact.get('estimator_sha256')):
+            print(f"⚠️ Model artifact {path} failed its content hash check")
+            return False
+        
+        state = pickle.loads(payload)
+        self.estimator = state['estimator']
+        self.features = state['features']
+        self.feature_encoder = FeatureEncoder.from_vocab(state['vocab'], self.features)
+        self.flat_forest = state['flat_forest']
+        self.metadata = state['metadata']
+        self.model = None
+        self.make_encoder = self.model_encoder = self.trim_encoder = self.province_encoder = None
+        self.comparables = None
+        self._comparables_source = (get_comparables_path(path), artifact['fingerprint'])
+        self._estimator_state = estimator
+        if self.flat_forest is None:
+            self._restore_estimator()
+        self._new_version()
+        self.mapped = False
+        self.is_trained = True
+        return True
+    
+    def export_mapped(self, directory: str, fingerprint: str):
+        """Write the inference tables as a directory of mappable arrays"""
+        if not self.is_trained:
+            raise ValueError("Model not trained yet!")
+        if self.flat_forest is None:
+            raise ValueError(f"Only the forest can be mapped, not {self.estimator!r}")
+        
+        # Build in a temp dir and rename so other workers never map a partial export
+        tmp_dir = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.flat_forest.save(tmp_dir)
+        with open(os.path.join(tmp_dir, 'model.json'), 'w') as f:
+            json.dump({
+                'model_version': MODEL_VERSION,
+                'fingerprint': fingerprint,
+                'features': self.features,
+                'vocab': self.feature_encoder.vocab,
+                'metadata': self.metadata,
+            }, f)
+        try:
+            os.rename(tmp_dir, directory)
+        except OSError:
+            # Another worker finished the same export first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def load_mapped(self, directory: str, fingerprint: Optional[str] = None) -> bool:
+        """
+        Serve from a mapped export; returns False if it is missing or stale
+        
+        Only the flattened forest and the category lookup tables are loaded,
+        so sklearn and pandas are never imported and the forest arrays are
+        shared with every other process mapping the same files.
+        """
+        try:
+            with open(os.path.join(directory, 'model.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get('model_version') != MODEL_VERSION:
+            return False
+        if fingerprint is not None and meta.get('fingerprint') != fingerprint:
+            return False
+        
+        self.flat_forest = FlatForest.load(directory, mmap=True)
+        self.features = meta['features']
+        self.feature_encoder = FeatureEncoder.from_vocab(meta['vocab'], self.features)
+        self.metadata = meta.get('metadata', {})
+        self._estimator_state = None
+        self.model = None
+        self.make_encoder = self.model_encoder = self.trim_encoder = self.province_encoder = None
+        self.comparables = None
+        self._new_version()
+        self.mapped = True
+        self.is_trained = True
+        return True
 
 
-# Global model instance
-valuation_model = CarValuationModel()
+ADVICE = {
+    'excellent': "🎉 Excellent deal! This is well below market value.",
+    'good': "✅ Good deal! Price is below fair market value.",
+    'fair': "📊 Fair price. Aligned with market average.",
+    'high': "⚠️ Slightly overpriced. Consider negotiating.",
+    'overpriced': "❌ Overpriced. Not recommended at this price.",
+}
 
 
-def initialize_model():
-    """Initialize and train the model"""
-    from data.training_data import get_training_data
+def score_deals(
+    fair_price: np.ndarray,
+    listing_price: np.ndarray,
+    std_dev: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Deal scores, price positions and advice for arrays of predictions"""
+    fair_price = np.asarray(fair_price, dtype=np.float64)
+    listing_price = np.asarray(listing_price, dtype=np.float64)
+    std_dev = np.asarray(std_dev, dtype=np.float64)
     
-    print("🚀 Initializing Car Valuation Model...")
-    training_data = get_training_data()
-    valuation_model.train(training_data)
+    price_diff_percent = ((fair_price - listing_price) / fair_price) * 100
+    
+    # Deal score: 0-100 scale
+    # Perfect score (100) = 15% below fair price
+    # Bad score (0) = 20% above fair price
+    # Linear scale between -20% and +15%
+    linear = np.trunc(((price_diff_percent + 20) / 35) * 100)
+    deal_score = np.where(
+        price_diff_percent >= 15, 100,
+        np.where(price_diff_percent <= -20, 0, linear)
+    )
+    deal_score = np.clip(deal_score, 0, 100).astype(np.int64)
+    
+    # Determine position
+    bands = [
+        price_diff_percent > 10,
+        price_diff_percent > 5,
+        price_diff_percent > -5,
+        price_diff_percent > -10,
+    ]
+    advice = np.select(bands, [
+        ADVICE['excellent'], ADVICE['good'], ADVICE['fair'], ADVICE['high']
+    ], default=ADVICE['overpriced'])
+    
+    percent = np.abs(np.trunc(np.nan_to_num(price_diff_percent))).astype(np.int64).astype(str)
+    position = np.where(
+        price_diff_percent > 5,
+        np.char.add(percent, '% below market'),
+        np.where(
+            price_diff_percent > -5,
+            'at market value',
+            np.char.add(percent, '% above market')
+        )
+    )
+    
+    model_confidence = np.where(
+        std_dev < 2000, 'high', np.where(std_dev < 4000, 'medium', 'low')
+    )
+    
+    return {
+        'price_diff_percent': price_diff_percent,
+        'deal_score': deal_score,
+        'position': position,
+        'advice': advice,
+        'confidence': (std_dev * 1.5).astype(np.int64),  # ~90% confidence
+        'model_confidence': model_confidence,
+    }
+
+
+# Global model instance; replaced as a whole by swap_model, so callers that
+# read it once per call keep using the same model until they finish
+prediction_cache = PredictionCache.from_env()
+valuation_model = CarValuationModel(cache=prediction_cache)
+_swap_lock = threading.Lock()
+
+
+def current_model() -> CarValuationModel:
+    """The model serving new requests"""
+    return valuation_model
+
+
+def swap_model(model: CarValuationModel) -> CarValuationModel:
+    """Atomically promote a trained model; returns the one it replaced"""
+    global valuation_model
+    if not model.is_trained:
+        raise ValueError("Model not trained yet!")
+    with _swap_lock:
+        if model.version < valuation_model.version:
+            # Rolling back: a fresh version so the cache serves this model again
+            model.version = next(_model_versions)
+        previous, valuation_model = valuation_model, model
+    return previous
+
+
+def _write_artifact(path: str, artifact: Dict[str, Any]):
+    # Write to a temp file first so readers never see a partial artifact
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def get_comparables_path(artifact_path: str) -> str:
+    """Where the comparables index of a model artifact is stored"""
+    return os.path.splitext(artifact_path)[0] + '.comparables.pkl'
+
+
+def get_artifact_path(fingerprint: str) -> str:
+    """Artifact location for a given model/data fingerprint"""
+    return os.path.join(ARTIFACT_DIR, f"valuation-v{MODEL_VERSION}-{fingerprint[:16]}.pkl")
+
+
+# Serializes loading so concurrent first callers do not train twice
+_init_lock = threading.Lock()
+
+
+def get_mapped_path(fingerprint: str) -> str:
+    """Directory of memory-mappable inference arrays for a fingerprint"""
+    return os.path.join(ARTIFACT_DIR, f"valuation-v{MODEL_VERSION}-{fingerprint[:16]}.flat")
+
+
+@contextmanager
+def _artifact_lock():
+    """Cross-process lock so workers starting together do not train or export twice"""
+    try:
+        import fcntl
+        os.makedirs(ARTIFACT_DIR, exist_ok=True)
+        lock_file = open(os.path.join(ARTIFACT_DIR, '.lock'), 'w')
+    except (ImportError, OSError):
+        yield
+        return
+    
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def initialize_model(force_retrain: bool = False):
+    """Load the saved model artifact, training and saving one if none matches"""
+    with _artifact_lock():
+        _initialize_model(force_retrain)
     print("✅ Model ready for predictions!")
 
 
+def _initialize_model(force_retrain: bool):
+    from data.listings import get_training_set_fingerprint
+    
+    print("🚀 Initializing Car Valuation Model...")
+    fingerprint = valuation_model.fingerprint(get_training_set_fingerprint())
+    mapped_path = get_mapped_path(fingerprint)
+    # Only the flattened forest has a mappable export
+    shared = SHARED_MODEL and valuation_model.estimator == 'forest'
+    if SHARED_MODEL and not shared:
+        print(f"⚠️ ML_SHARED_MODEL needs the forest backend; serving a private {valuation_model.estimator} model")
+    
+    start = time.perf_counter()
+    if shared and not force_retrain and valuation_model.load_mapped(mapped_path, fingerprint):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"🗺️ Mapped shared model {os.path.basename(mapped_path)} in {elapsed_ms:.0f}ms")
+        return
+    
+    _load_or_train(fingerprint, force_retrain)
+    
+    if shared:
+        try:
+            shutil.rmtree(mapped_path, ignore_errors=True)
+            valuation_model.export_mapped(mapped_path, fingerprint)
+            # Serve from the mapping too, dropping this process's private copy
+            valuation_model.load_mapped(mapped_path, fingerprint)
+            print(f"🗺️ Exported shared model {os.path.basename(mapped_path)}")
+        except OSError as e:
+            print(f"⚠️ Could not export shared model, serving a private copy: {e}")
+
+
+def _load_or_train(fingerprint: str, force_retrain: bool):
+    from data.listings import get_training_set
+    
+    path = get_artifact_path(fingerprint)
+    start = time.perf_counter()
+    if not force_retrain and valuation_model.load(path, fingerprint):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"📦 Loaded model artifact {os.path.basename(path)} in {elapsed_ms:.0f}ms")
+    else:
+        training_data = get_training_set()
+        valuation_model.train(training_data)
+        try:
+            valuation_model.save(path, fingerprint)
+            print(f"💾 Saved model artifact {os.path.basename(path)}")
+        except OSError as e:
+            print(f"⚠️ Could not save model artifact: {e}")
+
+
+def ensure_model():
+    """Load or train the model once, for callers outside the service (scripts, tests)"""
+    if valuation_model.is_trained:
+        return
+    with _init_lock:
+        if not valuation_model.is_trained:
+            initialize_model()
+
+
 def get_valuation(car_data: Dict[str, Any]) -> Dict[str, Any]:
     """Get car valuation"""
-    if not valuation_model.is_trained:
-        initialize_model()
+    ensure_model()
     
     return valuation_model.predict(car_data)
+
+
+def get_valuations(cars: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get valuations for a batch of cars"""
+    ensure_model()
+    
+    return valuation_model.predict_batch(cars)
+
+
+def get_comparables(car_data: Dict[str, Any], k: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """The k nearest training listings, or None if the model has no comparables index"""
+    ensure_model()
+    
+    index = current_model().comparables
+    if index is None:
+        return None
+    with timed(current_timer(), 'comparables'):
+        return index.query(car_data, k)
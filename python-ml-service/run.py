@@ -1,7 +1,13 @@
 """
 Development runner for 6ixKar ML Service
+
+    python run.py                # dev server with --reload
+    python run.py load --help    # local load test
+    python run.py sweep --help   # forest hyperparameter sweep
+    python run.py score --help   # offline bulk scoring of a listings file
 """
 
+import argparse
 import subprocess
 import sys
 import os
@@ -24,16 +30,16 @@ def check_dependencies():
         return False
 
 
-def main():
+def serve():
     print("\n" + "="*60)
     print("🍁 6ixKar ML Service - Development Server")
     print("="*60 + "\n")
-    
+
     if not check_dependencies():
         sys.exit(1)
-    
+
     print("🚀 Starting FastAPI server...\n")
-    
+
     # Run uvicorn
     subprocess.run([
         sys.executable,
@@ -48,5 +54,101 @@ def main():
     ])
 
 
+def load(args):
+    from benchmarks.loadgen import run_load
+
+    run_load(
+        endpoints=args.endpoints.split(','),
+        configs=args.config,
+        duration=args.duration,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        url=args.url,
+        seed=args.seed,
+        output=args.output,
+    )
+
+
+def sweep(args):
+    from models.sweep import run_sweep
+
+    run_sweep(
+        trees=[int(n) for n in args.trees.split(',')],
+        depths=[None if d.lower() == 'none' else int(d) for d in args.depths.split(',')],
+        folds=args.folds,
+        jobs=args.jobs,
+        seed=args.seed,
+        tolerance=args.tolerance,
+        refresh=args.refresh,
+        output=args.output,
+        save=not args.no_save,
+    )
+
+
+def score(args):
+    from models.bulk import run_bulk
+
+    try:
+        run_bulk(
+            input_path=args.input,
+            output=args.output,
+            chunk_rows=args.chunk_rows,
+            jobs=args.jobs,
+            restart=args.restart,
+        )
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except (ImportError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="6ixKar ML Service runner")
+    commands = parser.add_subparsers(dest="command")
+
+    load_parser = commands.add_parser("load", help="start the app locally and drive it with load")
+    load_parser.add_argument("--endpoints", default="valuation,depreciation,full-analysis",
+                             help="comma-separated: valuation, depreciation, full-analysis")
+    load_parser.add_argument("--duration", type=float, default=10.0, help="seconds per config")
+    load_parser.add_argument("--rps", type=float, help="fixed request rate (open loop)")
+    load_parser.add_argument("--concurrency", type=int, default=16,
+                             help="concurrent clients when --rps is not set")
+    load_parser.add_argument("--config", action="append", default=[],
+                             help='server config, e.g. "workers=2 ML_EXECUTOR=process"; repeat to compare')
+    load_parser.add_argument("--url", help="load an already running server instead of starting one")
+    load_parser.add_argument("--seed", type=int, default=0, help="payload random seed")
+    load_parser.add_argument("--output", help="write the report as JSON")
+
+    sweep_parser = commands.add_parser("sweep", help="cross-validated forest size/depth sweep")
+    sweep_parser.add_argument("--trees", default="25,50,100,200", help="comma-separated n_estimators")
+    sweep_parser.add_argument("--depths", default="8,12,15,20,none", help="comma-separated max_depth ('none' = unlimited)")
+    sweep_parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    sweep_parser.add_argument("--jobs", type=int, help="training processes (default: all cores)")
+    sweep_parser.add_argument("--seed", type=int, default=0, help="fold shuffle seed")
+    sweep_parser.add_argument("--tolerance", type=float, default=0.01,
+                              help="pick the fastest Pareto config within this fraction of the best MAE")
+    sweep_parser.add_argument("--refresh", action="store_true", help="rebuild the cached feature matrix")
+    sweep_parser.add_argument("--no-save", action="store_true", help="report only, do not write the artifact")
+    sweep_parser.add_argument("--output", help="report path (default artifacts/sweep/sweep-<time>.json)")
+
+    score_parser = commands.add_parser("score", help="value a CSV/Parquet listings file offline")
+    score_parser.add_argument("input", help="listings file (.csv or .parquet)")
+    score_parser.add_argument("--output", required=True, help="scored file (.csv or .parquet)")
+    score_parser.add_argument("--chunk-rows", type=int, default=50_000, help="rows per chunk")
+    score_parser.add_argument("--jobs", type=int, help="scoring processes (default: all cores)")
+    score_parser.add_argument("--restart", action="store_true", help="discard finished chunks from an earlier run")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        load(args)
+    elif args.command == "sweep":
+        sweep(args)
+    elif args.command == "score":
+        score(args)
+    else:
+        serve()
+
+
 if __name__ == "__main__":
     main()
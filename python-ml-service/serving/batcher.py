@@ -0,0 +1,208 @@
+"""
+Adaptive Micro-Batching
+Groups concurrent single-item requests into one model call
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from serving.executor import ExecutorSaturated
+
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent coroutines and runs them as one batch
+
+    After the first item arrives the batcher waits up to `max_wait_ms` for
+    more (or until `max_batch` items), runs `batch_fn` on the whole list and
+    hands each caller its own result. The wait window follows the observed
+    arrival rate: when fewer than one more item is expected inside the
+    window, batches are dispatched immediately so a lone request is not
+    delayed. Items that queue up while every slot is busy are always batched.
+
+    At most `max_queued` items wait for a slot (0 = no limit); past that
+    `submit` raises ExecutorSaturated, like a full executor queue.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        run: Callable[..., Awaitable[Any]],
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+        max_concurrent: int = 1,
+        max_queued: int = 0,
+    ):
+        self.batch_fn = batch_fn
+        self.run = run
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Exponentially weighted mean gap between arrivals (seconds)
+        self._interval: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+        self.window = 0.0
+
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self._recent_sizes = deque(maxlen=1000)
+        self._latencies = deque(maxlen=5000)
+
+    @classmethod
+    def from_env(cls, batch_fn, run, max_concurrent: int = 1, max_queue: int = 0) -> 'MicroBatcher':
+        """
+        Build from ML_BATCH_MAX and ML_BATCH_WINDOW_MS
+
+        `max_queue` is the executor's job queue limit; the batcher holds up
+        to that many full batches of waiting items.
+        """
+        max_batch = int(os.environ.get('ML_BATCH_MAX', 64))
+        return cls(
+            batch_fn,
+            run,
+            max_batch=max_batch,
+            max_wait_ms=float(os.environ.get('ML_BATCH_WINDOW_MS', 2.0)),
+            max_concurrent=max_concurrent,
+            max_queued=max_queue * max_batch,
+        )
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result, rejecting when the queue is full"""
+        self.start()
+        now = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, now))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ExecutorSaturated(
+                f"Micro-batch queue full ({self._queue.qsize()}/{self.max_queued} waiting)"
+            ) from None
+        self._observe_arrival(now)
+        return await future
+
+    def _observe_arrival(self, now: float):
+        if self._last_arrival is not None:
+            interval = now - self._last_arrival
+            if self._interval is None:
+                self._interval = interval
+            else:
+                self._interval = 0.9 * self._interval + 0.1 * interval
+        self._last_arrival = now
+
+    @property
+    def arrival_rate(self) -> float:
+        """Recent arrivals per second, decaying while the batcher is idle"""
+        if self._interval is None:
+            return 0.0
+        idle = time.perf_counter() - self._last_arrival
+        return 1 / max(self._interval, idle, 1e-6)
+
+    def _current_window(self, batch_size: int) -> float:
+        """How long to wait for more items given the recent arrival rate"""
+        rate = self.arrival_rate
+        if rate * self.max_wait < 1:
+            return 0.0
+        return min(self.max_wait, (self.max_batch - batch_size) / rate)
+
+    async def _collect(self):
+        while True:
+            first = await self._queue.get()
+            # While every slot is busy, arrivals keep accumulating in the queue
+            await self._slots.acquire()
+            batch = [first]
+
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self.window = self._current_window(len(batch))
+            if self.window > 0 and len(batch) < self.max_batch:
+                deadline = time.perf_counter() + self.window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+            asyncio.get_running_loop().create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[tuple]):
+        try:
+            results = await self.run(self.batch_fn, [item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        done = time.perf_counter()
+        for (_, future, enqueued), result in zip(batch, results):
+            self._latencies.append(done - enqueued)
+            if not future.done():
+                future.set_result(result)
+
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        self._recent_sizes.append(size)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        recent = list(self._recent_sizes)
+        return {
+            'maxBatch': self.max_batch,
+            'maxWaitMs': self.max_wait * 1000,
+            'windowMs': round(self.window * 1000, 3),
+            'arrivalRate': round(self.arrival_rate, 1),
+            'maxQueued': self.max_queued,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'items': self.items,
+            'rejected': self.rejected,
+            'meanBatchSize': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'recentMeanBatchSize': round(sum(recent) / len(recent), 2) if recent else 0.0,
+            'batchSizes': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            'latencyMs': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+            },
+        }
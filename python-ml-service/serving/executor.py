@@ -0,0 +1,164 @@
+"""
+Bounded Inference Executor
+Runs CPU-bound model calls off the asyncio event loop
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from models.timing import StageTimer, recording
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the inference queue is full"""
+
+
+def default_workers() -> int:
+    """
+    Pool size for inference
+
+    Each forest call runs single-threaded on the flattened forest, so
+    parallelism comes from the pool alone. One worker per core, capped at 4
+    to leave room for the event loop.
+    """
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _init_process_worker():
+    """Load the model once in each worker process"""
+    from models.valuation import initialize_model
+    initialize_model()
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """
+    Run fn, reporting when it actually started (wall clock, works across
+    processes) and the seconds it spent in each timed stage
+    """
+    started = time.time()
+    with recording(StageTimer()) as timer:
+        result = fn(*args, **kwargs)
+    return started, timer.stages, result
+
+
+class InferenceExecutor:
+    """Thread or process pool with a bounded number of waiting jobs"""
+
+    def __init__(
+        self,
+        workers: int = None,
+        max_queue: int = 64,
+        kind: str = 'thread',
+        on_stages: Optional[Callable[[Dict[str, float]], None]] = None,
+    ):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.workers = workers or default_workers()
+        self.max_queue = max_queue
+        # Called on the event loop with the stage timings of each finished job
+        self.on_stages = on_stages
+        self._pool: Executor = None
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._waits = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_env(cls) -> 'InferenceExecutor':
+        """Build from ML_EXECUTOR, ML_INFERENCE_WORKERS and ML_INFERENCE_QUEUE"""
+        workers = os.environ.get('ML_INFERENCE_WORKERS')
+        return cls(
+            workers=int(workers) if workers else None,
+            max_queue=int(os.environ.get('ML_INFERENCE_QUEUE', 64)),
+            kind=os.environ.get('ML_EXECUTOR', 'thread'),
+        )
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.kind == 'process':
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_process_worker
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='inference'
+            )
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool, rejecting when the queue is full"""
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(
+                f"Inference queue full ({self.queue_depth}/{self.max_queue} waiting)"
+            )
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        self.in_flight += 1
+        self.submitted += 1
+        try:
+            started, stages, result = await loop.run_in_executor(
+                self._pool, _timed_call, fn, args, kwargs
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        wait = max(0.0, started - submitted)
+        self._waits.append(wait)
+        self._max_wait = max(self._max_wait, wait)
+        if self.on_stages is not None and stages:
+            self.on_stages(stages)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3)
+
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'maxQueue': self.max_queue,
+            'queueDepth': self.queue_depth,
+            'inFlight': self.in_flight,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'waitMs': {
+                'mean': round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(self._max_wait * 1000, 3),
+            },
+        }
@@ -0,0 +1,44 @@
+"""
+Process Memory
+Resident and proportional memory of a worker, read from /proc on Linux
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+
+# /proc fields (kB) reported for each process
+STATUS_FIELDS = {
+    'VmRSS': 'rssBytes',
+    'RssAnon': 'rssAnonBytes',
+    'RssFile': 'rssFileBytes',
+    'RssShmem': 'rssShmemBytes',
+}
+
+
+def _read_kb_fields(path: str, fields: Dict[str, str]) -> Dict[str, int]:
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in fields:
+                    values[fields[key]] = int(rest.split()[0]) * 1024
+    except OSError:
+        pass
+    return values
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    RSS split into private (anon) and file-backed pages, plus PSS
+
+    Pages of a memory-mapped model count fully in every worker's RSS but are
+    stored once; PSS divides shared pages between the processes mapping
+    them, so summing PSS over workers gives the real total.
+    """
+    pid = pid or os.getpid()
+    memory: Dict[str, Any] = {'pid': pid}
+    memory.update(_read_kb_fields(f'/proc/{pid}/status', STATUS_FIELDS))
+    memory.update(_read_kb_fields(f'/proc/{pid}/smaps_rollup', {'Pss': 'pssBytes'}))
+    return memory
@@ -0,0 +1,265 @@
+"""
+Prometheus Metrics
+Request counters and latency histograms rendered in the Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Histogram upper bounds in seconds, from 50µs stages to multi-second batches
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families at render time
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(dict(zip(self.labelnames, labels)))} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """
+    Bucketed distribution per label combination
+
+    Observing is one bisect and three increments under a lock, cheap
+    enough to run on every request and every pipeline stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+
+        for labels, counts, total, count in sorted(snapshot):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**base, 'le': _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {count}")
+        return lines
+
+
+class ServiceMetrics:
+    """
+    Everything exposed on /metrics
+
+    Per-route request counts and latencies, per-stage pipeline latencies,
+    plus gauges pulled from registered collectors when the page is rendered.
+    """
+
+    def __init__(self, prefix: str = 'ml'):
+        self.prefix = prefix
+        self.requests = Counter(
+            f'{prefix}_http_requests_total', 'HTTP requests by route, method and status',
+            ('route', 'method', 'status'),
+        )
+        self.request_latency = Histogram(
+            f'{prefix}_http_request_duration_seconds', 'HTTP request latency by route',
+            ('route', 'method'),
+        )
+        self.stage_latency = Histogram(
+            f'{prefix}_stage_duration_seconds', 'Time spent in each internal pipeline stage',
+            ('stage',),
+        )
+        self.in_flight = 0
+        self.started_at = time.time()
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.requests.inc(route, method, str(status))
+        self.request_latency.observe(seconds, route, method)
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.stage_latency.observe(seconds, stage)
+
+    def observe_stages(self, stages: Dict[str, float]):
+        for stage, seconds in stages.items():
+            self.stage_latency.observe(seconds, stage)
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = self.requests.render() + self.request_latency.render() + self.stage_latency.render()
+        families: List[Family] = [
+            (f'{self.prefix}_http_requests_in_flight', 'gauge', 'Requests being handled', [({}, self.in_flight)]),
+            (f'{self.prefix}_process_start_time_seconds', 'gauge', 'Service start time (unix seconds)',
+             [({}, self.started_at)]),
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count and latency per matched route template"""
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            # The router stores the matched route in the scope; using its
+            # template keeps label cardinality bounded
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            self.metrics.observe_request(path, scope['method'], status, time.perf_counter() - start)
+
+
+def model_collector(get_model: Callable[[], Any]) -> Callable[[], List[Family]]:
+    """Gauges describing the valuation model currently served (looked up on every scrape)"""
+    def collect() -> List[Family]:
+        model = get_model()
+        if not model.is_trained:
+            return [('ml_model_loaded', 'gauge', 'Whether a trained model is loaded', [({}, 0)])]
+
+        metadata = model.metadata
+        families: List[Family] = [
+            ('ml_model_loaded', 'gauge', 'Whether a trained model is loaded', [({}, 1)]),
+            ('ml_model_info', 'gauge', 'Estimator backend serving predictions',
+             [({'estimator': model.estimator}, 1)]),
+            ('ml_model_version', 'gauge', 'In-process model version (changes on retrain or reload)',
+             [({}, model.version)]),
+            ('ml_model_memory_bytes', 'gauge', 'Bytes held by the model, by representation',
+             [({'representation': k}, v) for k, v in model.memory_footprint().items()]),
+        ]
+        if model.flat_forest is not None:
+            families += [
+                ('ml_model_trees', 'gauge', 'Trees in the forest', [({}, model.flat_forest.n_trees)]),
+                ('ml_model_nodes', 'gauge', 'Nodes across all trees', [({}, model.flat_forest.node_count)]),
+                ('ml_model_max_depth', 'gauge', 'Deepest tree', [({}, model.flat_forest.max_depth)]),
+            ]
+        if 'training_seconds' in metadata:
+            families.append(('ml_model_training_seconds', 'gauge', 'Wall time spent fitting the forest',
+                             [({}, round(metadata['training_seconds'], 4))]))
+        if 'training_rows' in metadata:
+            families.append(('ml_model_training_rows', 'gauge', 'Rows the model was trained on',
+                             [({}, metadata['training_rows'])]))
+        if 'trained_at' in metadata:
+            families.append(('ml_model_trained_timestamp_seconds', 'gauge', 'When the model was trained',
+                             [({}, round(metadata['trained_at'], 3))]))
+        return families
+
+    return collect
+
+
+def stats_collector(
+    name: str,
+    get_stats: Callable[[], Optional[Dict[str, Any]]],
+    fields: Dict[str, Tuple[str, str, str]],
+):
+    """Expose numeric fields of a component's stats() dict; fields map key -> (metric, type, help)"""
+    def collect() -> List[Family]:
+        stats = get_stats()
+        if not stats:
+            return []
+        return [
+            (f'ml_{name}_{metric}', kind, help, [({}, stats[key])])
+            for key, (metric, kind, help) in fields.items()
+            if isinstance(stats.get(key), (int, float)) and not isinstance(stats.get(key), bool)
+        ]
+
+    return collect
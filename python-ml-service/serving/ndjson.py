@@ -0,0 +1,134 @@
+"""
+NDJSON Streaming
+Reads newline-delimited JSON records from a request body in chunks and streams results back
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+import anyio
+from starlette.responses import StreamingResponse
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def ndjson_lines(body: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    (line number, line) for every non-blank line of a byte stream
+
+    Only the unfinished last line is buffered, so memory is bounded by
+    `max_line_bytes` plus one network read.
+    """
+    buffer = b''
+    line_no = 0
+    async for data in body:
+        buffer += data
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"line {line_no + 1} is longer than {max_line_bytes} bytes")
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def parse_record(line: bytes) -> Tuple[Any, str]:
+    """The JSON object on a line, or None and an error message"""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return None, "Expected a JSON object"
+    return record, ''
+
+
+async def stream_chunks(
+    body: AsyncIterator[bytes],
+    process: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+    chunk_size: int,
+    max_line_bytes: int,
+) -> AsyncIterator[bytes]:
+    """
+    Run `process` on fixed-size chunks of records and yield NDJSON result lines
+
+    One chunk is processed while the next is being read, so at most two
+    chunks are held at a time however long the input is, and results start
+    flowing before the upload finishes. Every result carries the input
+    `line` it belongs to; lines that are not JSON objects get an `error`.
+    A line over `max_line_bytes` ends the stream with a final `error` line.
+    """
+
+    async def finish(task, lines, errors) -> bytes:
+        results = await task
+        out = []
+        valid = iter(results)
+        for line_no in lines:
+            result = errors[line_no] if line_no in errors else next(valid)
+            out.append(json.dumps({'line': line_no, **result}, ensure_ascii=False, separators=(',', ':')))
+        return ('\n'.join(out) + '\n').encode()
+
+    pending = None
+    lines: List[int] = []
+    records: List[Dict[str, Any]] = []
+    errors: Dict[int, Dict[str, str]] = {}
+    failure = None
+    try:
+        try:
+            async for line_no, line in ndjson_lines(body, max_line_bytes):
+                record, error = parse_record(line)
+                lines.append(line_no)
+                if error:
+                    errors[line_no] = {'error': error}
+                else:
+                    records.append(record)
+                if len(lines) >= chunk_size:
+                    task = asyncio.ensure_future(process(records))
+                    if pending is not None:
+                        yield await finish(*pending)
+                    pending = (task, lines, errors)
+                    lines, records, errors = [], [], {}
+        except LineTooLong as e:
+            # Lines before the overlong one are still valued
+            failure = e
+
+        if lines:
+            task = asyncio.ensure_future(process(records))
+            if pending is not None:
+                yield await finish(*pending)
+            pending = (task, lines, errors)
+        if pending is not None:
+            yield await finish(*pending)
+            pending = None
+        if failure is not None:
+            yield (json.dumps({'error': str(failure)}, separators=(',', ':')) + '\n').encode()
+    finally:
+        if pending is not None:
+            pending[0].cancel()
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    StreamingResponse for generators that read the request body themselves
+
+    Starlette listens for a client disconnect while streaming by calling
+    `receive()`, which would swallow the body messages the generator is
+    waiting for, so that listener is disabled here. A client that goes away
+    mid-upload still ends the stream with ClientDisconnect.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await anyio.sleep_forever()
+
+
+def stream_chunk_size() -> int:
+    """ML_STREAM_CHUNK records per inference call"""
+    return int(os.environ.get('ML_STREAM_CHUNK', 1000))
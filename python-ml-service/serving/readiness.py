@@ -0,0 +1,140 @@
+"""
+Startup Phases and Readiness
+Loads and warms up the model in the background and reports when traffic can be routed
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from data.training_data import MAKES, MODELS, PROVINCES, TRIMS
+
+
+# Phases in startup order; `failed` can replace any of them
+PHASES = ('starting', 'loading', 'warming', 'ready')
+
+
+def warmup_cars(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """A fixed spread of realistic cars used to prime the prediction path"""
+    rng = random.Random(seed)
+    cars = []
+    for _ in range(n):
+        make = rng.choice(list(MAKES))
+        year = rng.randint(2014, 2024)
+        cars.append({
+            'make': make,
+            'model': rng.choice(MODELS[make]),
+            'year': year,
+            'mileage': rng.randint(0, 20000) * (2025 - year),
+            'trim': rng.choice(TRIMS),
+            'province': rng.choice(PROVINCES),
+            'listing_price': rng.randint(10000, 60000),
+        })
+    return cars
+
+
+def warm_up_models(cars: List[Dict[str, Any]]):
+    """Run cars through every prediction path once (featurizer, forest, cache, depreciation)"""
+    from models.depreciation import get_depreciations
+    from models.pipeline import get_full_analyses
+    from models.valuation import get_valuations
+
+    get_valuations(cars)
+    get_full_analyses(cars)
+    get_depreciations([
+        {'make': car['make'], 'model': car['model'], 'purchasePrice': car['listing_price'],
+         'year': car['year'], 'years': 5}
+        for car in cars
+    ])
+
+
+class Readiness:
+    """
+    Tracks the startup phase and how long each one took
+
+    The service binds its port while the model is still loading; liveness
+    only says the process is up, readiness says the first prediction will
+    be fast.
+    """
+
+    def __init__(self, started: Optional[float] = None, import_seconds: Optional[float] = None):
+        # perf_counter() when the process began importing the app
+        self.started = started if started is not None else time.perf_counter()
+        self.phase = 'starting'
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        if import_seconds is not None:
+            self.timings['import'] = import_seconds
+        self._phase_started = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == 'ready'
+
+    @property
+    def failed(self) -> bool:
+        return self.phase == 'failed'
+
+    def enter(self, phase: str):
+        now = time.perf_counter()
+        if self.phase in PHASES and self.phase != 'starting':
+            self.timings[self.phase] = now - self._phase_started
+        self.phase = phase
+        self._phase_started = now
+        if phase == 'ready':
+            self.timings['timeToReady'] = now - self.started
+
+    def fail(self, error: Exception):
+        self.error = f"{type(error).__name__}: {error}"
+        self.enter('failed')
+
+    def start(self, warm_start: Callable[['Readiness'], Any]):
+        """Run the loading/warm-up coroutine in the background"""
+        self._task = asyncio.get_running_loop().create_task(warm_start(self))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'phase': self.phase,
+            'ready': self.ready,
+            'error': self.error,
+            'uptimeSeconds': round(time.perf_counter() - self.started, 3),
+            'startupMs': {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+        }
+
+
+async def warm_start(
+    readiness: Readiness,
+    load: Callable[[], Any],
+    executor,
+    batch_size: int,
+    warm_up: Callable[[List[Dict[str, Any]]], Any] = warm_up_models,
+):
+    """
+    Load the model off the event loop, then run one warm-up batch per
+    inference worker so every thread or process has touched the model
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        readiness.enter('loading')
+        await loop.run_in_executor(None, load)
+
+        if batch_size > 0:
+            readiness.enter('warming')
+            cars = warmup_cars(batch_size)
+            await asyncio.gather(*(executor.run(warm_up, cars) for _ in range(executor.workers)))
+
+        readiness.enter('ready')
+        ms = readiness.status()['startupMs']
+        print(f"✅ Ready in {ms['timeToReady']:.0f}ms "
+              f"({', '.join(f'{k} {v:.0f}ms' for k, v in ms.items() if k != 'timeToReady')})")
+    except Exception as e:
+        readiness.fail(e)
+        print(f"❌ Startup failed: {readiness.error}")
+
+
+def warmup_batch_size() -> int:
+    """ML_WARMUP_BATCH cars per worker (0 skips the warm-up)"""
+    return int(os.environ.get('ML_WARMUP_BATCH', 64))
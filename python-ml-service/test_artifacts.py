@@ -0,0 +1,73 @@
+"""
+Tests for saving and loading model artifacts
+"""
+
+import sys
+import os
+import pickle
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.valuation import CarValuationModel, current_model, ensure_model
+
+
+CARS = [
+    {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX', 'province': 'ON'},
+    {'make': 'Toyota', 'model': 'Camry', 'year': 2016, 'mileage': 120000, 'trim': 'LE', 'province': 'BC'},
+    {'make': 'Nissan', 'model': 'Unknown', 'year': 2012, 'mileage': 200000, 'trim': 'Base', 'province': 'QC'},
+]
+
+
+def saved_model(tmp_path):
+    ensure_model()
+    path = str(tmp_path / 'model.pkl')
+    current_model().save(path, 'fingerprint')
+    return path
+
+
+def test_artifact_roundtrip_defers_estimator(tmp_path):
+    path = saved_model(tmp_path)
+    model = current_model()
+    loaded = CarValuationModel()
+    assert loaded.load(path, 'fingerprint')
+    assert loaded._estimator_state is not None
+    assert loaded.memory_footprint() == {'flat_forest': loaded.flat_forest.nbytes}
+
+    X = model.feature_encoder.transform(CARS)
+    np.testing.assert_array_equal(loaded._mean_std(X)[0], model._mean_std(X)[0])
+    # Serving never unpickled the sklearn part
+    assert loaded._estimator_state is not None
+
+    # ...which comes back on first use, unseen categories included
+    np.testing.assert_array_equal(loaded.model.predict(X), model.model.predict(X))
+    assert loaded._estimator_state is None
+    np.testing.assert_allclose(loaded.prepare_features(pd.DataFrame(CARS))[loaded.features].to_numpy(), X, rtol=1e-6)
+    assert loaded.comparables.rows == model.comparables.rows
+
+
+def test_artifact_fingerprint_mismatch(tmp_path):
+    path = saved_model(tmp_path)
+    assert not CarValuationModel().load(path, 'other')
+    assert not CarValuationModel().load(str(tmp_path / 'missing.pkl'))
+
+
+def test_tampered_artifact_is_rejected(tmp_path):
+    path = saved_model(tmp_path)
+    for part in ('payload', 'estimator_payload'):
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+        data = bytearray(artifact[part])
+        data[len(data) // 2] ^= 0xFF
+        artifact[part] = bytes(data)
+        tampered = str(tmp_path / f'{part}.pkl')
+        with open(tampered, 'wb') as f:
+            pickle.dump(artifact, f)
+        loaded = CarValuationModel()
+        assert not loaded.load(tampered, 'fingerprint')
+        assert not loaded.is_trained
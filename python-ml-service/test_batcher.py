@@ -0,0 +1,137 @@
+"""
+Tests for adaptive micro-batching of single valuation requests
+"""
+
+import sys
+import os
+import asyncio
+import copy
+import threading
+import time
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.valuation import current_model, ensure_model
+from serving.batcher import MicroBatcher
+from serving.executor import InferenceExecutor
+
+
+CARS = [
+    {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX', 'province': 'ON'},
+    {'make': 'Toyota', 'model': 'Camry', 'year': 2016, 'mileage': 120000, 'trim': 'LE', 'province': 'BC'},
+    # Cannot be scored: no mileage per year for a car from next year
+    {'make': 'Honda', 'model': 'Civic', 'year': 2025, 'mileage': 1000, 'trim': 'EX', 'province': 'ON'},
+    {'make': 'Ford', 'model': 'F-150', 'year': 2019, 'mileage': 80000, 'trim': 'XLT', 'province': 'AB'},
+    {'make': 'Honda', 'model': 'Civic', 'year': 2018, 'mileage': 95000, 'trim': 'LX', 'province': 'QC'},
+]
+
+
+@pytest.fixture
+def model():
+    ensure_model()
+    # No cache or surface, so every car reaches the forest
+    model = copy.copy(current_model())
+    model.cache = None
+    model.surface = None
+    return model
+
+
+def test_concurrent_requests_share_one_forest_call(model, monkeypatch):
+    forest_calls = []
+    mean_std = model._mean_std
+
+    def counted(X, timer=None):
+        forest_calls.append(len(X))
+        return mean_std(X, timer)
+
+    monkeypatch.setattr(model, '_mean_std', counted)
+    executor = InferenceExecutor(workers=1)
+    batcher = MicroBatcher(model.predict_batch, executor.run, max_batch=64, max_wait_ms=50)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*(batcher.submit(car) for car in CARS))
+        finally:
+            await batcher.stop()
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    # Fan-in: one batch and one forest call for every car that can be scored
+    assert (batcher.batches, batcher.items, forest_calls) == (1, len(CARS), [len(CARS) - 1])
+    # Fan-out: each caller gets the valuation of its own car
+    assert 'error' in results[2]
+    expected = model.predict_batch([car for i, car in enumerate(CARS) if i != 2])
+    assert [result for i, result in enumerate(results) if i != 2] == expected
+    assert len({result['fairPrice'] for result in expected}) == len(expected)
+
+
+def test_failed_batch_reaches_every_caller():
+    def broken(cars):
+        raise RuntimeError('forest unavailable')
+
+    executor = InferenceExecutor(workers=1)
+    batcher = MicroBatcher(broken, executor.run, max_wait_ms=50)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*(batcher.submit(car) for car in CARS), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert executor.failed == 1 and batcher.batches == 0
+
+
+def test_full_batcher_queue_returns_503(monkeypatch):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    import main
+
+    if not main.USE_MICROBATCH:
+        pytest.skip('micro-batching is off (ML_MICROBATCH=0)')
+    batcher, executor = main.batcher, main.executor
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while client.get('/health/ready').status_code != 200:
+            assert time.time() < deadline, 'model never became ready'
+            time.sleep(0.05)
+
+        # Restart the batcher with room for two waiting cars
+        client.portal.call(batcher.stop)
+        monkeypatch.setattr(batcher, 'max_queued', 2)
+        release = threading.Event()
+        blockers = [client.portal.start_task_soon(executor.run, release.wait) for _ in range(executor.workers)]
+        waiting = []
+        try:
+            # Every worker is busy, so batches stop leaving and cars pile up
+            deadline = time.time() + 10
+            while batcher._queue is None or not batcher._queue.full():
+                assert time.time() < deadline, 'batcher queue never filled up'
+                waiting.append(client.portal.start_task_soon(batcher.submit, CARS[0]))
+                time.sleep(0.01)
+            rejected = batcher.rejected
+
+            response = client.post('/api/valuation', json=CARS[1])
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            stats = client.get('/stats').json()['batcher']
+            assert stats['queued'] == 2 and stats['rejected'] == rejected + 1
+        finally:
+            release.set()
+        assert all(blocker.result(timeout=10) for blocker in blockers)
+        assert all('fairPrice' in car.result(timeout=10) for car in waiting)
+
+        response = client.post('/api/valuation', json=CARS[1])
+        assert response.status_code == 200
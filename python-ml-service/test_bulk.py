@@ -0,0 +1,73 @@
+"""
+Tests for offline bulk scoring
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import pytest
+
+import models.bulk as bulk
+from models.depreciation import depreciation_model
+from models.pipeline import get_full_analyses
+from models.valuation import current_model, ensure_model
+
+
+CARS = [
+    {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX',
+     'province': 'ON', 'listing_price': 21000},
+    {'make': 'Toyota', 'model': 'RAV4', 'year': 2021, 'mileage': 50000},
+    {'make': 'BMW', 'model': 'X5', 'year': None, 'mileage': 90000},
+    {'make': 'Ford', 'model': 'F-150', 'year': 2025, 'mileage': 10000},
+]
+
+
+def test_score_frame_matches_full_analysis():
+    ensure_model()
+    scored = bulk.score_frame(pd.DataFrame(CARS), current_model(), depreciation_model)
+    expected, _ = get_full_analyses([{'trim': 'Base', 'province': 'ON', **car} for car in CARS[:2]])
+
+    for row, analysis in zip(scored.head(2).itertuples(), expected):
+        assert row.fair_price == analysis['valuation']['fairPrice']
+        assert row.deal_score == analysis['valuation']['dealScore']
+        assert row.resale_value_5yr == analysis['depreciation']['resaleValue5Year']
+        assert row.error == ''
+    assert scored['error'].tolist()[2:] == ['year: missing or invalid', 'Input contains infinity or NaN']
+    assert scored['fair_price'].isna().tolist() == [False, False, True, True]
+
+
+def test_run_bulk_resumes_missing_chunks(tmp_path, monkeypatch):
+    source = str(tmp_path / 'listings.csv')
+    output = str(tmp_path / 'scored.csv')
+    pd.DataFrame(CARS[:2] * 50).to_csv(source, index=False)
+
+    def interrupted(*args):
+        raise KeyboardInterrupt
+
+    # Stop after scoring, as if interrupted, then lose one finished chunk
+    merge_parts = bulk.merge_parts
+    monkeypatch.setattr(bulk, 'merge_parts', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        bulk.run_bulk(source, output, chunk_rows=30, jobs=1)
+    parts = sorted(os.listdir(output + '.parts'))
+    assert parts == ['manifest.json'] + [f'part-{i:06d}.csv' for i in range(4)]
+    os.remove(os.path.join(output + '.parts', 'part-000002.csv'))
+
+    monkeypatch.setattr(bulk, 'merge_parts', merge_parts)
+    stats = bulk.run_bulk(source, output, chunk_rows=30, jobs=1)
+    assert (stats['chunks'], stats['resumedChunks'], stats['rows'], stats['resumedRows']) == (4, 3, 30, 70)
+    assert not os.path.exists(output + '.parts')
+
+    scored = pd.read_csv(output)
+    assert len(scored) == 100 and scored['fair_price'].notna().all()
+    assert scored['fair_price'].nunique() == 2
+
+    with pytest.raises(ValueError, match='chunkRows'):
+        bulk._prepare_parts(output + '.parts', bulk._manifest(source, 30), restart=False)
+        bulk._prepare_parts(output + '.parts', bulk._manifest(source, 40), restart=False)
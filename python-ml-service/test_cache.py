@@ -0,0 +1,82 @@
+"""
+Tests for the LRU + TTL prediction cache
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import models.cache as cache_module
+from models.cache import PredictionCache
+from models.surface import build_surface
+from models.valuation import CarValuationModel, current_model, ensure_model
+
+
+def test_lru_eviction_ttl_and_counters(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_size=2, ttl=10)
+
+    cache.put_many([('a', 1.0, 0.1), ('b', 2.0, 0.2)], version=1)
+    assert cache.get_many(['a'], version=1) == [(1.0, 0.1)]
+    # 'b' is now least recently used and makes room for 'c'
+    cache.put_many([('c', 3.0, 0.3)], version=1)
+    assert cache.get_many(['a', 'b', 'c'], version=1) == [(1.0, 0.1), None, (3.0, 0.3)]
+
+    now[0] += 11
+    assert cache.get_many(['a', 'c'], version=1) == [None, None]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (3, 3, 1, 2)
+    assert stats['size'] == 0 and stats['hitRate'] == 0.5
+
+    # A newer model version drops the old entries
+    cache.put_many([('a', 1.0, 0.1)], version=1)
+    assert cache.get_many(['a'], version=2) == [None]
+    assert cache.stats()['invalidations'] == 1 and not PredictionCache(max_size=0).enabled
+
+
+def test_mileage_bucket_applies_to_every_scoring_path():
+    ensure_model()
+    live = current_model()
+    model = CarValuationModel(cache=PredictionCache(max_size=100, mileage_bucket=5000))
+    model.__dict__.update({key: value for key, value in live.__dict__.items() if key != 'cache'})
+    car = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 61234, 'trim': 'EX', 'province': 'ON'}
+
+    rows, mean, std = model.score([car])
+    column_mean, column_std = model.score_columns(
+        np.array([2020.0]), np.array([61234.0]),
+        {field: np.array([car[field]], dtype=object) for field in ('make', 'model', 'trim', 'province')}
+    )
+    bucketed = live.predict_batch([{**car, 'mileage': 60000}])[0]
+    assert (mean[0], std[0]) == (column_mean[0], column_std[0])
+    assert int(mean[0]) == bucketed['fairPrice']
+    # The cached answer is the bucketed prediction too
+    assert model.score([car])[1][0] == mean[0] and model.cache.stats()['hits'] == 1
+
+
+def test_mileage_bucket_applies_to_surface_lookups():
+    ensure_model()
+    live = current_model()
+    model = CarValuationModel(cache=PredictionCache(max_size=100, mileage_bucket=5000))
+    model.__dict__.update({key: value for key, value in live.__dict__.items() if key != 'cache'})
+    car = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 61234, 'trim': 'EX', 'province': 'ON'}
+    other = {**car, 'year': 2018, 'mileage': 79999}
+    forest = model.score([car, other])[1]
+
+    # 61,234 and 79,999 km bucket to grid points, where the surface is exact
+    model.surface, _ = build_surface(model, step=20000, max_mileage=100000, jobs=1, pairs=[('Honda', 'Civic')])
+    single = model.score([car])[1]
+    batch = model.score([car, other])[1]
+    columns = model.score_columns(
+        np.array([2020.0, 2018.0]), np.array([61234.0, 79999.0]),
+        {field: np.array([car[field]] * 2, dtype=object) for field in ('make', 'model', 'trim', 'province')}
+    )[0]
+    assert single[0] == batch[0] == columns[0] == forest[0]
+    assert batch[1] == columns[1] == forest[1]
+    assert model.cache.stats()['hits'] == 0
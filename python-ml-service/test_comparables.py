@@ -0,0 +1,72 @@
+"""
+Tests for the comparable-listings index
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from models.comparables import MILEAGE_SCALE, ComparablesIndex
+from models.valuation import CarValuationModel, current_model, ensure_model, get_comparables, get_comparables_path
+
+
+def test_query_searches_only_its_make_and_model():
+    frame = pd.DataFrame([
+        {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 50000, 'trim': 'EX', 'province': 'ON', 'price': 20000},
+        {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 65000, 'trim': 'EX', 'province': 'QC', 'price': 19000},
+        {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 50000, 'trim': 'LE', 'province': 'BC', 'price': 18000},
+        {'make': 'Honda', 'model': 'Civic', 'year': 2015, 'mileage': 50000, 'trim': 'EX', 'province': 'AB', 'price': 9000},
+        {'make': 'Honda', 'model': 'Accord', 'year': 2020, 'mileage': 50000, 'trim': 'EX', 'province': 'ON', 'price': 25000},
+    ])
+    index = ComparablesIndex.build(frame)
+    car = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 50000, 'trim': 'EX'}
+
+    similar = index.query(car, k=10)
+    assert [c['price'] for c in similar] == [20000, 19000, 18000, 9000]
+    assert [c['distance'] for c in similar] == [0.0, round(15000 / MILEAGE_SCALE, 3), 1.0, 5.0]
+    assert similar[2] == {'year': 2020, 'mileage': 50000, 'trim': 'LE', 'province': 'BC',
+                          'price': 18000, 'distance': 1.0}
+
+    # An unseen trim is equally far from every trim
+    unseen = index.query({**car, 'trim': 'Sport'}, k=2)
+    assert unseen[0]['distance'] == unseen[1]['distance'] == round(1 / np.sqrt(2), 3)
+    assert index.query({**car, 'model': 'Pilot'}) == []
+
+
+def test_comparables_are_saved_next_to_the_model(tmp_path):
+    ensure_model()
+    car = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX', 'province': 'ON'}
+    similar = get_comparables(car, k=5)
+    assert len(similar) == 5
+    assert [c['distance'] for c in similar] == sorted(c['distance'] for c in similar)
+
+    path = str(tmp_path / 'model.pkl')
+    current_model().save(path, 'fingerprint')
+    assert os.path.exists(get_comparables_path(path))
+    with open(path, 'rb') as f:
+        artifact = f.read()
+    assert b'KDTree' not in artifact
+
+    loaded = CarValuationModel()
+    assert loaded.load(path)
+    assert loaded.__dict__.get('_comparables') is None
+    assert loaded.comparables.query(car, k=5) == similar
+    assert loaded.comparables.rows == current_model().metadata['training_rows']
+
+    # A missing or stale index only turns comparables off
+    os.remove(get_comparables_path(path))
+    assert loaded.load(path)
+    assert loaded.comparables is None
+    current_model().save(path, 'fingerprint')
+    current_model().save(str(tmp_path / 'other.pkl'), 'other')
+    os.replace(get_comparables_path(str(tmp_path / 'other.pkl')), get_comparables_path(path))
+    assert loaded.load(path)
+    assert loaded.comparables is None
+
@@ -0,0 +1,84 @@
+"""
+Tests for top-k deal ranking
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import models.deals as deals
+from data.training_data import TRAINING_SEED, generate_training_data
+from models.valuation import current_model, ensure_model, get_valuations
+
+
+def _listings(n: int) -> list:
+    frame = generate_training_data(n, seed=TRAINING_SEED + 5)
+    rng = np.random.default_rng(0)
+    frame['listing_price'] = (frame.pop('price') * rng.uniform(0.8, 1.2, n)).astype(int)
+    return frame.to_dict('records')
+
+
+def test_top_deals_match_a_full_sort():
+    ensure_model()
+    listings = _listings(500) + [{'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 1000},
+                                 {'make': 'Honda', 'model': 'Civic', 'year': 2025, 'mileage': 1000,
+                                  'listing_price': 1}]
+    candidates = deals.DealCandidates.from_records(listings)
+    assert (len(candidates), candidates.skipped) == (501, 1)
+
+    valuations = get_valuations(listings[:500])
+    order = sorted(range(500), key=lambda i: (-((valuations[i]['fairPrice'] - listings[i]['listing_price'])
+                                                / valuations[i]['fairPrice']), i))
+    result = deals.top_deals(candidates, current_model(), k=5)
+    assert (result['candidates'], result['skipped'], result['matched'], result['scored']) == (502, 1, 501, 500)
+    assert [deal['index'] for deal in result['deals']] == order[:5]
+    best = result['deals'][0]
+    assert {field: best[field] for field in valuations[0]} == valuations[order[0]]
+    assert best['make'] == listings[order[0]]['make']
+
+    result = deals.top_deals(candidates, current_model(), k=100, make=['Honda', 'Toyota'], province=['ON'],
+                             min_price=15000, max_price=30000)
+    expected = [i for i in order if listings[i]['make'] in ('Honda', 'Toyota') and listings[i]['province'] == 'ON'
+                and 15000 <= listings[i]['listing_price'] <= 30000]
+    assert [deal['index'] for deal in result['deals']] == expected
+    assert result['matched'] == result['scored'] == len(expected)
+
+
+def test_endpoint_ranks_the_deals_file(tmp_path, monkeypatch):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    import main
+
+    path = str(tmp_path / 'candidates.csv')
+    pd.DataFrame(_listings(300)).to_csv(path, index=False)
+    monkeypatch.setattr(deals, 'DEALS_PATH', path)
+    monkeypatch.setattr(main, 'DEALS_PATH', path)
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while client.get('/health/ready').status_code != 200:
+            assert time.time() < deadline, 'model never became ready'
+            time.sleep(0.05)
+        from_file = client.post('/api/deals/top', json={'k': 3, 'province': ['ON', 'QC']}).json()
+        cached = deals.file_candidates(path)._scores
+        inline = client.post('/api/deals/top', json={'k': 3, 'province': ['ON', 'QC'],
+                                                     'listings': _listings(300)}).json()
+        too_many = client.post('/api/deals/top', json={'k': 101})
+        oversized = client.post('/api/deals/top', json={'listings': [{}] * (deals.MAX_CANDIDATES + 1)})
+
+    assert from_file['source'] == 'file' and inline['source'] == 'request'
+    assert from_file['deals'] == inline['deals'] and len(from_file['deals']) == 3
+    assert all(deal['province'] in ('ON', 'QC') for deal in from_file['deals'])
+    # Fair prices for the whole file are kept for the serving model
+    assert cached[0] == current_model().version and len(cached[1]) == 300
+    assert too_many.status_code == 422
+    assert oversized.status_code == 422 and oversized.json()['detail'][0]['type'] == 'too_long'
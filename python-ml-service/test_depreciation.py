@@ -0,0 +1,51 @@
+"""
+Tests for vectorized depreciation curves
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from models.depreciation import BRAND_DEPRECIATION, MAX_HORIZON, depreciation_model
+
+
+def baseline_curve(purchase_price, make, years):
+    """The original per-car loop, kept as the reference"""
+    rate = BRAND_DEPRECIATION.get(make, 0.16)
+    values = [purchase_price]
+    current_value = purchase_price
+    for year in range(1, years + 1):
+        if year <= 2:
+            adjusted_rate = rate
+        elif year <= 4:
+            adjusted_rate = rate * 0.9
+        else:
+            adjusted_rate = rate * 0.8
+        current_value = current_value * (1 - adjusted_rate)
+        values.append(int(current_value))
+    return values
+
+
+def test_curves_truncate_like_the_baseline_for_every_brand_and_horizon():
+    # Every price up to 3,000 hits whole-dollar products where a different
+    # multiplication order would truncate differently
+    rng = np.random.default_rng(0)
+    prices = np.concatenate([np.arange(1, 3001), rng.integers(3001, 150_000, 500)])
+    for make in list(BRAND_DEPRECIATION) + ['Unknown']:
+        expected = np.array([baseline_curve(int(price), make, MAX_HORIZON) for price in prices])
+        for years in range(MAX_HORIZON + 1):
+            curves = depreciation_model.calculate_depreciation_curves(prices, [make] * len(prices), years)
+            np.testing.assert_array_equal(curves, expected[:, :years + 1], err_msg=f"{make}, {years} years")
+
+
+def test_predict_batch_uses_each_cars_horizon():
+    cars = [{'make': 'Toyota', 'purchasePrice': 40000, 'years': years} for years in range(1, MAX_HORIZON + 1)]
+    results = depreciation_model.predict_batch(cars + [{'make': 'Tesla', 'purchasePrice': 1, 'years': 16}])
+    for car, result in zip(cars, results):
+        assert result['yearlyValues'] == baseline_curve(40000, 'Toyota', car['years'])
+        assert result['resaleValue5Year'] == baseline_curve(40000, 'Toyota', 5)[5]
+    assert results[-1] == {'error': f"years must be between 1 and {MAX_HORIZON}"}
@@ -0,0 +1,79 @@
+"""
+Tests for the estimator registry and the gradient-boosting backend
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from data.training_data import generate_training_data
+from models.estimators import ESTIMATORS, get_estimator
+from models.valuation import CarValuationModel
+
+
+CARS = [
+    {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 50000,
+     'trim': 'EX', 'province': 'ON', 'listing_price': 20000},
+    {'make': 'BMW', 'model': 'X5', 'year': 2018, 'mileage': 90000,
+     'trim': 'Limited', 'province': 'BC'},
+]
+
+
+def test_registry():
+    assert {'forest', 'hgb'} <= set(ESTIMATORS)
+    with pytest.raises(ValueError):
+        get_estimator('linear')
+
+
+def test_boosting_backend_keeps_response_format(tmp_path):
+    model = CarValuationModel(estimator='hgb', params={**get_estimator('hgb').params, 'max_iter': 20})
+    model.train(generate_training_data(500))
+    assert model.flat_forest is None and model.make_encoder is None
+
+    results = model.predict_batch(CARS)
+    forest = CarValuationModel(params={'n_estimators': 5, 'random_state': 0})
+    forest.train(generate_training_data(500))
+    assert [set(r) for r in results] == [set(r) for r in forest.predict_batch(CARS)]
+    for result in results:
+        assert result['confidence'].startswith('±$')
+        assert result['modelConfidence'] in ('high', 'medium', 'low')
+
+    _, lower, upper = model.model.predict_interval(model.feature_encoder.transform(CARS))
+    assert np.all(lower <= upper)
+
+    path = str(tmp_path / 'hgb.pkl')
+    model.save(path, 'fp')
+    loaded = CarValuationModel()
+    assert loaded.load(path, 'fp') and loaded.estimator == 'hgb'
+    assert loaded.predict_batch(CARS) == results
+
+
+def test_boosting_limits_categories_and_threads(monkeypatch):
+    data = generate_training_data(300)
+    model = CarValuationModel(estimator='hgb', params={**get_estimator('hgb').params, 'max_iter': 5, 'max_bins': 8})
+    with pytest.raises(ValueError, match=r'\(at most 8\): make \(\d+\), model \(\d+\)'):
+        model.train(data)
+
+    model = CarValuationModel(estimator='hgb', params={**get_estimator('hgb').params, 'max_iter': 5})
+    model.train(data)
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    threads = []
+    predict = HistGradientBoostingRegressor.predict
+
+    def recording(self, X):
+        from threadpoolctl import threadpool_info
+        threads.append({pool['num_threads'] for pool in threadpool_info() if pool['user_api'] == 'openmp'})
+        return predict(self, X)
+
+    monkeypatch.setattr(HistGradientBoostingRegressor, 'predict', recording)
+    from threadpoolctl import threadpool_limits
+    with threadpool_limits(limits=4, user_api='openmp'):
+        model.predict_batch(CARS)
+    assert threads and all(found <= {1} for found in threads)
@@ -0,0 +1,90 @@
+"""
+Tests for the bounded inference executor
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from serving.executor import ExecutorSaturated, InferenceExecutor
+
+
+CAR = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX', 'province': 'ON'}
+
+
+async def wait_for(condition, timeout: float = 10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'condition never became true'
+        await asyncio.sleep(0.01)
+
+
+def test_full_queue_rejects_then_recovers():
+    executor = InferenceExecutor(workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def scenario():
+        # One job running and two waiting fill the executor
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(3)]
+        await wait_for(lambda: executor.in_flight == 3)
+        assert executor.queue_depth == 2
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(len, 'rejected')
+
+        release.set()
+        assert await asyncio.gather(*jobs) == [True] * 3
+        assert executor.queue_depth == 0 and executor.in_flight == 0
+        return await executor.run(len, 'accepted')
+
+    try:
+        assert asyncio.run(scenario()) == 8
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert (stats['submitted'], stats['completed'], stats['rejected'], stats['failed']) == (4, 4, 1, 0)
+
+
+def test_saturated_endpoint_returns_503_until_drained(monkeypatch):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while client.get('/health/ready').status_code != 200:
+            assert time.time() < deadline, 'model never became ready'
+            time.sleep(0.05)
+
+        executor = main.executor
+        monkeypatch.setattr(executor, 'max_queue', 1)
+        release = threading.Event()
+        blockers = [client.portal.start_task_soon(executor.run, release.wait)
+                    for _ in range(executor.workers + 1)]
+        try:
+            deadline = time.time() + 10
+            while executor.queue_depth < 1:
+                assert time.time() < deadline, 'executor never filled up'
+                time.sleep(0.01)
+            rejected = executor.rejected
+
+            response = client.post('/api/valuation/batch', json={'items': [CAR]})
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            stats = client.get('/stats').json()['executor']
+            assert stats['queueDepth'] == 1
+            assert stats['rejected'] == rejected + 1
+        finally:
+            release.set()
+        assert [blocker.result(timeout=10) for blocker in blockers] == [True] * len(blockers)
+
+        assert executor.queue_depth == 0
+        response = client.post('/api/valuation/batch', json={'items': [CAR]})
+        assert response.status_code == 200
+        assert client.get('/stats').json()['executor']['inFlight'] == 0
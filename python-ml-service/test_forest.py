@@ -0,0 +1,133 @@
+"""
+Parity tests for the flattened forest inference engine
+Checks FlatForest against sklearn's own predictions
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from data.training_data import generate_training_data
+from models.forest import FlatForest
+from models.valuation import initialize_model, valuation_model
+
+
+def _setup():
+    if not valuation_model.is_trained:
+        initialize_model()
+    # Single-threaded predict accumulates trees in a fixed order
+    valuation_model.model.set_params(n_jobs=1)
+    return valuation_model
+
+
+def _feature_matrix(n: int, seed: int) -> np.ndarray:
+    """Realistic rows plus perturbed and out-of-range ones"""
+    model = _setup()
+    cars = generate_training_data(n).to_dict('records')
+    X = model.feature_encoder.transform(cars)
+
+    rng = np.random.default_rng(seed)
+    noisy = X * rng.uniform(0.5, 1.5, size=X.shape).astype(np.float32)
+    extreme = np.vstack([np.full(X.shape[1], -1e9), np.full(X.shape[1], 1e9), np.zeros(X.shape[1])])
+    return np.vstack([X, noisy, extreme]).astype(np.float32)
+
+
+def test_flat_forest_matches_tree_predictions():
+    """Every tree reaches the same leaf value as tree.predict"""
+    model = _setup()
+    X = _feature_matrix(500, seed=1)
+    flat = model.flat_forest.tree_predictions(X)
+
+    expected = np.array([tree.predict(X) for tree in model.model.estimators_])
+    assert flat.shape == expected.shape
+    assert np.array_equal(flat, expected)
+
+
+def test_flat_forest_matches_forest_predict():
+    """The forest mean is bit-for-bit equal to RandomForestRegressor.predict"""
+    model = _setup()
+    X = _feature_matrix(2000, seed=2)
+    mean, std = model.flat_forest.predict_mean_std(X)
+
+    assert np.array_equal(mean, model.model.predict(X))
+    tree_predictions = np.array([tree.predict(X) for tree in model.model.estimators_])
+    assert np.allclose(std, np.std(tree_predictions, axis=0), rtol=1e-12, atol=1e-9)
+
+
+def test_flat_forest_split_thresholds():
+    """Rows sitting exactly on split thresholds go the same way as in sklearn"""
+    model = _setup()
+    flat = model.flat_forest
+    split = np.isfinite(flat.threshold)
+
+    rng = np.random.default_rng(3)
+    X = _feature_matrix(200, seed=3)[:200].copy()
+    nodes = rng.choice(np.flatnonzero(split), size=len(X))
+    for row, node in enumerate(nodes):
+        value = np.float32(flat.threshold[node])
+        X[row, flat.feature[node]] = value
+
+    assert np.array_equal(flat.predict(X), model.model.predict(X))
+
+
+def test_flat_forest_batch_sizes():
+    """Single rows, chunk boundaries and empty batches all work"""
+    model = _setup()
+    X = _feature_matrix(2500, seed=4)
+
+    for size in (0, 1, 2047, 2048, 2049, len(X)):
+        mean = model.flat_forest.predict(X[:size])
+        assert mean.shape == (size,)
+        if size:
+            assert np.array_equal(mean, model.model.predict(X[:size]))
+
+
+def test_flat_forest_export_roundtrip():
+    """Exporting the same forest twice gives identical arrays"""
+    model = _setup()
+    a = FlatForest.from_sklearn(model.model)
+    b = model.flat_forest
+    assert a.max_depth == b.max_depth
+    for name in ('nodes', 'value', 'roots'):
+        assert np.array_equal(getattr(a, name), getattr(b, name))
+
+
+def test_quantize_and_prune(tmp_path):
+    """Narrow leaves stay within half a unit; pruning trees or depth keeps a valid forest"""
+    flat = _setup().flat_forest
+    X = _feature_matrix(300, seed=5)
+    exact = flat.tree_predictions(X)
+
+    quantized = flat.quantize('int16', scale=100.0)
+    assert quantized.value.dtype == np.int16 and quantized.nbytes < flat.nbytes
+    assert np.abs(quantized.tree_predictions(X) - exact).max() <= 50
+
+    assert np.array_equal(flat.prune(n_trees=10).tree_predictions(X), exact[:10])
+    assert np.array_equal(flat.prune(max_depth=flat.max_depth).tree_predictions(X), exact)
+    shallow = flat.prune(max_depth=3)
+    assert shallow.node_count <= flat.n_trees * 15 and shallow.node_depths().max() == 3
+
+    quantized.save(str(tmp_path / 'flat'))
+    loaded = FlatForest.load(str(tmp_path / 'flat'))
+    assert loaded.value_scale == 100.0
+    assert np.array_equal(loaded.tree_predictions(X), quantized.tree_predictions(X))
+
+
+def test_compaction_stays_within_budget():
+    from models.compact import compact_forest, holdout_mae
+
+    model = _setup()
+    holdout = generate_training_data(500, seed=99)
+    X = model.feature_encoder.transform(holdout.to_dict('records'))
+    y = holdout['price'].to_numpy(dtype=np.float64)
+
+    compacted, report = compact_forest(model.flat_forest, X, y, budget=0.02)
+    assert holdout_mae(compacted, X, y) <= holdout_mae(model.flat_forest, X, y) * 1.02
+    assert report['after']['bytes'] < report['before']['bytes']
+    assert report['steps'] and all('kept' in step for step in report['steps'])
@@ -0,0 +1,61 @@
+"""
+Tests for the Prometheus metrics endpoint
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+
+import pytest
+
+from serving.metrics import Counter, Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, 'forest')
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="forest",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="forest",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="forest",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="forest"} 2.65' in lines
+    assert 'latency_seconds_count{stage="forest"} 4' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('requests_total', 'Requests', ('route',))
+    counter.inc('/a"b')
+    counter.inc('/a"b')
+    assert 'requests_total{route="/a\\"b"} 2' in counter.render()
+
+
+def test_metrics_endpoint_reports_routes_stages_and_model():
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    import main
+
+    car = {'make': 'Honda', 'model': 'CR-V', 'year': 2022, 'mileage': 35000,
+           'trim': 'EX', 'province': 'ON', 'listing_price': 28500}
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while client.get('/health/ready').status_code != 200:
+            assert time.time() < deadline, 'model never became ready'
+            time.sleep(0.05)
+        analysis = client.post('/api/full-analysis', json=car)
+        assert analysis.status_code == 200
+        text = client.get('/metrics').text
+
+    assert 'ml_http_requests_total{route="/api/full-analysis",method="POST",status="200"}' in text
+    for stage in ('parse', 'featurize', 'score', 'depreciation', 'serialize'):
+        assert f'ml_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'ml_model_trees 100' in text
+    timings = dict(entry.split(';dur=') for entry in analysis.headers['Server-Timing'].split(', '))
+    assert {'featurize', 'depreciation'} <= set(timings)
+    assert all(float(ms) >= 0 for ms in timings.values())
+    assert 'ml_model_training_rows' in text
@@ -61,7 +61,7 @@ def test_valuation():
             print(f"\n  ✅ Fair Price: ${result['fairPrice']:,}")
             print(f"  📊 Deal Score: {result['dealScore']}/100")
             print(f"  💡 Assessment: {result['pricePosition']}")
-            print(f"  🎯 Confidence: {result['confidence']:.1%}")
+            print(f"  🎯 Confidence: {result['confidence']}")
             print(f"  💬 Advice: {result['advice']}")
         except Exception as e:
             print(f"  ❌ Error: {e}")
@@ -0,0 +1,71 @@
+"""
+Tests for NDJSON streaming valuation
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from serving.ndjson import stream_chunks
+
+
+async def _body(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(data: bytes, chunk_size: int, read_size: int = 7, max_line_bytes: int = 1024):
+    seen = []
+
+    async def process(records):
+        seen.append(len(records))
+        return [{'n': record['n']} for record in records]
+
+    out = b''.join([part async for part in stream_chunks(_body(data, read_size), process, chunk_size, max_line_bytes)])
+    return [json.loads(line) for line in out.decode().splitlines()], seen
+
+
+def test_stream_chunks_keeps_line_order_and_errors():
+    lines = [json.dumps({'n': i}) for i in range(5)] + ['{bad', '', '[1]', json.dumps({'n': 9})]
+    results, seen = asyncio.run(_collect('\n'.join(lines).encode(), chunk_size=3))
+
+    assert [r['line'] for r in results] == [1, 2, 3, 4, 5, 6, 8, 9]
+    assert [r.get('n') for r in results] == [0, 1, 2, 3, 4, None, None, 9]
+    assert 'error' in results[5] and 'error' in results[6]
+    # Chunks count input lines, so invalid ones are never sent to `process`
+    assert seen == [3, 2, 1]
+
+    results, _ = asyncio.run(_collect(b'{"n": 1}\n' + b'1' * 2000, chunk_size=3))
+    assert results[0] == {'line': 1, 'n': 1}
+    assert 'longer than 1024 bytes' in results[-1]['error']
+
+
+def test_stream_endpoint_values_every_line():
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    import main
+
+    car = {'make': 'Honda', 'model': 'CR-V', 'year': 2022, 'mileage': 35000,
+           'trim': 'EX', 'province': 'ON', 'listing_price': 28500}
+    body = '\n'.join([json.dumps(car)] * 5 + [json.dumps({'make': 'Honda'})])
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while client.get('/health/ready').status_code != 200:
+            assert time.time() < deadline, 'model never became ready'
+            time.sleep(0.05)
+        response = client.post('/api/valuation/stream', content=body)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r['line'] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert all(r['fairPrice'] > 0 for r in results[:5])
+    assert 'model: Field required' in results[5]['error']
@@ -0,0 +1,78 @@
+"""
+Tests for background retraining and the model hot-swap
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data.listings import append_listings, get_training_set, load_listings
+from models.cache import PredictionCache
+from models.retrain import Retrainer
+import models.valuation as valuation
+from models.valuation import CarValuationModel, current_model, ensure_model, get_valuations, swap_model
+
+
+CAR = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000,
+       'trim': 'EX', 'province': 'ON', 'listing_price': 21000}
+
+
+def test_cache_ignores_older_model_versions():
+    cache = PredictionCache(max_size=10)
+    cache.put_many([('a', 1.0, 0.1)], version=2)
+    # A request still running on the replaced model neither reads nor evicts
+    assert cache.get_many(['a'], version=1) == [None]
+    cache.put_many([('b', 2.0, 0.2)], version=1)
+    assert cache.get_many(['a', 'b'], version=2) == [(1.0, 0.1), None]
+
+
+def test_listings_join_training_set(tmp_path):
+    path = str(tmp_path / 'listings.csv')
+    row = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000,
+           'trim': 'EX', 'province': 'ON', 'price': 21000}
+    assert append_listings([row], path) == 1
+    assert append_listings([row, row], path) == 3
+    assert len(load_listings(path)) == 3
+    assert len(get_training_set(path)) == len(get_training_set(str(tmp_path / 'none.csv'))) + 3
+
+
+def test_retrain_promotes_new_version(tmp_path, monkeypatch):
+    ensure_model()
+    monkeypatch.setattr(valuation, 'ARTIFACT_DIR', str(tmp_path / 'artifacts'))
+    previous = current_model()
+    path = str(tmp_path / 'listings.csv')
+    append_listings([{'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000,
+                      'trim': 'EX', 'province': 'ON', 'price': 21000}] * 10, path)
+
+    retrainer = Retrainer(listings_path=path)
+    try:
+        job = retrainer.request()
+        assert retrainer.wait(timeout=120)
+        job = retrainer.status()['jobs'][0]
+        assert job['status'] == 'done' and job['promoted']
+        assert job['live']['version'] == previous.version
+        assert 0 < job['candidate']['mae'] and job['candidate']['r2'] > 0.8
+
+        model = current_model()
+        assert model is not previous and model.version == job['version'] > previous.version
+        assert 'error' not in get_valuations([CAR])[0]
+        # Refitted on every row, held-out ones included, and saved for the next start
+        assert model.metadata['training_rows'] == job['rows'] == len(get_training_set(path))
+        restarted = CarValuationModel()
+        assert restarted.load(str(tmp_path / 'artifacts' / job['artifact']))
+        assert restarted.predict_batch([CAR]) == get_valuations([CAR])
+
+        # Queued behind the running job: callers get copies, not the live job
+        retrainer.request()
+        queued = retrainer.request()
+        queued['status'] = 'tampered'
+        assert retrainer.request()['status'] != 'tampered'
+        assert retrainer.wait(timeout=300)
+        latest = retrainer.status()['jobs'][-1]
+        assert latest['status'] == 'done' and not latest['live']['inSample']
+    finally:
+        swap_model(previous)
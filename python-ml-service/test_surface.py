@@ -0,0 +1,76 @@
+"""
+Tests for the materialized valuation surface
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import models.surface as surface_module
+from models.surface import build_surface
+from models.valuation import current_model, ensure_model
+
+
+PAIRS = [('Honda', 'Civic'), ('Toyota', 'RAV4')]
+CAR = {'make': 'Honda', 'model': 'Civic', 'year': 2020, 'mileage': 60000, 'trim': 'EX', 'province': 'ON'}
+
+
+def test_surface_matches_model_on_grid_and_misses_off_it():
+    ensure_model()
+    model = current_model()
+    surface, report = build_surface(model, step=20000, max_mileage=100000, jobs=1, pairs=PAIRS)
+    assert report['cells'] == 2 * 7 * 13 and surface.max_mileage == 100000
+    assert 0 < report['error']['coverage'] < 1
+
+    on_grid = [CAR, {**CAR, 'mileage': 0}, {**CAR, 'year': 2024, 'mileage': 100000}]
+    mean, std, hit = surface.lookup(on_grid)
+    exact_mean, exact_std = model._mean_std(model.feature_encoder.transform(on_grid))
+    assert hit.all()
+    np.testing.assert_array_equal(mean, exact_mean)
+    np.testing.assert_array_equal(std, exact_std)
+
+    # Halfway between grid points is the average of the two
+    halfway, _, _ = surface.lookup([{**CAR, 'mileage': 70000}])
+    ends, _, _ = surface.lookup([CAR, {**CAR, 'mileage': 80000}])
+    assert np.isclose(halfway[0], ends.mean())
+
+    off = [{**CAR, 'make': 'Mazda', 'model': 'CX-5'}, {**CAR, 'year': 2014}, {**CAR, 'mileage': 100001},
+           {**CAR, 'trim': 'Unknown'}]
+    mean, _, hit = surface.lookup(off)
+    assert not hit.any() and np.isnan(mean).all()
+    assert not surface.lookup([off[0]])[2][0]
+
+
+def test_predictions_mix_surface_and_model_rows():
+    ensure_model()
+    model = current_model()
+    cars = [CAR, {**CAR, 'make': 'Mazda', 'model': 'CX-5'}, {**CAR, 'mileage': 70000}, {**CAR, 'year': 2025}]
+    expected = model.predict_batch(cars)
+
+    surface, _ = build_surface(model, step=10000, max_mileage=100000, jobs=1, pairs=PAIRS)
+    model.surface = surface
+    try:
+        results = model.predict_batch(cars)
+    finally:
+        model.surface = None
+
+    # Grid points and model fallbacks are exact; between grid points it is interpolated
+    assert results[0] == expected[0] and results[1] == expected[1] and results[3] == expected[3]
+    assert abs(results[2]['fairPrice'] - expected[2]['fairPrice']) < 0.05 * expected[2]['fairPrice']
+
+
+def test_build_falls_back_to_one_job_when_workers_do_not_start(monkeypatch):
+    ensure_model()
+    model = current_model()
+    serial, _ = build_surface(model, step=20000, max_mileage=100000, jobs=1, pairs=PAIRS)
+    # No time for spawned workers to come up, as with an unguarded __main__
+    monkeypatch.setattr(surface_module, 'WORKER_START_TIMEOUT', 0)
+    surface, report = build_surface(model, step=20000, max_mileage=100000, jobs=2, pairs=PAIRS)
+    assert report['jobs'] == 1
+    np.testing.assert_array_equal(surface.mean, serial.mean)
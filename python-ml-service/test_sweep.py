@@ -0,0 +1,45 @@
+"""
+Tests for the forest hyperparameter sweep
+"""
+
+import sys
+import os
+import warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from data.training_data import generate_training_data
+from models.sweep import choose, evaluate_params, pareto_front
+from models.valuation import CarValuationModel
+
+
+def _result(mae, ms, size):
+    return {'params': {'mae': mae}, 'maeMean': mae, 'singleRowMs': ms, 'sizeBytes': size}
+
+
+def test_pareto_front_and_choice():
+    results = [
+        _result(2000, 0.30, 900),  # most accurate
+        _result(2010, 0.10, 300),  # within 1%, much faster
+        _result(2500, 0.05, 100),  # fastest, too inaccurate
+        _result(2100, 0.20, 400),  # beaten on every key by the second
+    ]
+    assert pareto_front(results) == [0, 1, 2]
+    assert choose(results, tolerance=0.01)['maeMean'] == 2010
+    assert choose(results, tolerance=0.0)['maeMean'] == 2000
+    assert choose(results, tolerance=0.5)['maeMean'] == 2500
+
+
+def test_evaluate_params_reports_accuracy_size_and_forest(tmp_path):
+    model = CarValuationModel()
+    df = model.prepare_features(generate_training_data(300), fit=True)
+    path = str(tmp_path / 'features.npz')
+    np.savez(path, X=df[model.features].to_numpy(dtype=np.float64), y=df['price'].to_numpy(dtype=np.float64))
+
+    result = evaluate_params({'n_estimators': 5, 'max_depth': 4}, path, folds=3, seed=0)
+    assert result['maeMean'] > 0 and result['sizeBytes'] > 0
+    assert result['flat'].n_trees == 5 and result['maxDepth'] <= 4
@@ -0,0 +1,158 @@
+"""
+Tests for the vectorized synthetic data generator
+Checks it stays statistically equivalent to the row-by-row reference
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from data.training_data import (
+    MAKES,
+    MODELS,
+    PROVINCE_MULTIPLIERS,
+    PROVINCES,
+    TRAINING_SEED,
+    TRIMS,
+    generate_training_data,
+    iter_training_data,
+)
+
+
+N_SAMPLES = 20000
+
+
+def _legacy_training_data(n_samples: int) -> pd.DataFrame:
+    """
+    The original row-by-row generator, as the statistical reference
+    
+    Draws from its own RandomState, in the order the global-seed version did.
+    """
+    rng = np.random.RandomState(TRAINING_SEED)
+    
+    data = []
+    current_year = 2024
+    
+    for _ in range(n_samples):
+        # Random car selection
+        make = rng.choice(list(MAKES.keys()))
+        model = rng.choice(MODELS[make])
+        year = rng.randint(2015, 2025)
+        age = current_year - year
+        
+        # Mileage (realistic Canadian driving: 15,000-20,000 km/year)
+        avg_km_per_year = rng.uniform(12000, 22000)
+        mileage = int(age * avg_km_per_year * rng.uniform(0.8, 1.2))
+        mileage = max(0, mileage)  # New cars have 0 km
+        
+        # Trim
+        trim = rng.choice(TRIMS)
+        trim_multiplier = 1.0 + (TRIMS.index(trim) * 0.05)  # Higher trims cost more
+        
+        # Province
+        province = rng.choice(PROVINCES)
+        province_mult = PROVINCE_MULTIPLIERS[province]
+        
+        # Calculate base price
+        make_data = MAKES[make]
+        base_price = make_data['base_price']
+        
+        # Apply depreciation (compound yearly)
+        depreciation_rate = make_data['depreciation']
+        depreciated_value = base_price * (1 - depreciation_rate) ** age
+        
+        # Apply mileage penalty (high mileage reduces value)
+        expected_mileage = age * 18000
+        if mileage > expected_mileage:
+            excess_km = mileage - expected_mileage
+            mileage_penalty = 1 - (excess_km / 200000) * 0.15  # Max 15% penalty
+            mileage_penalty = max(0.85, mileage_penalty)
+        else:
+            mileage_penalty = 1.0
+        
+        # Calculate final price
+        price = depreciated_value * trim_multiplier * province_mult * mileage_penalty
+        
+        # Add some random variance (±8%)
+        price = price * rng.uniform(0.92, 1.08)
+        price = int(price / 100) * 100  # Round to nearest $100
+        
+        # Ensure minimum price
+        price = max(5000, price)
+        
+        data.append({
+            'make': make,
+            'model': model,
+            'year': year,
+            'mileage': mileage,
+            'trim': trim,
+            'province': province,
+            'price': price,
+            'age': age,
+            'reliability_score': make_data['reliability'],
+        })
+    
+    return pd.DataFrame(data)
+
+
+def _ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    """Largest gap between the two empirical CDFs"""
+    points = np.union1d(a, b)
+    cdf_a = np.searchsorted(np.sort(a), points, side='right') / len(a)
+    cdf_b = np.searchsorted(np.sort(b), points, side='right') / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def test_same_columns_and_dtypes():
+    new = generate_training_data(100)
+    old = _legacy_training_data(100)
+    assert list(new.columns) == list(old.columns)
+    assert new.dtypes.to_dict() == old.dtypes.to_dict()
+
+
+def test_statistically_equivalent_to_legacy():
+    new = generate_training_data(N_SAMPLES)
+    old = _legacy_training_data(N_SAMPLES)
+
+    for col in ('price', 'mileage', 'year'):
+        assert abs(new[col].mean() - old[col].mean()) / old[col].mean() < 0.03, col
+        assert abs(new[col].std() - old[col].std()) / old[col].std() < 0.05, col
+        assert _ks_statistic(new[col].to_numpy(), old[col].to_numpy()) < 0.03, col
+
+    for col in ('make', 'trim', 'province'):
+        diff = new[col].value_counts(normalize=True) - old[col].value_counts(normalize=True)
+        assert diff.abs().max() < 0.02, col
+
+    # Price and mileage relationships hold per make
+    by_make = (new.groupby('make')['price'].mean() / old.groupby('make')['price'].mean())
+    assert ((by_make > 0.9) & (by_make < 1.1)).all()
+
+
+def test_valid_rows():
+    df = generate_training_data(N_SAMPLES)
+    assert (df['price'] >= 5000).all()
+    assert (df['price'] % 100 == 0).all()
+    assert (df['mileage'] >= 0).all()
+    assert df['year'].between(2015, 2024).all()
+    assert (df['age'] == 2024 - df['year']).all()
+    assert all(model in MODELS[make] for make, model in zip(df['make'], df['model']))
+
+
+def test_seeded_and_streamed():
+    a = generate_training_data(5000, seed=7, chunk_size=1000)
+    b = generate_training_data(5000, seed=7, chunk_size=1000)
+    c = generate_training_data(5000, seed=8, chunk_size=1000)
+    assert a.equals(b)
+    assert not a.equals(c)
+
+    chunks = list(iter_training_data(5000, chunk_size=1000, seed=7))
+    assert [len(chunk) for chunk in chunks] == [1000] * 5
+    assert np.array_equal(
+        np.concatenate([chunk['price'].to_numpy() for chunk in chunks]),
+        a['price'].to_numpy()
+    )